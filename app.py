@@ -1,37 +1,69 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import os, time
 import os
+import time
 import psycopg2
-import bcrypt
 import plotly.express as px
 import plotly.graph_objects as go
+import ipaddress
 import json
 from PIL import Image
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
 
-from database.db import get_connection
+from database.db import get_connection, get_facility_needs_by_program_type
 
 
 st.set_page_config(page_title="NiDAH-P Portal", layout="wide")
 
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "nidah.db")
-
 from utils import generate_verification_token, send_verification_email
 
-from database.auth import authenticate_facility
+from database.migrate import ensure_schema
 
-from database.db import create_tables, get_connection, authenticate_user
+import config
 
 from auth.auth_utils import register_user
 
-from database.db import get_facility_needs_by_program_type
+from auth.passwords import AuthBusy, LoginThrottled
+
+from auth.service import authenticate, revalidate
 
 from auth.program_utils import get_programs
 
+from jobs.queue import enqueue, get_job, recent_jobs, retry, list_schedules
+
+from jobs.handlers import HANDLERS
+
+from dashboards.user import get_user_overview, invalidate_user_overview
+
+from dashboards.facility import (
+    IMPORT_TEMPLATE, add_need, delete_need, get_facility_needs, import_needs, update_need
+)
+
+from dashboards.admin import (
+    DOCUMENTS_GRID, FACILITIES_GRID, USERS_GRID,
+    get_additional_files, get_document, get_feedback_summary, get_kpis, get_outcomes
+)
+
+from database.cache import cache_stats
+
+from database.pool import pool_stats
+
+from database.reports import REPORTS, report_filename
+
+from dashboards.grid import page_controls, page_cursor, render_grid
+
+from database.approvals import decide_interests, decide_matches, facility_states, pending_interests, pending_matches
+
+from database.search import MIN_QUERY_LENGTH, search_facilities, search_users
+
+from storage.documents import record_additional_files, storage_stats, store_upload
+
+from storage.thumbnails import get_thumbnails
+
+from dashboards.reruns import rerun_stats, timed_run
+
 from database.db import get_connection
 
 # app.py (Streamlit part)
@@ -59,79 +91,12 @@ if "user_role" not in st.session_state:
     st.session_state.user_role = ""
 
 
-def match_users_to_facilities():
-    """
-    Assign users to facilities based on their skills vs facility needs.
-    Matches are inserted as 'Pending' in the database.
-    """
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # Get users and their specializations
-        cur.execute("""
-            SELECT id, specialization
-            FROM users
-            WHERE role IN ('individual','association')
-        """)
-        users = cur.fetchall()
-        user_skills = {user[0]: [s.strip() for s in user[1].split(",")] for user in users}
-
-        # Get facilities and their needs
-        cur.execute("""
-            SELECT id, need
-            FROM facilities
-        """)
-        facilities = cur.fetchall()
-        facility_needs = {f[0]: [n.strip() for n in f[1].split(",")] for f in facilities}
-
-        assignments = []
-
-        # Calculate matches
-        for user_id, skills in user_skills.items():
-            best_match = None
-            best_score = 0
-            for facility_id, need in facility_needs.items():
-                score = len(set(skills) & set(needs))
-                if score > best_score:
-                    best_score = score
-                    best_match = facility_id
-
-            if best_match:
-                # Insert match as pending
-                cur.execute("""
-                    INSERT INTO user_assignments (user_id, facility_id, score, assigned_at, status)
-                    VALUES (%s, %s, %s, NOW(), 'Pending')
-                    ON CONFLICT (user_id) DO UPDATE
-                    SET facility_id = EXCLUDED.facility_id,
-                        score = EXCLUDED.score,
-                        assigned_at = EXCLUDED.assigned_at,
-                        status = 'Pending'
-                """, (user_id, best_match, best_score))
-
-                assignments.append({
-                    "user_id": user_id,
-                    "facility_id": best_match,
-                    "score": best_score
-                })
-
-        conn.commit()
-        cur.close()
-        conn.close()
-
-        return assignments  # return list of proposed matches
-
-    except Exception as e:
-        return f"❌ Error matching users to facilities: {e}"
-
-
-
-
 # -------------------------------------------------
 # INITIAL SETUP
 # -------------------------------------------------
 
-create_tables()
+# Runs DDL only when the database is behind the newest migration
+ensure_schema(auto_apply=config.AUTO_MIGRATE)
 
 
 # -------------------- HOME PAGE --------------------
@@ -251,6 +216,65 @@ def home_page():
 # -------------------------------------------------
 # LOGIN PAGE
 # -------------------------------------------------
+def sign_in(principal):
+    """Keep the principal for later reruns and fill the legacy session keys."""
+    st.session_state.principal = principal
+    st.session_state.logged_in = True
+    st.session_state.user_id = principal.id
+    st.session_state.full_name = principal.display_name
+    st.session_state.username = principal.username
+    st.session_state.role = principal.role
+    st.session_state.user_role = principal.role
+    if principal.kind == "facility":
+        st.session_state.facility_name = principal.display_name
+
+
+def current_principal():
+    """
+    The signed-in principal, or None. Cheap on most reruns: the account is
+    only re-checked against the database every PRINCIPAL_RECHECK_SECONDS.
+    """
+    principal = revalidate(st.session_state.get("principal"))
+    if principal is None:
+        st.session_state.pop("principal", None)
+    else:
+        st.session_state.principal = principal
+    return principal
+
+
+_TRUSTED_PROXIES = [ipaddress.ip_network(p, strict=False) for p in config.TRUSTED_PROXIES]
+
+
+def _is_trusted_proxy(ip):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _TRUSTED_PROXIES)
+
+
+def client_ip():
+    """
+    Client address for login throttling, or None if it can't be trusted.
+    X-Forwarded-For is only read when the connection comes from one of
+    TRUSTED_PROXIES; the right-most hop that isn't a trusted proxy is the
+    client, since anything left of it was sent by the client itself.
+    """
+    try:
+        peer = getattr(st.context, "ip_address", None)
+        if peer and not _is_trusted_proxy(peer):
+            return peer
+        if not peer or not _TRUSTED_PROXIES:
+            return None
+        forwarded = st.context.headers.get("X-Forwarded-For", "")
+        for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+            if not _is_trusted_proxy(hop):
+                return hop
+        return None
+    except Exception:
+        return None
+
+
 def login_facility_page():
     # CSS for centered card
     st.markdown("""
@@ -295,17 +319,18 @@ def login_facility_page():
         password = st.text_input("Password", type="password", key="facility_password")
 
         if st.button("Login", key="facility_login_btn"):
-            facility = authenticate_facility(facility_code, password)
-            if facility:
-                st.session_state.logged_in = True
-                st.session_state.user_role = "facility"
-                st.session_state.user_id = facility["id"]          # match dashboard
-                st.session_state.facility_name = facility["facility_name"]
-                st.session_state.full_name = facility["facility_name"]  # for consistency
+            try:
+                principal = authenticate("facility", facility_code, password, ip=client_ip())
+                login_error = "Invalid facility code or password"
+            except (AuthBusy, LoginThrottled) as e:
+                principal, login_error = None, str(e)
+
+            if principal:
+                sign_in(principal)
                 st.session_state.page = "facility_dashboard"
                 st.rerun()
             else:
-                st.error("Invalid facility code or password")
+                st.error(login_error)
    
         if st.button("Forgot Password?"):
             forgot_password()
@@ -365,19 +390,17 @@ def login_user():
         password = st.text_input("Password", type="password", key="user_login_pass")
 
         if st.button("Sign in", key="user_login_btn_user_page"):
-            user = authenticate_user(username, password)
+            try:
+                principal = authenticate("user", username, password, ip=client_ip())
+                login_error = "Invalid username or password"
+            except (AuthBusy, LoginThrottled) as e:
+                principal, login_error = None, str(e)
 
-            if user:
-                st.session_state.logged_in = True
-                st.session_state.user_id = user["id"]
-                st.session_state.full_name = user["full_name"]
-                st.session_state.role = user["role"].strip().lower()
-                st.session_state.username = user["username"]
-                
+            if principal:
+                sign_in(principal)
 
-                
                 # Route based on role
-                if user["role"] == "admin":
+                if principal.is_admin:
                     st.session_state.page = "admin_dashboard"
                 else:
                     st.session_state.page = "user_dashboard"
@@ -385,7 +408,7 @@ def login_user():
                 st.success(f"Welcome {st.session_state.full_name}")
                 st.rerun()
             else:
-                st.error("Invalid username or password")
+                st.error(login_error)
         
         if st.button("Forgot Password?"):
             forgot_password()
@@ -541,34 +564,15 @@ def user_dashboard():
     st.title(f"Welcome, {st.session_state.full_name}")
     role = st.session_state.get("role", "diaspora")  # default to diaspora if role missing
     
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
     # ================= DASHBOARD OVERVIEW =================
     if menu_choice == "Dashboard Overview":
         st.subheader("Dashboard Overview")
 
-        # --- Approved interests (show need + facility) ---
-        cur.execute("""
-            SELECT f.facility_name, n.need
-            FROM facility_needs n
-            JOIN user_interests ui ON n.id = ui.need_id
-            JOIN facilities f ON n.facility_id = f.id
-            WHERE ui.user_id = %s AND ui.status = 'Approved'
-            ORDER BY f.facility_name
-        """, (st.session_state.user_id,))
-        approved_interests = cur.fetchall()
-
-        # --- Pending / awaiting approval ---
-        cur.execute("""
-            SELECT DISTINCT f.facility_name
-            FROM facility_needs n
-            JOIN user_interests ui ON n.id = ui.need_id
-            JOIN facilities f ON n.facility_id = f.id
-            WHERE ui.user_id = %s AND ui.status = 'Pending'
-            ORDER BY f.facility_name
-        """, (st.session_state.user_id,))
-        pending_facilities = cur.fetchall()
+        # Approved interests, pending facilities and trainings come from one
+        # cached query; admin approvals invalidate it
+        overview = get_user_overview(st.session_state.user_id)
+        approved_interests = overview["approved"]
+        pending_facilities = overview["pending"]
 
         if not approved_interests and not pending_facilities:
             st.info("You have not engaged in any program yet.")
@@ -580,26 +584,13 @@ def user_dashboard():
 
             if pending_facilities:
                 st.warning("Awaiting approval:")
-                for facility_tuple in pending_facilities:
-                    st.write(f"• {facility_tuple[0]}")
+                for facility_name in pending_facilities:
+                    st.write(f"• {facility_name}")
 
         # ==================================================
         #                TRAINING LIST
         # ==================================================
-        training_list = []  # ✅ always initialize
-
-        cur.execute("""
-            SELECT
-                ui.training_title,
-                ui.training_status
-            FROM user_interests ui
-            JOIN facility_needs n ON ui.need_id = n.id
-            WHERE ui.user_id = %s
-              AND n.program_type = 'Training'
-              AND ui.status = 'Approved'
-            ORDER BY ui.training_status
-        """, (st.session_state.user_id,))
-        training_list = cur.fetchall()
+        training_list = overview["training"]
 
         st.markdown("### 📘 List of Training(s)")
 
@@ -614,9 +605,6 @@ def user_dashboard():
                 else:
                     st.info(f"🕒 {title} — {status}")
 
-        cur.close()
-        conn.close()
-
 
     # ================= PROGRAMS =================
     if menu_choice == "Programs":
@@ -732,88 +720,94 @@ def user_dashboard():
                     st.stop()
 
             # --- File saving ---
-            BASE_DIR = os.getcwd()
-            LICENSE_DIR = os.path.join(BASE_DIR, "uploads/licenses")
-            EXTRA_DIR = os.path.join(BASE_DIR, "uploads/qualifications")
-            os.makedirs(LICENSE_DIR, exist_ok=True)
-            os.makedirs(EXTRA_DIR, exist_ok=True)
-
             # ---- License file ----
-            license_path = None
+            license = None
             if uploaded_file:
-                ext = uploaded_file.name.split(".")[-1].lower()
-                license_filename = f"user_{st.session_state.user_id}_license_{int(time.time())}.{ext}"
-                license_path = os.path.join(LICENSE_DIR, license_filename)
-                with open(license_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                license = store_upload(uploaded_file, uploaded_file.name, uploaded_file.type)
 
             # ---- Additional qualifications ----
-            extra_paths = []
-            if additional_files:
-                for file in additional_files:
-                    ext = file.name.split(".")[-1].lower()
-                    fname = f"user_{st.session_state.user_id}_qual_{int(time.time())}_{file.name}"
-                    fpath = os.path.join(EXTRA_DIR, fname)
-                    with open(fpath, "wb") as f:
-                        f.write(file.getbuffer())
-                    extra_paths.append(fpath)
+            extras = [store_upload(file, file.name, file.type) for file in additional_files or []]
+            extra_paths = [extra.path for extra in extras]
 
-                conn = get_connection()
-                cur = conn.cursor()
-
-                if role != "association":
-                    # ===== NORMAL USER INSERT =====
-                    cur.execute("""
-                        INSERT INTO user_documents (
-                            user_id,
-                            license_number,
-                            file_path,
-                            renew_license,
-                            not_registered_nigeria,
-                            additional_files,
-                            uploaded_at
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                        ON CONFLICT (user_id, license_number) DO UPDATE
-                        SET file_path = EXCLUDED.file_path,
-                            renew_license = EXCLUDED.renew_license,
-                            not_registered_nigeria = EXCLUDED.not_registered_nigeria,
-                            additional_files = EXCLUDED.additional_files,
-                            uploaded_at = NOW()
-                    """, (
-                        st.session_state.user_id,
+            conn = get_connection()
+            cur = conn.cursor()
+
+            if role != "association":
+                # ===== NORMAL USER INSERT =====
+                cur.execute("""
+                    INSERT INTO user_documents (
+                        user_id,
                         license_number,
-                        license_path,
-                        renew_license == "Yes",
-                        not_registered_ng == "Yes",
-                        extra_paths if extra_paths else None
-                    ))
+                        file_path,
+                        document_name,
+                        content_sha256,
+                        size_bytes,
+                        mime_type,
+                        renew_license,
+                        not_registered_nigeria,
+                        additional_files,
+                        uploaded_at
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (user_id, license_number) DO UPDATE
+                    SET file_path = EXCLUDED.file_path,
+                        document_name = EXCLUDED.document_name,
+                        content_sha256 = EXCLUDED.content_sha256,
+                        size_bytes = EXCLUDED.size_bytes,
+                        mime_type = EXCLUDED.mime_type,
+                        renew_license = EXCLUDED.renew_license,
+                        not_registered_nigeria = EXCLUDED.not_registered_nigeria,
+                        additional_files = EXCLUDED.additional_files,
+                        uploaded_at = NOW()
+                    RETURNING id
+                """, (
+                    st.session_state.user_id,
+                    license_number,
+                    license.path,
+                    license.name,
+                    license.sha256,
+                    license.size_bytes,
+                    license.mime_type,
+                    renew_license == "Yes",
+                    not_registered_ng == "Yes",
+                    extra_paths if extra_paths else None
+                ))
+                record_additional_files(cur, extras, user_document_id=cur.fetchone()[0])
 
-                else:
-                    # ===== ASSOCIATION INSERT =====
-                    cur.execute("""
-                        INSERT INTO association_documents (
-                            user_id,
-                            additional_files,
-                            temp_license,
-                            uploaded_at
-                        )
-                        VALUES (%s, %s, %s, NOW())
-                        ON CONFLICT (user_id) DO UPDATE
-                        SET additional_files = EXCLUDED.additional_files,
-                            temp_license = EXCLUDED.temp_license,
-                            uploaded_at = NOW()
-                    """, (
-                        st.session_state.user_id,
-                        extra_paths if extra_paths else None,
-                        True if temp_license == "Yes" else False
-                    ))
+            else:
+                # ===== ASSOCIATION INSERT =====
+                cur.execute("""
+                    INSERT INTO association_documents (
+                        user_id,
+                        additional_files,
+                        temp_license,
+                        uploaded_at
+                    )
+                    VALUES (%s, %s, %s, NOW())
+                    ON CONFLICT (user_id) DO UPDATE
+                    SET additional_files = EXCLUDED.additional_files,
+                        temp_license = EXCLUDED.temp_license,
+                        uploaded_at = NOW()
+                """, (
+                    st.session_state.user_id,
+                    extra_paths if extra_paths else None,
+                    True if temp_license == "Yes" else False
+                ))
+                record_additional_files(cur, extras, association_user_id=st.session_state.user_id)
 
-                conn.commit()
-                cur.close()
-                conn.close()
+            conn.commit()
+            cur.close()
+            conn.close()
 
-                st.success("Documents uploaded successfully ✅")
+            if license and license.deduplicated:
+                st.info("This licence file was already on record, so it wasn't stored again.")
+            if license and license.bytes_saved > 0:
+                st.info(f"Licence image optimised: {license.original_size_bytes / 1024:,.0f} KB → "
+                        f"{license.size_bytes / 1024:,.0f} KB")
+            extras_saved = sum(extra.bytes_saved for extra in extras)
+            if extras_saved > 0:
+                st.info(f"Qualification images optimised: {extras_saved / 1024:,.0f} KB saved")
+            st.success("Documents uploaded successfully ✅")
 
 
 
@@ -823,93 +817,165 @@ def user_dashboard():
 
     # ================= LOGOUT =================
     elif menu_choice == "Logout":
-        conn.close()
         st.session_state.clear()
         st.session_state.page = "login_user"
         st.rerun()
 
-    conn.close()
-
-# ---------------- Database Helpers / KPI Functions ----------------
-
-def get_facility_count():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT COUNT(*) 
-        FROM facility_accounts 
-        WHERE is_active = TRUE
-    """)
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
-
-# ---------------- New: Facilities with Needs ----------------
-def get_facilities_with_needs():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT f.facility_name, n.need, n.quantity, n.timestamp
-        FROM facility_accounts f
-        LEFT JOIN facility_needs n
-        ON f.id = n.facility_id
-        WHERE f.is_active = TRUE
-        ORDER BY f.facility_name, n.timestamp DESC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-
-# ------------------ CONFIG ------------------
-conn = get_connection()
-cur = conn.cursor()
-cur = conn.cursor()
-
-# Keywords to classify as training
-training_keywords = [
-    "training", "capacity building", "workshop", "mentorship",
-    "skills development", "clinical training", "orientation", "coaching"
-]
-
-# ------------------ FETCH NEEDS ------------------
-conn = get_connection()
-cur = conn.cursor()
-cur.execute("SELECT id, need FROM facility_needs")
-
-needs = cur.fetchall()
-
-updated_count = 0
-
-for need_id, need_text in needs:
-    if not need_text or need_text.strip() == "":
-        program_type = "Services"  # empty needs default to Services
-    else:
-        need_lower = need_text.lower()
-        if any(keyword in need_lower for keyword in training_keywords):
-            program_type = "Training"
-        else:
-            program_type = "Services"
+# -------------------------------------------------
+# ADMIN DASHBOARD
+# -------------------------------------------------
+def export_file(kind, payload, key, label):
+    """
+    Queue an export on the background workers when asked for and return
+    the finished file's path once its job is done, or None meanwhile. The
+    Streamlit rerun never builds the file itself.
+    """
+    jobs = st.session_state.setdefault("report_export_jobs", {})
+    if st.button(f"Prepare {label}", key=f"prepare_{key}"):
+        jobs[key] = enqueue(kind, payload, created_by=st.session_state.get("username"), priority=10)
+
+    job = get_job(jobs[key]) if key in jobs else None
+    if job is None:
+        return None
+    if job["status"] in ("queued", "running"):
+        col1, col2 = st.columns([4, 1])
+        col1.progress(job["progress"], text=job["progress_message"] or f"Export queued as job #{job['id']}")
+        col2.button("🔄 Check again", key=f"refresh_{key}")
+        return None
+    if job["status"] == "failed":
+        st.error(f"Export job #{job['id']} failed. See Background Jobs for details.")
+        return None
+
+    path = (job["result"] or {}).get("path")
+    if not path or not os.path.exists(path):
+        st.info("This export has expired. Prepare it again.")
+        return None
+    return path
+
+
+def csv_download(report, label="Download CSV"):
+    """
+    Export a report on the job queue and offer it for download. The CSV is
+    streamed from the database into a file, never built up in memory.
+    """
+    path = export_file("export_report_csv", {"report": report}, f"csv_{report}", label)
+    if path:
+        with open(path, "rb") as f:
+            st.download_button(
+                label=label,
+                data=f,
+                file_name=report_filename(report, "csv"),
+                mime="text/csv",
+                key=f"download_csv_{report}"
+            )
 
-    cur.execute("""
-        UPDATE facility_needs
-        SET program_type = %s
-        WHERE id = %s
-    """, (program_type, need_id))
-    updated_count += 1
 
-# Commit changes
-conn.commit()
-print(f"✅ Program types updated for {updated_count} needs.")
+def excel_download(reports, file_name, label="Download Excel"):
+    """
+    Offer an xlsx of one or more reports, built on the job queue and
+    reused until the underlying tables change.
+    """
+    key = "_".join(reports)
+    path = export_file("export_workbook", {"reports": list(reports)}, f"xlsx_{key}", label)
+    if path:
+        with open(path, "rb") as f:
+            st.download_button(
+                label=label,
+                data=f,
+                file_name=file_name,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"download_excel_{key}"
+            )
 
-# Close connection
-cur.close()
-conn.close()
+
+def select_rows(rows, columns, key):
+    """
+    Show rows with a tick box each and return the first column's values
+    for the ticked rows.
+    """
+    select_all = st.checkbox("Select all on this page", key=f"{key}_all")
+    df = pd.DataFrame(rows, columns=columns)
+    df.insert(0, "Select", select_all)
+    edited = st.data_editor(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        disabled=columns,
+        key=f"{key}_editor_{select_all}"
+    )
+    return edited.loc[edited["Select"], columns[0]].tolist()
+
+
+@st.fragment
+def approvals_section():
+    """
+    Pending interests and system matches. Filtering, paging and approving
+    rerun only this fragment, not the whole admin page.
+    """
+    with timed_run("fragment: approvals"):
+        # Set just before the fragment reruns after a decision
+        notice = st.session_state.pop("approvals_notice", None)
+        if notice:
+            st.success(notice)
+        try:
+            page_size = config.GRID_PAGE_SIZE
+            f1, f2, f3 = st.columns([3, 2, 2])
+            facility_filter = f1.text_input("Facility contains", key="approvals_facility").strip()
+            state_filter = f2.selectbox("State", ["All states"] + facility_states(), key="approvals_state")
+            min_score = f3.number_input("Minimum match score", min_value=0, value=0, step=1,
+                                        key="approvals_min_score")
+            state_value = None if state_filter == "All states" else state_filter
+
+            # --------------------- Section 1: User-selected Interests ---------------------
+            st.markdown("## Pending Diaspora Interests")
+            cursor = page_cursor("approvals_interests", (facility_filter, state_value))
+            rows, next_cursor = pending_interests(facility_filter, state_value, cursor, page_size)
+
+            if not rows:
+                st.info("No pending user interests.")
+            else:
+                selected = select_rows(
+                    rows, ["ID", "User", "Facility", "State", "Need", "Submitted"], f"approvals_interests_{cursor}"
+                )
+                col1, col2, _ = st.columns([2, 2, 4])
+                for col, status, label in ((col1, "Approved", "✅ Approve"), (col2, "Rejected", "❌ Reject")):
+                    if col.button(f"{label} selected ({len(selected)})", key=f"interests_{status}",
+                                  disabled=not selected):
+                        changed, users = decide_interests(selected, status)
+                        invalidate_user_overview(*users)
+                        st.session_state.approvals_notice = f"{changed} interest(s) {status.lower()}."
+                        st.rerun(scope="fragment")
+            page_controls("approvals_interests", next_cursor, page_size, scope="fragment")
+
+            st.markdown("---")
+
+            # --------------------- Section 2: Auto-Matched Users ---------------------
+            st.markdown("## Pending System Matches")
+            cursor = page_cursor("approvals_matches", (facility_filter, state_value, min_score))
+            rows, next_cursor = pending_matches(facility_filter, state_value, min_score, cursor, page_size)
+
+            if not rows:
+                st.info("No pending system matches.")
+            else:
+                selected = select_rows(
+                    rows, ["User ID", "User", "Facility", "State", "Need", "Score", "Proposed"],
+                    f"approvals_matches_{cursor}"
+                )
+                col1, col2, _ = st.columns([2, 2, 4])
+                for col, status, label in ((col1, "Approved", "✅ Approve"), (col2, "Rejected", "❌ Reject")):
+                    if col.button(f"{label} selected ({len(selected)})", key=f"matches_{status}",
+                                  disabled=not selected):
+                        changed, users = decide_matches(selected, status)
+                        invalidate_user_overview(*users)
+                        st.session_state.approvals_notice = f"{changed} match(es) {status.lower()}."
+                        st.rerun(scope="fragment")
+            page_controls("approvals_matches", next_cursor, page_size, scope="fragment")
+
+        except Exception as e:
+            st.error("Could not load approvals.")
+            st.exception(e)
 
 
-# -------------------------------------------------
-# ADMIN DASHBOARD
-# -------------------------------------------------
 def admin_dashboard():
     st.set_page_config(layout="wide")
 
@@ -925,6 +991,7 @@ def admin_dashboard():
             "Documents",
             "Reports",
             "Approvals",
+            "Background Jobs",
             "Logout"
         ]
     )
@@ -943,101 +1010,135 @@ def admin_dashboard():
     # ---------------- OVERVIEW ----------------
     if menu == "Overview":
         st.subheader("System Overview")
-    
+
+        approximate = st.toggle(
+            "Approximate counts",
+            value=config.KPI_APPROXIMATE_COUNTS,
+            help="Use table statistics instead of exact counts; much faster on very large tables."
+        )
+        kpis = get_kpis(approximate)
+        outcomes = get_outcomes()
+
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Facilities Registered", get_facility_count())
+            st.metric("Facilities Registered", kpis["facilities"])
         with col2:
-            st.metric("Needs Submitted", get_needs_count())
+            st.metric("Needs Submitted", f"~{kpis['needs']:,}" if approximate else kpis["needs"])
         with col3:
-            st.metric("Diaspora Professionals Placed", 45)  # dummy for now
+            st.metric("Diaspora Professionals Placed", outcomes["placed"])
 
         col4, col5, col6 = st.columns(3)
         with col4:
-            st.metric("Local Health Workers Trained", 120)  # dummy
+            st.metric("Local Health Workers Trained", outcomes["trained"])
         with col5:
-            st.metric("New Clinical Services Introduced", 8)  # dummy
+            st.metric("New Clinical Services Introduced", outcomes["new_services"])
         with col6:
-            st.metric("Programs Active", get_program_count())
+            st.metric("Programs Active", kpis["programs"])
 
         st.markdown("---")
 
-        # --- Dummy Data for Charts ---
-        kpi_data = pd.DataFrame({
-            "Facility": ["NHA", "LUTH", "ABUTH", "JUTH", "FMC Ebute-Metta"],
-            "Diaspora_Professionals_Placed": [5, 3, 4, 2, 6],
-            "Local_Health_Workers_Trained": [20, 15, 10, 12, 18],
-            "New_Clinical_Services": [2, 1, 3, 0, 2],
-            "Patient_Feedback_Score": [4.5, 4.2, 4.8, 4.1, 4.6],
-            "State": ["FCT","Lagos","Zaria","Jos","Lagos"]
-        })
-
-        # --- 1. Diaspora Professionals Placed ---
-        fig1 = px.bar(kpi_data, x="Facility", y="Diaspora_Professionals_Placed",
-                      title="Diaspora Professionals Placed", color="Diaspora_Professionals_Placed")
-
-        # --- 2. Local Health Workers Trained ---
-        fig2 = px.bar(kpi_data, x="Facility", y="Local_Health_Workers_Trained",
-                      title="Local Health Workers Trained", color="Local_Health_Workers_Trained")
-
-        # --- 3. New Clinical Services Introduced ---
-        fig3 = px.bar(kpi_data, x="Facility", y="New_Clinical_Services",
-                      title="New Clinical Services Introduced", color="New_Clinical_Services")
+        if outcomes["facilities"]:
+            kpi_data = pd.DataFrame(outcomes["facilities"], columns=[
+                "Facility", "State", "Diaspora_Professionals_Placed",
+                "Local_Health_Workers_Trained", "New_Clinical_Services"
+            ])
+
+            # --- 1. Diaspora Professionals Placed ---
+            fig1 = px.bar(kpi_data, x="Facility", y="Diaspora_Professionals_Placed",
+                          title="Diaspora Professionals Placed", color="Diaspora_Professionals_Placed")
+
+            # --- 2. Local Health Workers Trained ---
+            fig2 = px.bar(kpi_data, x="Facility", y="Local_Health_Workers_Trained",
+                          title="Local Health Workers Trained", color="Local_Health_Workers_Trained")
+
+            # --- 3. New Clinical Services Introduced ---
+            fig3 = px.bar(kpi_data, x="Facility", y="New_Clinical_Services",
+                          title="New Clinical Services Introduced", color="New_Clinical_Services")
+
+            # --- 4. By State ---
+            state_data = pd.DataFrame(outcomes["states"], columns=[
+                "State", "Facilities", "Diaspora_Professionals_Placed",
+                "Local_Health_Workers_Trained", "New_Clinical_Services"
+            ])
+            fig4 = px.bar(state_data, x="State",
+                          y=["Diaspora_Professionals_Placed", "Local_Health_Workers_Trained", "New_Clinical_Services"],
+                          title="Outcomes by State", barmode="group")
+
+            # --- Display in 2x2 Grid ---
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig1, use_container_width=True)
+                st.plotly_chart(fig2, use_container_width=True)
 
+            with col2:
+                st.plotly_chart(fig3, use_container_width=True)
+                st.plotly_chart(fig4, use_container_width=True)
+        else:
+            st.info("No placements, trainings or new services recorded yet.")
 
-        # --- Display in 2x2 Grid ---
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(fig1, use_container_width=True)
-            st.plotly_chart(fig2, use_container_width=True)
+        with st.expander("Cache & connection pool statistics"):
+            st.dataframe(pd.DataFrame(cache_stats()), use_container_width=True)
+            st.json(pool_stats())
 
-        with col2:
-            st.plotly_chart(fig3, use_container_width=True)
+        with st.expander("Rerun timings"):
+            st.caption("Full page runs versus fragment-only reruns, in this server process.")
+            timings = rerun_stats()
+            if timings:
+                st.dataframe(pd.DataFrame(timings), use_container_width=True, hide_index=True)
+            else:
+                st.info("No runs timed yet.")
 
         # ------ Feedback Analytics ---
         st.markdown("---")
         st.subheader("Programme Feedback Analytics")
 
         try:
-            conn = get_connection()
-            cur = conn.cursor()
-
-            cur.execute("""
-                SELECT 
-                    AVG(content_quality),
-                    AVG(trainer_effectiveness),
-                    AVG(relevance_to_practice),
-                    AVG(organisation_logistics),
-                    AVG(overall_satisfaction)
-                FROM program_feedback
-            """)
-
-            result = cur.fetchone()
-            conn.close()
-
-            if result and any(result):
-                content_avg, trainer_avg, relevance_avg, org_avg, overall_avg = result
+            feedback = get_feedback_summary()
+
+            if feedback["responses"]:
+                overall = feedback["overall"]
+                labels = {
+                    "content_quality": "Content Quality",
+                    "trainer_effectiveness": "Trainer Effectiveness",
+                    "relevance_to_practice": "Relevance to Practice",
+                    "organisation_logistics": "Organisation & Logistics",
+                    "overall_satisfaction": "Overall Satisfaction",
+                }
 
                 col1, col2, col3 = st.columns(3)
                 col4, col5 = st.columns(2)
-
-                col1.metric("Content Quality", f"{round(content_avg,2)}/5")
-                col2.metric("Trainer Effectiveness", f"{round(trainer_avg,2)}/5")
-                col3.metric("Relevance to Practice", f"{round(relevance_avg,2)}/5")
-                col4.metric("Organisation & Logistics", f"{round(org_avg,2)}/5")
-                col5.metric("Overall Satisfaction", f"{round(overall_avg,2)}/5")
+                for col, (dimension, label) in zip((col1, col2, col3, col4, col5), labels.items()):
+                    value = overall[dimension]
+                    col.metric(label, f"{round(value, 2)}/5" if value is not None else "—")
 
                 # ---- Calculate Automated Overall Programme Score ----
-                overall_program_score = (
-                    content_avg +
-                    trainer_avg +
-                    relevance_avg +
-                    org_avg +
-                    overall_avg
-                ) / 5
+                rated = [v for v in overall.values() if v is not None]
+                if rated:
+                    overall_program_score = sum(rated) / len(rated)
 
-                st.markdown("### 🏆 Overall Programme Performance Score")
-                st.success(f"{round(overall_program_score,2)} / 5")
+                    st.markdown("### 🏆 Overall Programme Performance Score")
+                    st.success(f"{round(overall_program_score,2)} / 5")
+
+                st.markdown("#### By Programme")
+                program_df = pd.DataFrame(feedback["programs"]).rename(columns={
+                    "program": "Programme", "responses": "Responses", **labels
+                })
+                st.dataframe(program_df.round(2), use_container_width=True)
+
+                st.markdown("#### By Month")
+                period_df = pd.DataFrame(feedback["periods"])
+                programme = st.selectbox(
+                    "Programme",
+                    ["All programmes"] + program_df["Programme"].tolist(),
+                    key="feedback_programme"
+                )
+                if programme != "All programmes":
+                    period_df = period_df[period_df["program"] == programme]
+                fig = px.line(
+                    period_df, x="period", y="overall_satisfaction", color="program", markers=True,
+                    labels={"period": "Month", "overall_satisfaction": "Overall Satisfaction", "program": "Programme"}
+                )
+                st.plotly_chart(fig, use_container_width=True)
 
             else:
                 st.info("No feedback submitted yet.")
@@ -1052,44 +1153,50 @@ def admin_dashboard():
     if menu == "Users":
         st.subheader("Registered Users")
 
-        try:
-            conn = get_connection()
-            cur = conn.cursor()
+        search = st.text_input(
+            "🔍 Search users and facilities",
+            placeholder="Name, username, email, country, facility code or state",
+            key="users_search"
+        ).strip()
 
-            # ---------------- Facilities ----------------
-            cur.execute("""
-                SELECT facility_code, facility_name, state
-                FROM facilities
-                ORDER BY facility_name
-            """)
-            facilities = cur.fetchall()
-
-            if facilities:
-                st.markdown("### Facilities")
-                df_facilities = pd.DataFrame(facilities, columns=["Username", "Facility Name", "State"])
-                st.dataframe(df_facilities, use_container_width=True)
-            else:
-                st.info("No registered facilities yet.")
+        if search:
+            try:
+                if len(search) < MIN_QUERY_LENGTH:
+                    st.info(f"Type at least {MIN_QUERY_LENGTH} characters to search.")
+                else:
+                    facility_hits = search_facilities(search)
+                    user_hits = search_users(search)
+
+                    st.markdown("### Matching Facilities")
+                    if facility_hits:
+                        st.dataframe(pd.DataFrame(
+                            [row[1:] for row in facility_hits], columns=["Facility Code", "Facility Name", "State"]
+                        ), use_container_width=True, hide_index=True)
+                    else:
+                        st.info("No matching facilities.")
 
-            st.markdown("---")  # separator
+                    st.markdown("### Matching Users")
+                    if user_hits:
+                        st.dataframe(pd.DataFrame(
+                            [row[1:] for row in user_hits], columns=["Username", "Full Name", "Role", "Email", "Country"]
+                        ), use_container_width=True, hide_index=True)
+                    else:
+                        st.info("No matching users.")
 
-            # ---------------- Individuals / Associations ----------------
-            cur.execute("""
-                SELECT username, full_name, role, country
-                FROM users
-                WHERE role IN ('individual','association')
-                ORDER BY role, username
-            """)
-            users = cur.fetchall()
-
-            if users:
-                st.markdown("### Individuals / Associations")
-                df_users = pd.DataFrame(users, columns=["Username", "Full Name", "Role", "Country"])
-                st.dataframe(df_users, use_container_width=True)
-            else:
-                st.info("No registered individual or association users yet.")
+            except Exception as e:
+                st.error("Search failed.")
+                st.exception(e)
 
-            conn.close()
+            st.markdown("---")
+
+        try:
+            st.markdown("### Facilities")
+            render_grid(FACILITIES_GRID, "users_facilities")
+
+            st.markdown("---")  # separator
+
+            st.markdown("### Individuals / Associations")
+            render_grid(USERS_GRID, "users_individuals")
 
         except Exception as e:
             st.error("Could not load users.")
@@ -1105,65 +1212,106 @@ def admin_dashboard():
         not_registered_nigeria = st.checkbox("Not Registered in Nigeria?")
         additional_files = st.text_input("Additional Files (comma-separated)")
 
-        if uploaded_file:
-            file_path = f"uploads/{uploaded_file.name}"  # ensure 'uploads' folder exists
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
+        # The uploader keeps its file across reruns; store each upload once
+        upload_id = getattr(uploaded_file, "file_id", None) if uploaded_file else None
+        if uploaded_file and st.session_state.get("admin_document_upload") != upload_id:
             try:
+                stored = store_upload(uploaded_file, uploaded_file.name, uploaded_file.type)
+
                 conn = get_connection()
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO user_documents (
                         user_id, document_type, document_name, document_path,
+                        content_sha256, size_bytes, mime_type,
                         renew_license, not_registered_nigeria, additional_files, uploaded_at
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
                 """, (
                     st.session_state.user_id,
                     doc_type,
-                    uploaded_file.name,
-                    file_path,
+                    stored.name,
+                    stored.path,
+                    stored.sha256,
+                    stored.size_bytes,
+                    stored.mime_type,
                     renew_license,
                     not_registered_nigeria,
-                    additional_files
+                    [name.strip() for name in additional_files.split(",") if name.strip()] or None
                 ))
                 conn.commit()
                 conn.close()
-                st.success(f"Document '{uploaded_file.name}' uploaded successfully!")
+                st.session_state.admin_document_upload = upload_id
+                st.success(f"Document '{stored.name}' uploaded successfully!"
+                           + (" Identical content was already stored." if stored.deduplicated else "")
+                           + (f" Image optimised, {stored.bytes_saved / 1024:,.0f} KB saved."
+                              if stored.bytes_saved > 0 else ""))
             except Exception as e:
                 st.error("Failed to upload document.")
                 st.exception(e)
 
+        stats = storage_stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Files Stored", f"{stats['blobs']:,}", help=f"{stats['uploads']:,} uploads in total")
+        col2.metric("Storage Used", f"{stats['stored_bytes'] / 2**20:,.1f} MB")
+        col3.metric("Saved by Deduplication", f"{stats['saved_bytes'] / 2**20:,.1f} MB")
+        col4.metric("Saved by Image Optimisation", f"{stats['normalization_saved_bytes'] / 2**20:,.1f} MB")
+
         # ---------------- Display uploaded documents ----------------
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT u.full_name, d.document_type, d.document_name, d.document_path,
-                       d.renew_license, d.not_registered_nigeria, d.additional_files, d.uploaded_at
-                FROM user_documents d
-                JOIN users u ON d.user_id = u.id
-                ORDER BY d.uploaded_at DESC
-            """)
-            rows = cursor.fetchall()
-            conn.close()
-  
-            if rows:
-                for full_name, doc_type, doc_name, doc_path, renew, not_registered, additional, uploaded_at in rows:
-                    st.markdown(f"**{full_name}** - {doc_type} ({uploaded_at.strftime('%Y-%m-%d %H:%M')})")
-                    st.write("Renew License:", renew)
-                    st.write("Not Registered in Nigeria:", not_registered)
-                    st.write("Additional Files:", additional)
-
-                    if doc_path and os.path.exists(doc_path):
-                        with open(doc_path, "rb") as f:
-                            st.download_button(f"Download {doc_name}", f.read(), file_name=doc_name)
+            page = render_grid(DOCUMENTS_GRID, "documents")
+
+            if page:
+                # Only metadata is listed; a file is read from disk when an
+                # admin asks for that one document
+                options = {row[0]: f"{row[3]} — {row[1]} ({row[2]}, {row[4] or 'size unknown'})" for row in page}
+                col1, col2 = st.columns([3, 1])
+                document_id = col1.selectbox(
+                    "Document on this page", list(options), format_func=options.get, key="documents_pick"
+                )
+                if col2.button("Prepare download", key="documents_prepare"):
+                    st.session_state.document_download = document_id
+
+                # Previews come from the thumbnail cache, never the original files
+                thumbnails = get_thumbnails(list(options))
+                if document_id in thumbnails and os.path.exists(thumbnails[document_id]):
+                    st.image(thumbnails[document_id], caption=options[document_id])
+                else:
+                    st.caption("No preview for this document (PDF, or still being generated).")
+
+                with st.expander(f"Previews on this page ({len(thumbnails)})"):
+                    cols = st.columns(5)
+                    for i, (doc_id, thumb) in enumerate(thumbnails.items()):
+                        if os.path.exists(thumb):
+                            cols[i % 5].image(thumb, caption=options[doc_id], use_container_width=True)
+
+                if st.session_state.get("document_download") == document_id:
+                    document = get_document(document_id)
+                    if document and document["path"] and os.path.exists(document["path"]):
+                        with open(document["path"], "rb") as f:
+                            st.download_button(
+                                f"Download {document['name']}",
+                                f,
+                                file_name=document["name"],
+                                mime=document["mime_type"] or "application/octet-stream",
+                                key="documents_download",
+                                on_click=lambda: st.session_state.pop("document_download", None)
+                            )
                     else:
-                        st.warning(f"File not found: {doc_name}")
-                    st.markdown("---")
-            else:
-                st.info("No documents uploaded yet.")
+                        st.warning(f"File not found: {document['name'] if document else document_id}")
+
+                    for i, extra in enumerate(get_additional_files(document_id)):
+                        if extra["path"] and os.path.exists(extra["path"]):
+                            with open(extra["path"], "rb") as f:
+                                st.download_button(
+                                    f"Download {extra['name']} ({(extra['size_bytes'] or 0) / 1024:,.0f} KB)",
+                                    f,
+                                    file_name=extra["name"],
+                                    mime=extra["mime_type"] or "application/octet-stream",
+                                    key=f"documents_download_extra_{i}"
+                                )
+                        else:
+                            st.warning(f"File not found: {extra['name']}")
 
         except Exception as e:
             st.error("Failed to fetch documents.")
@@ -1180,173 +1328,40 @@ def admin_dashboard():
 
         report_type = st.selectbox(
             "Select Report to View/Download",
-            [
-                "Facility Needs",
-                "User Registrations",
-                "Matched Users",
-                "Uploaded Documents",
-                "Program Activities"
-            ]
+            [report for report in REPORTS if report != "Program Feedback"]
         )
 
-        conn = get_connection()
-        cur = conn.cursor()
-
         try:
-            if report_type == "Facility Needs":
-                cur.execute("""
-                    SELECT f.facility_name, f.state, n.need, n.quantity, n.timestamp
-                    FROM facility_needs n
-                    JOIN facilities f ON n.facility_id = f.id
-                    ORDER BY f.facility_name, n.timestamp
-                """)
-                rows = cur.fetchall()
-                columns = ["Facility", "State", "Need", "Quantity", "Submitted At"]
-
-            elif report_type == "User Registrations":
-                cur.execute("""
-                    SELECT username, full_name, role, email, country, created_at
-                    FROM users
-                    ORDER BY role, username
-                """)
-                rows = cur.fetchall()
-                columns = ["Username", "Full Name", "Role", "Email", "Country", "Registered At"]
-
-            elif report_type == "Matched Users":
-                cur.execute("""
-                    SELECT m.user_id, u.full_name, m.facility_id, f.facility_name, m.matched_at
-                    FROM user_facility_matches m
-                    JOIN users u ON m.user_id = u.id
-                    JOIN facilities f ON m.facility_id = f.id
-                    ORDER BY m.matched_at DESC
-                """)
-                rows = cur.fetchall()
-                columns = ["User ID", "User Name", "Facility ID", "Facility Name", "Matched At"]
-
-            elif report_type == "Uploaded Documents":
-                cur.execute("""
-                    SELECT u.full_name, d.document_type, d.document_name, d.renew_license,
-                           d.not_registered_nigeria, d.additional_files, d.uploaded_at
-                    FROM user_documents d
-                    JOIN users u ON d.user_id = u.id
-                    ORDER BY d.uploaded_at DESC
-                """)
-                rows = cur.fetchall()
-                columns = ["Full Name", "Document Type", "Document Name", "Renew License",
-                           "Not Registered in Nigeria", "Additional Files", "Uploaded At"]
-
-            elif report_type == "Program Activities":
-                cur.execute("""
-                    SELECT program_name, start_date, end_date, participants, status
-                    FROM programs
-                    ORDER BY start_date DESC
-                """)
-                rows = cur.fetchall()
-                columns = ["Program Name", "Start Date", "End Date", "Participants", "Status"]
+            render_grid(REPORTS[report_type], f"report_{report_type}")
 
-                conn.close()
+            # CSV download
+            csv_download(report_type)
 
-            if rows:
-                df_report = pd.DataFrame(rows, columns=columns)
-                st.dataframe(df_report, use_container_width=True)
-
-                # CSV download
-                csv = df_report.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"{report_type.replace(' ','_').lower()}.csv",
-                    mime="text/csv"
-                )
-
-                # Excel download
-                from io import BytesIO
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df_report.to_excel(writer, index=False, sheet_name=report_type[:31])
-                excel_data = output.getvalue()
-                st.download_button(
-                    label="Download Excel",
-                    data=excel_data,
-                    file_name=f"{report_type.replace(' ','_').lower()}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            else:
-                st.info("No data available for this report.")
+            # Excel download
+            excel_download([report_type], report_filename(report_type, "xlsx"))
 
         except Exception as e:
             st.error("Could not generate report.")
             st.exception(e)
 
+        st.markdown("#### All Reports")
+        st.caption("One workbook with every report on its own sheet.")
+        try:
+            excel_download(list(REPORTS), "nidah_reports.xlsx", "Download Workbook")
+        except Exception as e:
+            st.error("Could not generate workbook.")
+            st.exception(e)
+
 
 
         st.markdown("---")
         st.subheader("Download Feedback Report")
 
         try:
-            conn = get_connection()
-            cur = conn.cursor()
-
-            cur.execute("""
-                SELECT 
-                    p.name AS program_name,
-                    u.full_name,
-                    f.content_quality,
-                    f.trainer_effectiveness,
-                    f.relevance_to_practice,
-                    f.organisation_logistics,
-                    f.overall_satisfaction,
-                    f.comments,
-                    f.submitted_at
-                FROM program_feedback f
-                JOIN programs p ON f.program_id = p.id
-                JOIN users u ON f.user_id = u.id
-                ORDER BY f.submitted_at DESC
-            """)
-
-            rows = cur.fetchall()
-            conn.close()
-
-            if rows:
-                df_feedback = pd.DataFrame(rows, columns=[
-                    "Program",
-                    "Participant",
-                    "Content Quality",
-                    "Trainer Effectiveness",
-                    "Relevance",
-                    "Organisation",
-                    "Overall Satisfaction",
-                    "Comments",
-                    "Submitted At"
-                ])
-
-                st.dataframe(df_feedback, use_container_width=True)
-
-                # CSV download
-                csv = df_feedback.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    "Download Feedback (CSV)",
-                    data=csv,
-                    file_name="program_feedback.csv",
-                    mime="text/csv"
-                )
+            render_grid(REPORTS["Program Feedback"], "report_feedback")
 
-                # Excel download
-                from io import BytesIO
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df_feedback.to_excel(writer, index=False)
-                excel_data = output.getvalue()
-
-                st.download_button(
-                    "Download Feedback (Excel)",
-                    data=excel_data,
-                    file_name="program_feedback.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-
-            else:
-                st.info("No feedback records found.")
+            csv_download("Program Feedback", "Download Feedback (CSV)")
+            excel_download(["Program Feedback"], "program_feedback.xlsx", "Download Feedback (Excel)")
 
         except Exception as e:
             st.error("Could not generate feedback report.")
@@ -1358,133 +1373,80 @@ def admin_dashboard():
     if menu == "Approvals":
         st.subheader("Approvals Dashboard")
 
-        try:
-            conn = get_connection()
-            cur = conn.cursor()
-
-            # --------------------- Section 1: User-selected Interests ---------------------
-            st.markdown("## Pending Diaspora Interests")
-            cur.execute("""
-                SELECT ui.id, u.full_name, f.facility_name
-                FROM user_interests ui
-                JOIN users u ON ui.user_id = u.id
-                JOIN facility_needs n ON ui.need_id = n.id
-                JOIN facilities f ON n.facility_id = f.id
-                WHERE ui.status = 'Pending'
-                ORDER BY u.full_name, f.facility_name
-            """)
-            pending_interests = cur.fetchall()
-
-            if not pending_interests:
-                st.info("No pending user interests.")
-            else:
-                for ui_id, user_name, facility_name in pending_interests:
-                    col1, col2, col3 = st.columns([3, 4, 2])
-                    with col1:
-                        st.write(user_name)
-                    with col2:
-                        st.write(facility_name)
-                    with col3:
-                        if st.button(f"Approve Interest {ui_id}", key=f"approve_interest_{ui_id}"):
-                            cur.execute("""
-                                UPDATE user_interests
-                                SET status = 'Approved'
-                                WHERE id = %s
-                            """, (ui_id,))
-                            conn.commit()
-                            st.success(f"User interest for {user_name} → {facility_name} approved!")
-                            st.experimental_rerun()
-
-            st.markdown("---")
-
-            # --------------------- Section 2: Auto-Matched Users ---------------------
-            st.markdown("## Pending System Matches")
-            cur.execute("""
-                SELECT ua.user_id, u.full_name, ua.facility_id, f.facility_name, ua.score, ua.assigned_at
-                FROM user_assignments ua
-                JOIN users u ON ua.user_id = u.id
-                JOIN facilities f ON ua.facility_id = f.id
-                WHERE ua.status = 'Pending'
-                ORDER BY ua.assigned_at DESC
-            """)
-            pending_matches = cur.fetchall()
-
-            if not pending_matches:
-                st.info("No pending system matches.")
-            else:
-                for user_id, user_name, facility_id, facility_name, score, assigned_at in pending_matches:
-                    col1, col2 = st.columns([5, 1])
-                    with col1:
-                        st.markdown(f"**{user_name}** → **{facility_name}** | Score: {score} | Proposed: {assigned_at.strftime('%Y-%m-%d %H:%M')}")
-                    with col2:
-                        if st.button(f"Approve Match {user_id}", key=f"approve_match_{user_id}"):
-                            cur.execute("""
-                                UPDATE user_assignments
-                                SET status = 'Approved'
-                                WHERE user_id = %s
-                            """, (user_id,))
-                            conn.commit()
-                            st.success(f"System match for {user_name} → {facility_name} approved!")
-                            st.experimental_rerun()
-
-            cur.close()
-            conn.close()
-
-        except Exception as e:
-            st.error("Could not load approvals.")
-            st.exception(e)
+        approvals_section()
 
 
         # ---------------- MATCH USERS TO FACILITIES ----------------
         st.markdown("---")
         st.subheader("Assignments")
 
-        if st.button("Match Users to Facilities"):
-            result = match_users_to_facilities()
-            st.success(result)
-
-
-
+        match_mode = st.radio(
+            "Matching mode",
+            ["Changes since last run", "Full re-match", "Optimal (respects need capacity)"],
+            horizontal=True,
+            help="Optimal mode fills each need up to its Number, counting Approved "
+                 "assignments, and maximizes the total match score."
+        )
 
-def get_facility_count():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT COUNT(*) 
-        FROM facilities
-        WHERE is_active = TRUE
-    """)
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+        if st.button("Match Users to Facilities"):
+            mode = {
+                "Changes since last run": "incremental",
+                "Full re-match": "full",
+            }.get(match_mode, "optimal")
+            try:
+                job_id = enqueue("match_users", {"mode": mode}, created_by=st.session_state.get("username"))
+                st.success(f"Matching queued as job #{job_id}. Follow it under Background Jobs.")
+            except Exception as e:
+                st.error("❌ Could not queue matching.")
+                st.exception(e)
 
+    # ---------------- BACKGROUND JOBS ----------------
+    if menu == "Background Jobs":
+        st.subheader("Background Jobs")
+        st.caption("Long-running work is executed by `python -m jobs.worker`, not in your browser session.")
 
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            new_kind = st.selectbox("Queue a job", sorted(HANDLERS))
+            new_payload = None
+            if new_kind == "export_report_csv":
+                new_payload = {"report": st.selectbox("Report", list(REPORTS), key="queue_job_report")}
+        with col2:
+            st.write("")
+            if st.button("Queue", key="queue_job_btn"):
+                job_id = enqueue(new_kind, new_payload, created_by=st.session_state.get("username"))
+                st.success(f"Queued job #{job_id}")
 
-def get_needs_count():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM facility_needs")
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+        if st.button("🔄 Refresh", key="refresh_jobs_btn"):
+            st.rerun()
 
+        try:
+            jobs = recent_jobs()
+            if not jobs:
+                st.info("No jobs yet.")
+            else:
+                df_jobs = pd.DataFrame(jobs)
+                df_jobs["progress"] = (df_jobs["progress"] * 100).round().astype(int).astype(str) + "%"
+                st.dataframe(
+                    df_jobs[["id", "kind", "status", "progress", "progress_message", "attempts",
+                             "created_by", "created_at", "finished_at", "result"]],
+                    use_container_width=True
+                )
 
-def get_user_count():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM users")
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+                for job in jobs:
+                    if job["status"] == "failed":
+                        with st.expander(f"Job #{job['id']} ({job['kind']}) failed"):
+                            st.code(job["last_error"] or "")
+                            if st.button("Retry", key=f"retry_job_{job['id']}"):
+                                retry(job["id"])
+                                st.rerun()
 
-def get_program_count():
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM programs WHERE is_active = TRUE")  # <- fix here
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+            st.markdown("### Schedules")
+            st.dataframe(pd.DataFrame(list_schedules()), use_container_width=True)
 
+        except Exception as e:
+            st.error("Could not load jobs.")
+            st.exception(e)
 
 
 
@@ -1740,6 +1702,89 @@ def register_page():
 #---------------------------------------------------
 # FACILITY DASHBOARD
 #---------------------------------------------------
+@st.fragment
+def manage_submitted_needs():
+    """
+    Edit and delete for the facility's needs while they are still editable.
+    Each click reruns only this fragment, not the whole dashboard.
+    """
+    with timed_run("fragment: manage_needs"):
+        facility_id = st.session_state.user_id
+        needs = get_facility_needs(facility_id)
+
+        if not needs:
+            st.info("No needs submitted yet.")
+            return
+
+        for need_id, need_text, number, _, created_at, editable in needs:
+            st.divider()
+            col1, col2, col3 = st.columns([5, 2, 3])
+
+            # ================= DISPLAY =================
+            with col1:
+                st.write(f"**{need_text}** (x{number})")
+                st.caption(f"Submitted: {created_at.strftime('%Y-%m-%d %H:%M')}")
+
+            with col2:
+                if editable:
+                    st.success("Editable")
+                else:
+                    st.error("Locked")
+
+            # ================= ACTIONS =================
+            with col3:
+                if editable:
+                    edit_key = f"edit_{need_id}"
+                    delete_key = f"delete_{need_id}"
+
+                    if st.button("✏️ Edit", key=edit_key):
+                        st.session_state.editing_need_id = need_id
+                        st.session_state.edit_need_text = need_text
+                        st.session_state.edit_number = number
+
+                    if st.button("🗑️ Delete", key=delete_key):
+                        if delete_need(facility_id, need_id):
+                            st.success("Need deleted successfully.")
+                        else:
+                            st.error("This need can no longer be deleted.")
+                        st.rerun(scope="fragment")
+                else:
+                    st.write("—")
+
+            # ================= EDIT FORM =================
+            if st.session_state.get("editing_need_id") == need_id:
+                st.markdown("#### ✏️ Edit Need")
+
+                new_need = st.text_input(
+                    "Need Description",
+                    st.session_state.edit_need_text,
+                    key=f"need_input_{need_id}"
+                )
+
+                new_number = st.number_input(
+                    "Number",
+                    min_value=1,
+                    value=st.session_state.edit_number,
+                    key=f"number_input_{need_id}"
+                )
+
+                save_col, cancel_col = st.columns(2)
+
+                with save_col:
+                    if st.button("💾 Save", key=f"save_{need_id}"):
+                        if update_need(facility_id, need_id, new_need.strip(), new_number):
+                            st.success("Need updated successfully.")
+                        else:
+                            st.error("This need can no longer be edited.")
+                        st.session_state.editing_need_id = None
+                        st.rerun(scope="fragment")
+
+                with cancel_col:
+                    if st.button("❌ Cancel", key=f"cancel_{need_id}"):
+                        st.session_state.editing_need_id = None
+                        st.rerun(scope="fragment")
+
+
 def facility_dashboard_page():
 
     # --- Session check ---
@@ -1757,7 +1802,7 @@ def facility_dashboard_page():
     st.sidebar.title("Facility Menu")
     menu_choice = st.sidebar.radio(
         "Navigate",
-        ["Register Need", "View Submitted Needs", "Logout"]
+        ["Register Need", "Import Needs (CSV)", "View Submitted Needs", "Manage Submitted Needs", "Logout"]
     )
 
     # --- Logout ---
@@ -1779,22 +1824,45 @@ def facility_dashboard_page():
                 st.error("Please enter a valid need.")
             else:
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO facility_needs (facility_id, need, number)
-                        VALUES (%s, %s, %s)
-                    """, (st.session_state.user_id, need.strip(), number))
-                    conn.commit()
+                    add_need(st.session_state.user_id, need.strip(), number)
                     st.success("Need submitted successfully!")
                 except Exception as e:
                     st.error("Failed to submit need.")
                     st.exception(e)
-                finally:
-                    if 'cursor' in locals():
-                        cursor.close()
-                    if 'conn' in locals():
-                        conn.close()
+
+
+    # ---------------- Import Needs (CSV) ----------------
+    elif menu_choice == "Import Needs (CSV)":
+        st.subheader("Import Needs from a CSV File")
+        st.caption("One need per row, with a header row. The need column is required; "
+                   "number defaults to 1. Needs you have already registered are skipped.")
+        st.download_button("Download template", IMPORT_TEMPLATE, file_name="facility_needs_template.csv",
+                           mime="text/csv", key="needs_import_template")
+
+        csv_file = st.file_uploader("CSV file", type=["csv"], key="needs_import_file")
+
+        if csv_file and st.button("Import Needs", key="needs_import_btn"):
+            try:
+                with st.spinner("Importing needs…"):
+                    report = import_needs(st.session_state.user_id, csv_file)
+            except ValueError as e:
+                st.error(f"Could not read the file: {e}")
+            except Exception as e:
+                st.error("Failed to import needs.")
+                st.exception(e)
+            else:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Accepted", f"{report['accepted']:,}")
+                col2.metric("Duplicates skipped", f"{report['duplicates']:,}")
+                col3.metric("Rejected", f"{report['rejected']:,}")
+                if report["rejected_rows"]:
+                    shown = len(report["rejected_rows"])
+                    st.warning(f"{report['rejected']:,} row(s) were rejected"
+                               + (f"; the first {shown:,} are listed." if shown < report["rejected"] else "."))
+                    st.dataframe(pd.DataFrame(report["rejected_rows"], columns=["Line", "Reason"]),
+                                 use_container_width=True, hide_index=True)
+                if report["accepted"]:
+                    st.success(f"{report['accepted']:,} need(s) registered.")
 
 
     # ---------------- View Submitted Needs ----------------
@@ -1802,126 +1870,26 @@ def facility_dashboard_page():
         st.subheader("Your Submitted Needs")
 
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT need, quantity, timestamp
-                FROM facility_needs
-                WHERE facility_id = %s
-                ORDER BY timestamp DESC
-            """, (st.session_state.user_id,))
-            needs = cursor.fetchall()
-            conn.close()
+            needs = get_facility_needs(st.session_state.user_id)
 
             if not needs:
                 st.info("No needs submitted yet.")
             else:
                 df_needs = pd.DataFrame(
-                    needs,
-                    columns=["Need", "Number", "Submitted At"]
+                    [(need, number, program_type, created_at, "Yes" if editable else "No")
+                     for _, need, number, program_type, created_at, editable in needs],
+                    columns=["Need", "Number", "Programme Type", "Submitted At", "Editable"]
                 )
                 st.dataframe(df_needs, use_container_width=True)
 
         except Exception as e:
             st.error("Could not load submitted needs.")
             st.exception(e)
-    
-    st.markdown("### 🗑️ Manage Submitted Needs")
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, need, number, created_at
-        FROM facility_needs
-        WHERE facility_id = %s
-        ORDER BY created_at DESC
-    """, (st.session_state.user_id,))
-
-    needs = cursor.fetchall()
-
-    if not needs:
-        st.info("No needs submitted yet.")
-    else:
-        for need_id, need_text, number, created_at in needs:
-            hours_passed = (datetime.now() - created_at).total_seconds() / 3600
-            editable = hours_passed <= 24
-
-            st.divider()
-            col1, col2, col3 = st.columns([5, 2, 3])
-
-            # ================= DISPLAY =================
-            with col1:
-                st.write(f"**{need_text}** (x{number})")
-                st.caption(f"Submitted: {created_at.strftime('%Y-%m-%d %H:%M')}")
-
-            with col2:
-                if editable:
-                    st.success("Editable")
-                else:
-                    st.error("Locked")
-
-            # ================= ACTIONS =================
-            with col3:
-                if editable:
-                    edit_key = f"edit_{need_id}"
-                    delete_key = f"delete_{need_id}"
 
-                    if st.button("✏️ Edit", key=edit_key):
-                        st.session_state.editing_need_id = need_id
-                        st.session_state.edit_need_text = need_text
-                        st.session_state.edit_number = number
-
-                    if st.button("🗑️ Delete", key=delete_key):
-                        cursor.execute(
-                            "DELETE FROM facility_needs WHERE id = %s",
-                            (need_id,)
-                        )
-                        conn.commit()
-                        st.success("Need deleted successfully.")
-                        st.rerun()
-                else:
-                    st.write("—")
-
-            # ================= EDIT FORM =================
-            if st.session_state.get("editing_need_id") == need_id:
-                st.markdown("#### ✏️ Edit Need")
-
-                new_need = st.text_input(
-                    "Need Description",
-                    st.session_state.edit_need_text,
-                    key=f"need_input_{need_id}"
-                )
-
-                new_number = st.number_input(
-                    "Number",
-                    min_value=1,
-                    value=st.session_state.edit_number,
-                    key=f"number_input_{need_id}"
-                )
-
-                save_col, cancel_col = st.columns(2)
-
-                with save_col:
-                    if st.button("💾 Save", key=f"save_{need_id}"):
-                        cursor.execute("""
-                            UPDATE facility_needs
-                            SET need = %s, number = %s
-                            WHERE id = %s
-                        """, (new_need.strip(), new_number, need_id))
-
-                        conn.commit()
-                        st.success("Need updated successfully.")
-                        st.session_state.editing_need_id = None
-                        st.rerun()
-
-                with cancel_col:
-                    if st.button("❌ Cancel", key=f"cancel_{need_id}"):
-                        st.session_state.editing_need_id = None
-                        st.rerun()
-
-    cursor.close()
-    conn.close()
+    # ---------------- Manage Submitted Needs ----------------
+    elif menu_choice == "Manage Submitted Needs":
+        st.markdown("### 🗑️ Manage Submitted Needs")
+        manage_submitted_needs()
 
 
 
@@ -1941,11 +1909,25 @@ def main():
         "admin_dashboard": admin_dashboard
     }
 
-    if st.session_state.page in pages:
-        pages[st.session_state.page]()
-    else:
+    # Signed-in pages need a principal that has not been revoked
+    required_kind = {
+        "user_dashboard": "user",
+        "admin_dashboard": "user",
+        "facility_dashboard": "facility",
+    }.get(st.session_state.page)
+    if required_kind:
+        principal = current_principal()
+        if (principal is None or principal.kind != required_kind
+                or (st.session_state.page == "admin_dashboard" and not principal.is_admin)):
+            st.session_state.clear()
+            st.session_state.page = "login_facility" if required_kind == "facility" else "login_user"
+            st.warning("Your session has ended. Please sign in again.")
+
+    if st.session_state.page not in pages:
         st.session_state.page = "home"
-        pages["home"]()
+    page = st.session_state.page
+    with timed_run(f"page: {page}"):
+        pages[page]()
 
 if __name__ == "__main__":
     main()
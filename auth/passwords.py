@@ -0,0 +1,164 @@
+# auth/passwords.py
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+import config
+
+
+class AuthBusy(Exception):
+    """Too many password checks are already queued; the caller should retry."""
+
+
+class LoginThrottled(Exception):
+    """Too many recent failures for this account or address."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many failed attempts. Try again in {int(retry_after) + 1}s.")
+        self.retry_after = retry_after
+
+
+# ---------------- HASH WORKERS ----------------
+# bcrypt releases the GIL, so a small pool verifies in parallel without
+# tying up the Streamlit script threads. The semaphore bounds how many
+# logins may wait for it; the rest fail fast with AuthBusy.
+_executor = ThreadPoolExecutor(max_workers=config.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_admission = threading.BoundedSemaphore(config.AUTH_HASH_WORKERS + config.AUTH_HASH_QUEUE)
+
+
+def _run(fn, *args):
+    if not _admission.acquire(timeout=config.AUTH_HASH_TIMEOUT):
+        raise AuthBusy("The server is busy signing other people in. Please try again shortly.")
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _admission.release()
+
+
+def hash_password(password, rounds=None):
+    rounds = rounds or config.BCRYPT_ROUNDS
+    return _run(lambda: bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8"))
+
+
+def hash_cost(stored_hash):
+    """Cost factor of a '$2b$12$...' hash, or None if it can't be read."""
+    try:
+        return int(stored_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(stored_hash):
+    return hash_cost(stored_hash) != config.BCRYPT_ROUNDS
+
+
+_dummy_hash = None
+_dummy_lock = threading.Lock()
+
+
+def _get_dummy_hash():
+    """A throwaway hash at BCRYPT_ROUNDS, made once per process."""
+    global _dummy_hash
+    with _dummy_lock:
+        if _dummy_hash is None:
+            _dummy_hash = bcrypt.hashpw(b"nidah-dummy-password", bcrypt.gensalt(config.BCRYPT_ROUNDS))
+        return _dummy_hash
+
+
+# Make it in the background now so the first unknown login isn't slower
+_executor.submit(_get_dummy_hash)
+
+
+def verify_password(password, stored_hash):
+    """
+    Check a password against a stored bcrypt hash off the script thread.
+    Returns (valid, new_hash) where new_hash is set when the stored hash
+    used a different cost factor and should be replaced. Without a stored
+    hash (unknown or inactive account) a dummy hash is checked instead, so
+    the answer takes as long as for a real account.
+    """
+    if not stored_hash or password is None:
+        def dummy_check():
+            bcrypt.checkpw((password or "").encode("utf-8"), _get_dummy_hash())
+            return False, None
+
+        return _run(dummy_check)
+
+    def check():
+        try:
+            valid = bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+        except ValueError:
+            return False, None
+        if valid and needs_rehash(stored_hash):
+            return True, bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(config.BCRYPT_ROUNDS)).decode("utf-8")
+        return valid, None
+
+    return _run(check)
+
+
+# ---------------- THROTTLING ----------------
+class LoginThrottle:
+    """Sliding-window failure counter keyed by account and by client IP."""
+
+    def __init__(self, max_per_account, max_per_ip, window):
+        self.max_per_account = max_per_account
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self._failures = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _keys(self, account, ip):
+        keys = [(f"account:{account.lower()}", self.max_per_account)] if account else []
+        if ip:
+            keys.append((f"ip:{ip}", self.max_per_ip))
+        return keys
+
+    def check(self, account, ip=None):
+        """Raise LoginThrottled if either key is over its limit."""
+        now = time.monotonic()
+        with self._lock:
+            for key, limit in self._keys(account, ip):
+                failures = self._failures.get(key)
+                if not failures:
+                    continue
+                while failures and now - failures[0] > self.window:
+                    failures.popleft()
+                if len(failures) >= limit:
+                    raise LoginThrottled(self.window - (now - failures[0]))
+
+    def record_failure(self, account, ip=None):
+        now = time.monotonic()
+        with self._lock:
+            for key, _ in self._keys(account, ip):
+                self._failures[key].append(now)
+
+    def record_success(self, account):
+        with self._lock:
+            self._failures.pop(f"account:{(account or '').lower()}", None)
+
+
+throttle = LoginThrottle(
+    config.LOGIN_MAX_FAILURES_PER_ACCOUNT,
+    config.LOGIN_MAX_FAILURES_PER_IP,
+    config.LOGIN_FAILURE_WINDOW,
+)
+
+
+def check_login(cur, table, row_id, account, password, stored_hash, ip=None):
+    """
+    Throttle, verify and transparently upgrade a stored hash in one place.
+    cur must belong to a connection the caller commits.
+    """
+    throttle.check(account, ip)
+    valid, new_hash = verify_password(password, stored_hash)
+    if not valid:
+        throttle.record_failure(account, ip)
+        return False
+
+    throttle.record_success(account)
+    if new_hash:
+        cur.execute(f"UPDATE {table} SET password_hash = %s WHERE id = %s", (new_hash, row_id))
+    return True
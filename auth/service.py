@@ -0,0 +1,129 @@
+# auth/service.py
+import time
+from dataclasses import asdict, dataclass
+
+from psycopg2.extras import RealDictCursor
+
+import config
+from auth.passwords import check_login
+from database.db import get_connection
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Who is signed in. Built once at login and kept in the session, so
+    reruns don't go back to the database to find out.
+    """
+    kind: str            # "user" or "facility"
+    id: int
+    role: str            # individual, association, admin or facility
+    display_name: str
+    username: str
+    version: int
+    checked_at: float
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+    def as_dict(self):
+        return asdict(self)
+
+
+# ---------------- ACCOUNT LOOKUPS ----------------
+# kind -> (table, condition for an account allowed to sign in). Every
+# account type goes through the same throttling, verification and rehash
+# path in authenticate(). Nothing sets facilities.is_registered yet, so
+# only is_active is enforced for facilities.
+_ACCOUNTS = {
+    "user": ("users", "COALESCE(LOWER(TRIM(status)), 'active') = 'active'"),
+    "facility": ("facilities", "is_active IS NOT FALSE"),
+}
+
+_LOOKUPS = {
+    "user": f"""
+        SELECT id, username, full_name AS display_name, LOWER(TRIM(role)) AS role,
+               password_hash, principal_version
+        FROM users
+        WHERE LOWER(username) = LOWER(%s) AND {_ACCOUNTS["user"][1]}
+    """,
+    "facility": f"""
+        SELECT id, facility_code AS username, facility_name AS display_name, 'facility' AS role,
+               password_hash, principal_version
+        FROM facilities
+        WHERE LOWER(facility_code) = LOWER(%s) AND {_ACCOUNTS["facility"][1]}
+    """,
+}
+
+
+def authenticate(kind, identifier, password, ip=None, role=None):
+    """
+    Verify credentials for a user or facility and return a Principal, or
+    None. Deactivated accounts are treated like unknown ones. Pass role to
+    only accept accounts with that role (e.g. "admin"). May raise AuthBusy
+    or LoginThrottled.
+    """
+    table, _ = _ACCOUNTS[kind]
+    lookup = _LOOKUPS[kind]
+    identifier = (identifier or "").strip()
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(lookup, (identifier,))
+        row = cur.fetchone()
+        if row is not None and role is not None and row["role"] != role:
+            row = None
+        stored_hash = row["password_hash"] if row else None
+
+        if not check_login(cur, table, row and row["id"], identifier, password, stored_hash, ip):
+            return None
+
+        # A rehash on login bumps the version; read it back so the new
+        # principal isn't revoked straight away
+        cur.execute(f"SELECT principal_version FROM {table} WHERE id = %s", (row["id"],))
+        version = cur.fetchone()["principal_version"]
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    return Principal(
+        kind=kind,
+        id=row["id"],
+        role=row["role"],
+        display_name=row["display_name"] or row["username"],
+        username=row["username"],
+        version=version,
+        checked_at=time.time(),
+    )
+
+
+# ---------------- REVALIDATION ----------------
+def revalidate(principal):
+    """
+    Return the principal if it is still valid, refreshed if it was just
+    rechecked, or None if it has been revoked (its principal_version moved
+    on) or the account was deactivated. Only goes to the database every
+    PRINCIPAL_RECHECK_SECONDS.
+    """
+    if principal is None:
+        return None
+
+    if time.time() - principal.checked_at < config.PRINCIPAL_RECHECK_SECONDS:
+        return principal
+
+    table, active = _ACCOUNTS[principal.kind]
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT principal_version FROM {table} WHERE id = %s AND {active}", (principal.id,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+    if row is None or row[0] != principal.version:
+        return None
+    return Principal(**{**principal.as_dict(), "checked_at": time.time()})
@@ -0,0 +1,33 @@
+# benchmarks/bench_assignment.py
+"""
+Greedy vs capacity-aware optimal assignment, without a database.
+
+Run from the repository root:  python -m benchmarks.bench_assignment [USERS] [NEEDS]
+Defaults to 50k users x 20k needs with 1-3 places per need. Peak memory is
+reported from the process's max RSS.
+"""
+import random
+import resource
+import sys
+
+from benchmarks.bench_matching import make_needs, make_users
+from matching.engine import NeedIndex
+from matching.optimal import compare_modes
+
+
+if __name__ == "__main__":
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    n_needs = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    budget = float(sys.argv[3]) if len(sys.argv) > 3 else 60.0
+    rng = random.Random(11)
+
+    users = make_users(n_users, rng)
+    needs = make_needs(n_needs, rng)
+    index = NeedIndex(needs)
+    capacity = {need_id: rng.randint(1, 3) for need_id, _, _ in needs}
+
+    print(f"{n_users:,} users x {n_needs:,} needs, {sum(capacity.values()):,} places, budget {budget}s")
+    for mode, stats in compare_modes(users, index, capacity, budget).items():
+        print(f"{mode:<8} {stats['seconds']:8.2f}s  matched={stats['matched']:,}  "
+              f"total_score={stats['total_score']:,}  over_capacity={stats['over_capacity']:,}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB")
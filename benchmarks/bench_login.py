@@ -0,0 +1,50 @@
+# benchmarks/bench_login.py
+"""
+Login (bcrypt verify) throughput through the auth worker pool.
+
+Run from the repository root:  python -m benchmarks.bench_login [LOGINS] [CONCURRENCY]
+For each cost factor, LOGINS verifications are fired from CONCURRENCY
+threads (simulating simultaneous Streamlit sessions). Logins rejected by
+admission control are counted separately.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+import config
+from auth.passwords import AuthBusy, verify_password
+
+
+def run(cost, logins, concurrency):
+    stored = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(cost)).decode()
+    config.BCRYPT_ROUNDS = cost  # avoid measuring rehash work
+    busy = 0
+
+    def login(_):
+        nonlocal busy
+        started = time.perf_counter()
+        try:
+            verify_password("correct horse", stored)
+        except AuthBusy:
+            busy += 1
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as sessions:
+        latencies = sorted(sessions.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"cost {cost:>2}: {logins / elapsed:7.1f} logins/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  busy {busy}")
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{logins} logins from {concurrency} concurrent sessions, "
+          f"{config.AUTH_HASH_WORKERS} hash worker(s), queue {config.AUTH_HASH_QUEUE}")
+    for cost in (10, 11, 12, 13):
+        run(cost, logins, concurrency)
@@ -0,0 +1,80 @@
+# benchmarks/bench_matching.py
+"""
+Inverted-index matching at scale, without a database.
+
+Run from the repository root:  python -m benchmarks.bench_matching [USERS] [NEEDS]
+Defaults to 100k users x 10k facility needs (one need per facility).
+"""
+import random
+import sys
+import time
+
+from matching.engine import NeedIndex, greedy_matches, parse_skills
+
+
+SPECIALTIES = [
+    "Urology", "Neurology", "Cardiology", "General Surgery", "Gynaecology",
+    "Nephrology", "Radiology", "Oncology", "Ophthalmology", "Paediatrics",
+    "Anaesthesia", "Orthopaedics", "Dermatology", "Psychiatry", "ENT",
+    "Haematology", "Endocrinology", "Pathology", "Neurosurgery", "Critical Care",
+    "Emergency Medicine", "Public Health", "Nursing", "Pharmacy", "Laboratory Science",
+]
+EXTRA_WORDS = ["specialist", "consultant", "training", "support", "theatre", "equipment", "ward"]
+
+
+def make_users(n, rng):
+    users = {}
+    for user_id in range(1, n + 1):
+        k = 1 if rng.random() < 0.8 else rng.randint(2, 4)
+        users[user_id] = parse_skills(", ".join(rng.sample(SPECIALTIES, k)))
+    return users
+
+
+def make_needs(n, rng):
+    needs = []
+    for need_id in range(1, n + 1):
+        parts = rng.sample(SPECIALTIES, rng.randint(1, 3))
+        parts.append(" ".join(rng.sample(EXTRA_WORDS, 2)))
+        needs.append((need_id, need_id, ", ".join(parts)))
+    return needs
+
+
+def old_matches(users, needs):
+    """The previous users x facilities nested loop, for small-size comparison."""
+    facility_needs = {f: [s.strip().lower() for s in text.split(",")] for _, f, text in needs}
+    out = []
+    for user_id, skills in users.items():
+        best, best_score = None, 0
+        for facility_id, terms in facility_needs.items():
+            score = len(set(skills) & set(terms))
+            if score > best_score:
+                best, best_score = facility_id, score
+        if best:
+            out.append((user_id, best, best_score))
+    return out
+
+
+if __name__ == "__main__":
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_needs = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    rng = random.Random(7)
+
+    users = make_users(n_users, rng)
+    needs = make_needs(n_needs, rng)
+
+    started = time.perf_counter()
+    index = NeedIndex(needs)
+    built = time.perf_counter()
+    matches = greedy_matches(users, index)
+    done = time.perf_counter()
+
+    print(f"{n_users:,} users x {n_needs:,} needs")
+    print(f"index build      {built - started:8.2f}s  ({len(index.postings):,} terms)")
+    print(f"scoring          {done - built:8.2f}s  ({len(matches):,} matches)")
+
+    sample_users = dict(list(users.items())[:1000])
+    started = time.perf_counter()
+    old_matches(sample_users, needs)
+    old_elapsed = time.perf_counter() - started
+    print(f"old nested loop  {old_elapsed:8.2f}s  for 1,000 users "
+          f"(~{old_elapsed * n_users / 1000:,.0f}s extrapolated)")
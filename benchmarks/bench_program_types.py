@@ -0,0 +1,62 @@
+# benchmarks/bench_program_types.py
+"""
+Program-type classification throughput over synthetic need texts.
+
+Run from the repository root:  python -m benchmarks.bench_program_types [N]
+Compares the compiled taxonomy matcher against the old per-keyword loop.
+"""
+import random
+import sys
+import time
+
+from database.program_types import classify_need
+
+
+OLD_KEYWORDS = [
+    "training", "capacity building", "workshop", "mentorship",
+    "skills development", "clinical training", "orientation", "coaching"
+]
+
+WORDS = [
+    "urology", "neurology", "cardiology", "surgeon", "nurse", "theatre",
+    "equipment", "dialysis", "radiology", "support", "staff", "specialist",
+    "paediatric", "oncology", "laboratory", "pharmacist", "ward", "icu",
+]
+TRAINING_WORDS = ["training", "workshop", "mentorship", "coaching", "Capacity Building"]
+
+
+def old_classify(need_text):
+    if not need_text or need_text.strip() == "":
+        return "Services"
+    need_lower = need_text.lower()
+    if any(keyword in need_lower for keyword in OLD_KEYWORDS):
+        return "Training"
+    return "Services"
+
+
+def make_texts(n, seed=42):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = rng.sample(WORDS, rng.randint(2, 8))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(TRAINING_WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+
+def run(label, fn, texts):
+    started = time.perf_counter()
+    results = [fn(t) for t in texts]
+    elapsed = time.perf_counter() - started
+    print(f"{label:<20} {elapsed:8.2f}s  {len(texts) / elapsed:>12,.0f} needs/s")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    texts = make_texts(n)
+    print(f"Classifying {n:,} need texts")
+    old = run("keyword loop", old_classify, texts)
+    new = run("compiled matcher", classify_need, texts)
+    assert old == new, "compiled matcher disagrees with the keyword loop"
@@ -0,0 +1,79 @@
+# benchmarks/bench_report_export.py
+"""
+Peak memory of a report export: fetchall + DataFrame + to_csv (the old
+Reports path) against the streaming COPY export.
+
+Run from the repository root:  python -m benchmarks.bench_report_export [ROWS ...]
+Needs a reachable database (the usual NIDAH_DB_* / DATABASE_URL settings).
+Rows are generated server-side with generate_series, so nothing is written
+to the database. Each (mode, rows) run happens in a fresh process so peak
+RSS is not carried over between runs.
+"""
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+
+from database import reports
+from database.pagination import GridSpec
+
+
+def bench_report(rows):
+    """A Facility Needs-shaped report of any size."""
+    return GridSpec(
+        columns=(
+            ("Facility", "'Facility ' || (g % 500)"),
+            ("State", "'State ' || (g % 37)"),
+            ("Need", "'Need number ' || g || ' for surgery, nursing and paediatrics'"),
+            ("Number", "g % 10"),
+            ("Program Type", "'Services'"),
+            ("Submitted At", "now() - g * interval '1 second'"),
+        ),
+        source=f"generate_series(1, {int(rows)}) g",
+        key="g",
+        sortable={"Row": "g"},
+        default_sort="Row",
+    )
+
+
+def _peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(mode, rows, results):
+    import pandas as pd
+
+    reports.REPORTS["Benchmark"] = bench_report(rows)
+    baseline = _peak_mb()
+    started = time.perf_counter()
+
+    with tempfile.TemporaryFile() as out:
+        if mode == "fetchall":
+            conn = reports.get_connection()
+            cur = conn.cursor()
+            cur.execute(reports.REPORTS["Benchmark"].select_sql())
+            data = cur.fetchall()
+            df = pd.DataFrame(data, columns=[col[0] for col in cur.description])
+            out.write(df.to_csv(index=False).encode("utf-8"))
+            cur.close()
+            conn.close()
+        else:
+            reports.copy_report_csv("Benchmark", out)
+        size = out.tell()
+
+    results.put((time.perf_counter() - started, baseline, _peak_mb(), size))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 3_000_000]
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':<9} {'rows':>10} {'seconds':>8} {'base MB':>8} {'peak MB':>8} {'CSV MB':>8}")
+    for rows in sizes:
+        for mode in ("fetchall", "copy"):
+            results = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(mode, rows, results))
+            proc.start()
+            seconds, baseline, peak, size = results.get()
+            proc.join()
+            print(f"{mode:<9} {rows:>10,} {seconds:>8.1f} {baseline:>8.0f} {peak:>8.0f} {size / 2**20:>8.0f}")
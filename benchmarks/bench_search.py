@@ -0,0 +1,116 @@
+# benchmarks/bench_search.py
+"""
+Admin search latency over a large directory, before and after the trigram
+indexes from migration 0010.
+
+Run from the repository root:  python -m benchmarks.bench_search [USERS] [FACILITIES]
+Needs a reachable database with the pg_trgm extension (the usual NIDAH_DB_*
+/ DATABASE_URL settings). Data goes into temporary tables named users and
+facilities, which shadow the real ones for this connection only and are
+dropped when it closes.
+"""
+import statistics
+import sys
+import time
+
+import psycopg2
+
+import config
+from database.search import (
+    FACILITY_SEARCH_TEXT, USER_SEARCH_TEXT, search_facilities, search_users
+)
+
+FIRST = ["Adaeze", "Babatunde", "Chinedu", "Damilola", "Emeka", "Folake", "Garba", "Halima",
+         "Ifeanyi", "Jumoke", "Kelechi", "Lami", "Musa", "Ngozi", "Olumide", "Precious",
+         "Rasheed", "Sade", "Tunde", "Uche", "Victoria", "Yusuf", "Zainab", "Chiamaka"]
+LAST = ["Adebayo", "Bello", "Chukwu", "Danjuma", "Eze", "Fashola", "Ibrahim", "Johnson",
+        "Kalu", "Lawal", "Mohammed", "Nwosu", "Okafor", "Oyelaran", "Suleiman", "Usman"]
+COUNTRIES = ["United Kingdom", "United States", "Canada", "Germany", "Ireland", "Nigeria"]
+STATES = ["Lagos", "FCT", "Kano", "Kaduna", "Oyo", "Rivers", "Enugu", "Plateau", "Borno"]
+
+QUERIES = [
+    "okafor",           # surname
+    "adaeze nwosu",     # full name
+    "okafr",            # typo
+    "user123456",       # exact username
+    "kingdom",          # country
+    "gen. hosp",        # facility name fragment
+    "kaduna",           # state
+    "FAC0042",          # facility code
+]
+
+
+def _array(values):
+    return "ARRAY[" + ", ".join(f"'{v}'" for v in values) + "]"
+
+
+def load(cur, n_users, n_facilities):
+    cur.execute("""
+        CREATE TEMP TABLE users (
+            id SERIAL PRIMARY KEY, username TEXT, full_name TEXT, role TEXT,
+            email TEXT, country TEXT
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO users (username, full_name, role, email, country)
+        SELECT 'user' || g,
+               ({_array(FIRST)})[1 + g % {len(FIRST)}] || ' ' || ({_array(LAST)})[1 + (g / {len(FIRST)}) % {len(LAST)}],
+               'individual',
+               'user' || g || '@example.org',
+               ({_array(COUNTRIES)})[1 + g % {len(COUNTRIES)}]
+        FROM generate_series(1, %s) g
+    """, (n_users,))
+    cur.execute("""
+        CREATE TEMP TABLE facilities (
+            id SERIAL PRIMARY KEY, facility_code TEXT, facility_name TEXT, state TEXT
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO facilities (facility_code, facility_name, state)
+        SELECT 'FAC' || lpad(g::text, 4, '0'),
+               ({_array(STATES)})[1 + g % {len(STATES)}] || ' Gen. Hospital ' || g,
+               ({_array(STATES)})[1 + g % {len(STATES)}]
+        FROM generate_series(1, %s) g
+    """, (n_facilities,))
+    cur.execute("ANALYZE users")
+    cur.execute("ANALYZE facilities")
+
+
+def run(cur, label, repeats=20):
+    print(f"\n{label}")
+    for query in QUERIES:
+        latencies = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            hits = search_users(query, cur=cur) + search_facilities(query, cur=cur)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"  {query!r:<16} p50 {statistics.median(latencies):8.1f} ms  p95 {p95:8.1f} ms  hits {len(hits)}")
+
+
+if __name__ == "__main__":
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    n_facilities = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    conn = psycopg2.connect(**config.db_connect_kwargs())
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        started = time.perf_counter()
+        load(cur, n_users, n_facilities)
+        print(f"{n_users:,} users and {n_facilities:,} facilities loaded in {time.perf_counter() - started:.1f}s")
+
+        run(cur, "Without trigram indexes (sequential scans)", repeats=3)
+
+        started = time.perf_counter()
+        cur.execute(f"CREATE INDEX ON users USING gin ({USER_SEARCH_TEXT} gin_trgm_ops)")
+        cur.execute(f"CREATE INDEX ON facilities USING gin ({FACILITY_SEARCH_TEXT} gin_trgm_ops)")
+        cur.execute("ANALYZE users")
+        cur.execute("ANALYZE facilities")
+        print(f"\nTrigram indexes built in {time.perf_counter() - started:.1f}s")
+
+        run(cur, "With trigram indexes")
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,151 @@
+# config.py
+import json
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+# ---------------- DATABASE ----------------
+# A full DATABASE_URL wins over the individual settings below. There are no
+# defaults for the server or credentials; they must come from the environment.
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+DB_HOST = os.getenv("NIDAH_DB_HOST")
+DB_PORT = _env_int("NIDAH_DB_PORT", 5432)
+DB_NAME = os.getenv("NIDAH_DB_NAME", "postgres")
+DB_USER = os.getenv("NIDAH_DB_USER")
+DB_PASSWORD = os.getenv("NIDAH_DB_PASSWORD")
+DB_SSLMODE = os.getenv("NIDAH_DB_SSLMODE", "require")
+
+
+def db_connect_kwargs():
+    """
+    Keyword arguments for psycopg2.connect(). Raises RuntimeError when
+    neither DATABASE_URL nor the host and credentials are set.
+    """
+    if DATABASE_URL:
+        return {"dsn": DATABASE_URL, "sslmode": DB_SSLMODE}
+    missing = [name for name, value in (
+        ("NIDAH_DB_HOST", DB_HOST),
+        ("NIDAH_DB_USER", DB_USER),
+        ("NIDAH_DB_PASSWORD", DB_PASSWORD),
+    ) if not value]
+    if missing:
+        raise RuntimeError(
+            "Database connection is not configured. Set DATABASE_URL or " + ", ".join(missing)
+        )
+    return {
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "dbname": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "sslmode": DB_SSLMODE,
+    }
+
+
+# ---------------- CONNECTION POOL ----------------
+DB_POOL_MIN = _env_int("NIDAH_DB_POOL_MIN", 1)
+DB_POOL_MAX = _env_int("NIDAH_DB_POOL_MAX", 10)
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT = _env_int("NIDAH_DB_POOL_TIMEOUT", 10)
+# Connections idle for longer than this are pinged before being handed out
+DB_POOL_HEALTHCHECK_AFTER = _env_int("NIDAH_DB_POOL_HEALTHCHECK_AFTER", 30)
+# Idle connections above DB_POOL_MIN are closed after this many seconds unused
+DB_POOL_IDLE_TIMEOUT = _env_int("NIDAH_DB_POOL_IDLE_TIMEOUT", 600)
+
+
+# ---------------- PROGRAM TYPE TAXONOMY ----------------
+# Needs mentioning any of these phrases are classified under that program
+# type; everything else falls back to DEFAULT_PROGRAM_TYPE. Point
+# NIDAH_PROGRAM_TYPE_TAXONOMY at a JSON file ({"Training": [...]}) to override.
+DEFAULT_PROGRAM_TYPE = "Services"
+PROGRAM_TYPE_TAXONOMY = {
+    "Training": [
+        "training", "capacity building", "workshop", "mentorship",
+        "skills development", "clinical training", "orientation", "coaching"
+    ],
+}
+
+_taxonomy_path = os.getenv("NIDAH_PROGRAM_TYPE_TAXONOMY")
+if _taxonomy_path:
+    with open(_taxonomy_path, encoding="utf-8") as f:
+        PROGRAM_TYPE_TAXONOMY = json.load(f)
+
+
+# ---------------- MIGRATIONS ----------------
+# Apply pending migrations automatically on startup (otherwise the app refuses
+# to start until `python -m database.migrate up` has been run).
+AUTO_MIGRATE = os.getenv("NIDAH_AUTO_MIGRATE", "1") != "0"
+
+
+# ---------------- PASSWORDS / LOGIN ----------------
+# bcrypt cost for new hashes; older hashes are upgraded on the next login
+BCRYPT_ROUNDS = _env_int("NIDAH_BCRYPT_ROUNDS", 12)
+# bcrypt runs off the script thread in a pool this size
+AUTH_HASH_WORKERS = _env_int("NIDAH_AUTH_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+# Logins allowed to wait for a hash worker; beyond this they are told to retry
+AUTH_HASH_QUEUE = _env_int("NIDAH_AUTH_HASH_QUEUE", 32)
+AUTH_HASH_TIMEOUT = _env_int("NIDAH_AUTH_HASH_TIMEOUT", 5)
+# Failed logins allowed per account / per IP within the window
+LOGIN_MAX_FAILURES_PER_ACCOUNT = _env_int("NIDAH_LOGIN_MAX_FAILURES_PER_ACCOUNT", 5)
+LOGIN_MAX_FAILURES_PER_IP = _env_int("NIDAH_LOGIN_MAX_FAILURES_PER_IP", 20)
+LOGIN_FAILURE_WINDOW = _env_int("NIDAH_LOGIN_FAILURE_WINDOW", 300)
+# Signed-in sessions re-check their account version at most this often
+PRINCIPAL_RECHECK_SECONDS = _env_int("NIDAH_PRINCIPAL_RECHECK_SECONDS", 60)
+# Reverse proxies (comma-separated addresses or CIDR ranges) whose
+# X-Forwarded-For header is believed when throttling logins by IP
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("NIDAH_TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+
+# ---------------- CACHING ----------------
+USER_DASHBOARD_CACHE_TTL = _env_int("NIDAH_USER_DASHBOARD_CACHE_TTL", 300)
+# Headline KPIs are shared by all admin sessions for this long
+KPI_CACHE_TTL = _env_int("NIDAH_KPI_CACHE_TTL", 30)
+# Default to planner estimates instead of COUNT(*) for the large tables
+KPI_APPROXIMATE_COUNTS = os.getenv("NIDAH_KPI_APPROXIMATE_COUNTS", "0") == "1"
+# A facility's list of needs, invalidated whenever the facility changes one
+FACILITY_NEEDS_CACHE_TTL = _env_int("NIDAH_FACILITY_NEEDS_CACHE_TTL", 60)
+# Facilities can edit or delete a need for this many hours after submitting it
+NEED_EDIT_WINDOW_HOURS = _env_int("NIDAH_NEED_EDIT_WINDOW_HOURS", 24)
+# Bulk CSV imports of needs are staged with COPY this many rows at a time
+NEED_IMPORT_CHUNK_ROWS = _env_int("NIDAH_NEED_IMPORT_CHUNK_ROWS", 5000)
+# At most this many rejected rows are listed back to the facility
+NEED_IMPORT_REPORT_ROWS = _env_int("NIDAH_NEED_IMPORT_REPORT_ROWS", 1000)
+
+
+# ---------------- REPORTS ----------------
+# CSV exports are streamed from the database into files here
+EXPORT_DIR = os.getenv("NIDAH_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "nidah_exports"))
+# Export files older than this (seconds) are removed on the next export
+EXPORT_MAX_AGE = _env_int("NIDAH_EXPORT_MAX_AGE", 3600)
+# Rows per page in the admin data grids; exports always have every row
+GRID_PAGE_SIZE = _env_int("NIDAH_GRID_PAGE_SIZE", 50)
+
+
+# ---------------- DOCUMENT STORAGE ----------------
+# Uploaded files are stored once per distinct content, named by SHA-256
+DOCUMENT_STORE_DIR = os.getenv("NIDAH_DOCUMENT_STORE_DIR", os.path.join("uploads", "blobs"))
+# Uploads are copied and hashed this many bytes at a time
+DOCUMENT_CHUNK_SIZE = _env_int("NIDAH_DOCUMENT_CHUNK_SIZE", 1024 * 1024)
+# Preview thumbnails, generated in the background and named by content hash
+THUMBNAIL_DIR = os.getenv("NIDAH_THUMBNAIL_DIR", os.path.join("uploads", "thumbnails"))
+THUMBNAIL_SIZE = _env_int("NIDAH_THUMBNAIL_SIZE", 320)
+# JPEG/PNG uploads are EXIF-rotated, shrunk to this many pixels on the long
+# side and re-encoded before storing; set NIDAH_NORMALIZE_IMAGES=0 to store as uploaded
+NORMALIZE_IMAGES = os.getenv("NIDAH_NORMALIZE_IMAGES", "1") != "0"
+IMAGE_MAX_DIMENSION = _env_int("NIDAH_IMAGE_MAX_DIMENSION", 2000)
+IMAGE_JPEG_QUALITY = _env_int("NIDAH_IMAGE_JPEG_QUALITY", 85)
+# Also keep the untouched upload alongside the normalized copy
+IMAGE_KEEP_ORIGINAL = os.getenv("NIDAH_IMAGE_KEEP_ORIGINAL", "0") == "1"
+
+
+# ---------------- RERUN TIMINGS ----------------
+# Recent run times kept per page / fragment for the admin Overview
+RERUN_TIMING_SAMPLES = _env_int("NIDAH_RERUN_TIMING_SAMPLES", 200)
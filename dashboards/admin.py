@@ -0,0 +1,287 @@
+# dashboards/admin.py
+import config
+from database.cache import TTLCache
+from database.db import get_connection
+from database.pagination import GridSpec
+from database.rollups import FEEDBACK_DIMENSIONS
+
+
+_kpi_cache = TTLCache("admin_kpis", config.KPI_CACHE_TTL)
+
+
+# ---------------- HEADLINE KPIs ----------------
+_EXACT_KPIS = """
+    SELECT
+        (SELECT COUNT(*) FROM facilities WHERE is_active = TRUE) AS facilities,
+        (SELECT COUNT(*) FROM facility_needs) AS needs,
+        (SELECT COUNT(*) FROM programs WHERE is_active = TRUE) AS programs,
+        (SELECT COUNT(*) FROM users) AS users
+"""
+
+# Large tables use the planner's row estimate (kept fresh by autovacuum /
+# ANALYZE) instead of a full scan; small filtered counts stay exact. A
+# table that has never been analyzed has reltuples = -1 and is counted.
+def _estimate(table):
+    return f"""(
+        SELECT CASE WHEN reltuples < 0 THEN (SELECT COUNT(*) FROM {table})
+                    ELSE reltuples::bigint END
+        FROM pg_class WHERE oid = '{table}'::regclass
+    )"""
+
+
+_APPROXIMATE_KPIS = f"""
+    SELECT
+        (SELECT COUNT(*) FROM facilities WHERE is_active = TRUE) AS facilities,
+        {_estimate("facility_needs")} AS needs,
+        (SELECT COUNT(*) FROM programs WHERE is_active = TRUE) AS programs,
+        {_estimate("users")} AS users
+"""
+
+
+def _load_kpis(approximate):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(_APPROXIMATE_KPIS if approximate else _EXACT_KPIS)
+        facilities, needs, programs, users = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    return {
+        "facilities": facilities,
+        "needs": needs,
+        "programs": programs,
+        "users": users,
+        "approximate": approximate,
+    }
+
+
+def get_kpis(approximate=None):
+    """
+    All headline metrics from one query, cached for KPI_CACHE_TTL seconds
+    and shared across admin sessions.
+    """
+    if approximate is None:
+        approximate = config.KPI_APPROXIMATE_COUNTS
+    return _kpi_cache.get_or_load(("kpis", approximate), lambda: _load_kpis(approximate))
+
+
+# ---------------- OUTCOME KPIs ----------------
+def _load_outcomes(top):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COALESCE(SUM(professionals_placed), 0),
+                   COALESCE(SUM(health_workers_trained), 0),
+                   COALESCE(SUM(new_services), 0)
+            FROM state_kpi_rollup
+        """)
+        placed, trained, new_services = cur.fetchone()
+
+        cur.execute("""
+            SELECT state, facilities, professionals_placed, health_workers_trained, new_services
+            FROM state_kpi_rollup
+            ORDER BY state
+        """)
+        states = cur.fetchall()
+
+        cur.execute("""
+            SELECT f.facility_name, r.state, r.professionals_placed,
+                   r.health_workers_trained, r.new_services
+            FROM facility_kpi_rollup r
+            JOIN facilities f ON f.id = r.facility_id
+            WHERE r.professionals_placed + r.health_workers_trained + r.new_services > 0
+            ORDER BY r.professionals_placed + r.health_workers_trained + r.new_services DESC
+            LIMIT %s
+        """, (top,))
+        facilities = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    return {
+        "placed": placed,
+        "trained": trained,
+        "new_services": new_services,
+        "states": states,
+        "facilities": facilities,
+    }
+
+
+def get_outcomes(top=15):
+    """
+    Placement, training and new-service totals plus per-state rows and the
+    top facilities, read from the trigger-maintained rollup tables.
+    """
+    return _kpi_cache.get_or_load(("outcomes", top), lambda: _load_outcomes(top))
+
+
+# ---------------- FEEDBACK ----------------
+def _load_feedback():
+    sums = ", ".join(f"r.{d}_sum, r.{d}_count" for d in FEEDBACK_DIMENSIONS)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT COALESCE(p.name, '(No programme)'), r.period, r.responses, {sums}
+            FROM program_feedback_rollup r
+            LEFT JOIN programs p ON p.id = r.program_id
+            WHERE r.responses > 0
+            ORDER BY 1, r.period
+        """)
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    def averages(totals):
+        return {
+            d: totals[2 * i + 1] / totals[2 * i + 2] if totals[2 * i + 2] else None
+            for i, d in enumerate(FEEDBACK_DIMENSIONS)
+        }
+
+    overall = [0] * (1 + 2 * len(FEEDBACK_DIMENSIONS))
+    programs = {}
+    periods = []
+    for program, period, *counts in rows:
+        totals = programs.setdefault(program, [0] * len(counts))
+        for i, value in enumerate(counts):
+            totals[i] += value
+            overall[i] += value
+        periods.append({"program": program, "period": period, "responses": counts[0], **averages(counts)})
+
+    return {
+        "responses": overall[0],
+        "overall": averages(overall),
+        "programs": [
+            {"program": program, "responses": totals[0], **averages(totals)}
+            for program, totals in programs.items()
+        ],
+        "periods": periods,
+    }
+
+
+def get_feedback_summary():
+    """
+    Feedback averages overall, per programme and per programme-month, from
+    the running sums in program_feedback_rollup. Averages are None for a
+    dimension nobody rated.
+    """
+    return _kpi_cache.get_or_load(("feedback",), _load_feedback)
+
+
+# ---------------- USERS / DOCUMENTS GRIDS ----------------
+FACILITIES_GRID = GridSpec(
+    columns=(
+        ("Facility Code", "facility_code"),
+        ("Facility Name", "facility_name"),
+        ("State", "state"),
+    ),
+    source="facilities",
+    key="id",
+    sortable={
+        "Facility Name": "COALESCE(facility_name, '')",
+        "Facility Code": "COALESCE(facility_code, '')",
+        "State": "COALESCE(state, '')",
+    },
+    default_sort="Facility Name",
+    filterable=("Facility Name", "Facility Code", "State"),
+    tables=("facilities",),
+)
+
+USERS_GRID = GridSpec(
+    columns=(
+        ("Username", "username"),
+        ("Full Name", "full_name"),
+        ("Role", "role"),
+        ("Country", "country"),
+    ),
+    source="users",
+    where="role IN ('individual', 'association')",
+    key="id",
+    sortable={
+        "Username": "username",
+        "Full Name": "COALESCE(full_name, '')",
+        "Country": "COALESCE(country, '')",
+    },
+    default_sort="Username",
+    filterable=("Username", "Full Name", "Role", "Country"),
+    tables=("users",),
+)
+
+DOCUMENTS_GRID = GridSpec(
+    columns=(
+        ("ID", "d.id"),
+        ("Full Name", "u.full_name"),
+        ("Document Type", "d.document_type"),
+        ("Document Name", "d.document_name"),
+        ("Size", "pg_size_pretty(d.size_bytes)"),
+        ("File Type", "d.mime_type"),
+        ("Renew License", "d.renew_license"),
+        ("Not Registered in Nigeria", "d.not_registered_nigeria"),
+        ("Additional Files", "(SELECT COUNT(*) FROM additional_document_files a WHERE a.user_document_id = d.id)"),
+        ("Additional Size", "(SELECT pg_size_pretty(SUM(a.size_bytes)) FROM additional_document_files a "
+                            "WHERE a.user_document_id = d.id)"),
+        ("Uploaded At", "d.uploaded_at"),
+    ),
+    source="user_documents d JOIN users u ON d.user_id = u.id",
+    key="d.id",
+    sortable={
+        "Uploaded At": "COALESCE(d.uploaded_at, 'epoch'::timestamp)",
+        "Full Name": "COALESCE(u.full_name, '')",
+    },
+    default_sort="Uploaded At",
+    default_descending=True,
+    filterable=("Full Name", "Document Type", "Document Name"),
+    tables=("user_documents", "users", "additional_document_files"),
+)
+
+
+def get_document(document_id):
+    """
+    Metadata for one uploaded document, or None: {"name", "path",
+    "mime_type", "size_bytes"}. Doesn't touch the file itself.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COALESCE(document_name, license_number, 'document'),
+                   COALESCE(document_path, file_path),
+                   mime_type,
+                   size_bytes
+            FROM user_documents
+            WHERE id = %s
+        """, (document_id,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    if row is None:
+        return None
+    name, path, mime_type, size_bytes = row
+    return {"name": name, "path": path, "mime_type": mime_type, "size_bytes": size_bytes}
+
+
+def get_additional_files(document_id):
+    """
+    The additional qualification files uploaded with a document, in upload
+    order: [{"name", "path", "mime_type", "size_bytes", "sha256"}].
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT file_name, storage_path, mime_type, size_bytes, content_sha256
+            FROM additional_document_files
+            WHERE user_document_id = %s
+            ORDER BY position
+        """, (document_id,))
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    return [
+        {"name": name, "path": path, "mime_type": mime_type, "size_bytes": size_bytes, "sha256": sha256}
+        for name, path, mime_type, size_bytes, sha256 in rows
+    ]
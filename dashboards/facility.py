@@ -0,0 +1,209 @@
+# dashboards/facility.py
+import csv
+import io
+
+import config
+from database.cache import TTLCache
+from database.db import get_connection
+from database.program_types import classify_need
+
+
+_needs_cache = TTLCache("facility_needs", config.FACILITY_NEEDS_CACHE_TTL)
+
+# The edit window is judged by the database clock, in the same time zone
+# CURRENT_TIMESTAMP used when created_at was filled in
+_EDITABLE = "created_at > LOCALTIMESTAMP - make_interval(hours => %(window)s)"
+
+
+def _load_needs(facility_id):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT id, need, number, program_type, created_at,
+                   COALESCE({_EDITABLE}, FALSE) AS editable
+            FROM facility_needs
+            WHERE facility_id = %(facility_id)s
+            ORDER BY created_at DESC, id DESC
+        """, {"facility_id": facility_id, "window": config.NEED_EDIT_WINDOW_HOURS})
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_facility_needs(facility_id):
+    """
+    The facility's needs, newest first: [(id, need, number, program_type,
+    created_at, editable)]. One query serves both the View and Manage
+    sections; cached until the TTL expires or the facility changes a need.
+    """
+    return _needs_cache.get_or_load(facility_id, lambda: _load_needs(facility_id))
+
+
+def invalidate_facility_needs(*facility_ids):
+    for facility_id in facility_ids:
+        _needs_cache.invalidate(facility_id)
+
+
+# ---------------- CHANGES ----------------
+def _write(sql, params, facility_id):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, {**params, "facility_id": facility_id, "window": config.NEED_EDIT_WINDOW_HOURS})
+        changed = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    invalidate_facility_needs(facility_id)
+    return changed > 0
+
+
+def add_need(facility_id, need, number):
+    """Register a new need, classified into a programme type."""
+    _write("""
+        INSERT INTO facility_needs (facility_id, need, number, program_type)
+        VALUES (%(facility_id)s, %(need)s, %(number)s, %(program_type)s)
+    """, {"need": need, "number": number, "program_type": classify_need(need)}, facility_id)
+
+
+def update_need(facility_id, need_id, need, number):
+    """
+    Change a need that is still inside its edit window. Returns False when
+    the window has closed (or the need is gone) and nothing was changed.
+    """
+    return _write(f"""
+        UPDATE facility_needs
+        SET need = %(need)s, number = %(number)s, program_type = %(program_type)s
+        WHERE id = %(need_id)s AND facility_id = %(facility_id)s AND {_EDITABLE}
+    """, {"need_id": need_id, "need": need, "number": number, "program_type": classify_need(need)},
+        facility_id)
+
+
+def delete_need(facility_id, need_id):
+    """Same as update_need() for deleting a need."""
+    return _write(f"""
+        DELETE FROM facility_needs
+        WHERE id = %(need_id)s AND facility_id = %(facility_id)s AND {_EDITABLE}
+    """, {"need_id": need_id}, facility_id)
+
+
+# ---------------- BULK IMPORT ----------------
+IMPORT_TEMPLATE = "need,number\nPaediatric nurse training,20\nDialysis service support,1\n"
+
+_MAX_NUMBER = 2 ** 31 - 1
+
+
+def _normalize_need(text):
+    return " ".join(text.split())
+
+
+def _check_row(row, need_col, number_col):
+    """(need, number) for a valid CSV row, or raise ValueError with the reason."""
+    need = _normalize_need(row[need_col]) if need_col < len(row) else ""
+    if not need:
+        raise ValueError("need is empty")
+    raw_number = row[number_col].strip() if number_col is not None and number_col < len(row) else ""
+    if not raw_number:
+        return need, 1
+    try:
+        number = int(raw_number)
+    except ValueError:
+        raise ValueError(f"number {raw_number!r} is not a whole number") from None
+    if not 1 <= number <= _MAX_NUMBER:
+        raise ValueError(f"number {number} is out of range")
+    return need, number
+
+
+def _copy_chunk(cur, chunk):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(chunk)
+    buf.seek(0)
+    cur.copy_expert(
+        "COPY need_import (line, need, number, program_type) FROM STDIN WITH (FORMAT csv)", buf
+    )
+
+
+def import_needs(facility_id, fileobj):
+    """
+    Register every need in a CSV upload (columns need and, optionally,
+    number) in one transaction. Rows are validated and classified while the
+    file is read, and staged with COPY in NEED_IMPORT_CHUNK_ROWS pieces, so
+    memory stays flat however long the file is. A single INSERT ... SELECT
+    then adds the first occurrence of each need the facility does not
+    already have (case and spacing ignored).
+
+    Returns {"rows", "accepted", "duplicates", "rejected", "rejected_rows"};
+    rejected_rows holds (line, reason) for the first NEED_IMPORT_REPORT_ROWS
+    bad rows. Raises ValueError when the file has no need column.
+    """
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        return _import(facility_id, csv.reader(text))
+    finally:
+        text.detach()   # leave the upload open for the caller
+
+
+def _import(facility_id, reader):
+    header = [name.strip().lower() for name in next(reader, [])]
+    if "need" not in header:
+        raise ValueError("The CSV must have a header row with a 'need' column.")
+    need_col = header.index("need")
+    number_col = header.index("number") if "number" in header else None
+
+    result = {"rows": 0, "accepted": 0, "duplicates": 0, "rejected": 0, "rejected_rows": []}
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TEMP TABLE need_import (
+                line INT, need TEXT, number INT, program_type TEXT
+            ) ON COMMIT DROP
+        """)
+        chunk = []
+        for row in reader:
+            if not any(field.strip() for field in row):
+                continue
+            result["rows"] += 1
+            try:
+                need, number = _check_row(row, need_col, number_col)
+            except ValueError as e:
+                result["rejected"] += 1
+                if len(result["rejected_rows"]) < config.NEED_IMPORT_REPORT_ROWS:
+                    result["rejected_rows"].append((reader.line_num, str(e)))
+                continue
+            chunk.append((reader.line_num, need, number, classify_need(need)))
+            if len(chunk) >= config.NEED_IMPORT_CHUNK_ROWS:
+                _copy_chunk(cur, chunk)
+                chunk = []
+        if chunk:
+            _copy_chunk(cur, chunk)
+
+        cur.execute("""
+            INSERT INTO facility_needs (facility_id, need, number, program_type)
+            SELECT %(facility_id)s, need, number, program_type
+            FROM (
+                SELECT DISTINCT ON (lower(need)) line, need, number, program_type
+                FROM need_import
+                ORDER BY lower(need), line
+            ) first_seen
+            WHERE NOT EXISTS (
+                SELECT 1 FROM facility_needs n
+                WHERE n.facility_id = %(facility_id)s
+                  AND lower(regexp_replace(btrim(n.need), '[[:space:]]+', ' ', 'g')) = lower(first_seen.need)
+            )
+            ORDER BY line
+        """, {"facility_id": facility_id})
+        result["accepted"] = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    result["duplicates"] = result["rows"] - result["rejected"] - result["accepted"]
+    invalidate_facility_needs(facility_id)
+    return result
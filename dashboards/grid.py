@@ -0,0 +1,71 @@
+# dashboards/grid.py
+import pandas as pd
+import streamlit as st
+
+import config
+from database.pagination import fetch_page
+
+
+def render_grid(spec, key, page_size=None):
+    """
+    Show one page of a GridSpec with sort, filter and First / Previous /
+    Next controls. Only the current page is queried and sent to the
+    browser. Returns the page's rows so callers can act on them.
+    """
+    page_size = page_size or config.GRID_PAGE_SIZE
+    sortable = list(spec.sortable)
+
+    col1, col2, col3, col4 = st.columns([2, 1, 2, 3])
+    sort = col1.selectbox("Sort by", sortable, index=sortable.index(spec.default_sort), key=f"{key}_sort")
+    descending = col2.toggle("Descending", value=spec.default_descending, key=f"{key}_desc")
+    filters = {}
+    if spec.filterable:
+        filter_label = col3.selectbox("Filter on", spec.filterable, key=f"{key}_filter_on")
+        filter_text = col4.text_input("Contains", key=f"{key}_filter").strip()
+        if filter_text:
+            filters[filter_label] = filter_text
+
+    view = (sort, descending, tuple(filters.items()))
+    rows, next_cursor = fetch_page(spec, sort, descending, page_cursor(key, view), filters, page_size)
+
+    if rows:
+        st.dataframe(pd.DataFrame(rows, columns=spec.labels), use_container_width=True, hide_index=True)
+    else:
+        st.info("No rows match." if filters else "No rows yet.")
+
+    page_controls(key, next_cursor, page_size)
+    return rows
+
+
+# ---------------- KEYSET PAGER ----------------
+def page_cursor(key, view):
+    """
+    Cursor for the page to show under key. The cursors of the pages
+    visited so far are kept in the session; a different view (sort,
+    filters) starts over at page 1.
+    """
+    state = st.session_state.setdefault(f"{key}_pages", {"view": None, "cursors": [None]})
+    if state["view"] != view:
+        state["view"] = view
+        state["cursors"] = [None]
+    return state["cursors"][-1]
+
+
+def page_controls(key, next_cursor, page_size, scope="app"):
+    """
+    First / Previous / Next buttons for a list paged with page_cursor().
+    Inside an st.fragment pass scope="fragment" so paging reruns only it.
+    """
+    state = st.session_state[f"{key}_pages"]
+    page = len(state["cursors"])
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 3])
+    if nav1.button("⏮ First", key=f"{key}_first", disabled=page == 1):
+        state["cursors"] = [None]
+        st.rerun(scope=scope)
+    if nav2.button("◀ Previous", key=f"{key}_prev", disabled=page == 1):
+        state["cursors"].pop()
+        st.rerun(scope=scope)
+    if nav3.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+        state["cursors"].append(next_cursor)
+        st.rerun(scope=scope)
+    nav4.caption(f"Page {page} · {page_size} rows per page")
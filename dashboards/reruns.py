@@ -0,0 +1,49 @@
+# dashboards/reruns.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+
+_TIMINGS = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed_run(name):
+    """
+    Time one execution of a page or fragment and remember it under name.
+    Runs that end in st.rerun() or st.stop() are counted too, up to the
+    point where they stopped.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            runs = _TIMINGS.setdefault(name, deque(maxlen=config.RERUN_TIMING_SAMPLES))
+            runs.append(elapsed_ms)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def rerun_stats():
+    """Recent run times per page / fragment, for the admin Overview."""
+    with _lock:
+        snapshot = {name: sorted(runs) for name, runs in _TIMINGS.items()}
+    return [
+        {
+            "run": name,
+            "samples": len(runs),
+            "p50_ms": round(_percentile(runs, 0.5), 1),
+            "p95_ms": round(_percentile(runs, 0.95), 1),
+            "max_ms": round(runs[-1], 1),
+        }
+        for name, runs in sorted(snapshot.items())
+        if runs
+    ]
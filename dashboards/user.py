@@ -0,0 +1,71 @@
+# dashboards/user.py
+import config
+from database.cache import TTLCache
+from database.db import get_connection
+
+
+_overview_cache = TTLCache("user_overview", config.USER_DASHBOARD_CACHE_TTL)
+
+
+def _load_overview(user_id):
+    """Approved, pending and training rows for one user in a single query."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT kind, facility_name, detail, status
+            FROM (
+                SELECT 'approved' AS kind, f.facility_name, n.need AS detail, NULL AS status,
+                       1 AS section, f.facility_name AS sort_key
+                FROM facility_needs n
+                JOIN user_interests ui ON n.id = ui.need_id
+                JOIN facilities f ON n.facility_id = f.id
+                WHERE ui.user_id = %(user_id)s AND ui.status = 'Approved'
+
+                UNION ALL
+
+                SELECT DISTINCT 'pending', f.facility_name, NULL, NULL, 2, f.facility_name
+                FROM facility_needs n
+                JOIN user_interests ui ON n.id = ui.need_id
+                JOIN facilities f ON n.facility_id = f.id
+                WHERE ui.user_id = %(user_id)s AND ui.status = 'Pending'
+
+                UNION ALL
+
+                SELECT 'training', NULL, ui.training_title, ui.training_status, 3, ui.training_status
+                FROM user_interests ui
+                JOIN facility_needs n ON ui.need_id = n.id
+                WHERE ui.user_id = %(user_id)s
+                  AND n.program_type = 'Training'
+                  AND ui.status = 'Approved'
+            ) overview
+            ORDER BY section, sort_key
+        """, {"user_id": user_id})
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    overview = {"approved": [], "pending": [], "training": []}
+    for kind, facility_name, detail, status in rows:
+        if kind == "approved":
+            overview["approved"].append((facility_name, detail))
+        elif kind == "pending":
+            overview["pending"].append(facility_name)
+        else:
+            overview["training"].append((detail, status))
+    return overview
+
+
+def get_user_overview(user_id):
+    """
+    The user's Dashboard Overview data: {"approved": [(facility, need)],
+    "pending": [facility], "training": [(title, status)]}. Cached until the
+    TTL expires or an admin approval invalidates it.
+    """
+    return _overview_cache.get_or_load(user_id, lambda: _load_overview(user_id))
+
+
+def invalidate_user_overview(*user_ids):
+    for user_id in user_ids:
+        _overview_cache.invalidate(user_id)
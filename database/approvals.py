@@ -0,0 +1,137 @@
+# database/approvals.py
+from database.db import get_connection
+
+
+# ---------------- PENDING LISTS ----------------
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _page(sql, params, page_size):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params + [page_size + 1])
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    if len(rows) > page_size:
+        return rows[:page_size], rows[page_size - 1]
+    return rows, None
+
+
+def pending_interests(facility=None, state=None, after=None, page_size=50):
+    """
+    One page of Pending user_interests, oldest first:
+    ([(id, full_name, facility_name, state, need, created_at)], next_cursor).
+    facility matches anywhere in the facility name; after is the cursor
+    returned for the previous page.
+    """
+    conditions, params = ["ui.status = 'Pending'"], []
+    if facility:
+        conditions.append("f.facility_name ILIKE %s")
+        params.append(_like_pattern(facility))
+    if state:
+        conditions.append("f.state = %s")
+        params.append(state)
+    if after is not None:
+        conditions.append("ui.id > %s")
+        params.append(after)
+
+    rows, last = _page(f"""
+        SELECT ui.id, u.full_name, f.facility_name, f.state, n.need, ui.created_at
+        FROM user_interests ui
+        JOIN users u ON ui.user_id = u.id
+        JOIN facility_needs n ON ui.need_id = n.id
+        JOIN facilities f ON n.facility_id = f.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY ui.id
+        LIMIT %s
+    """, params, page_size)
+    return rows, last[0] if last else None
+
+
+def pending_matches(facility=None, state=None, min_score=None, after=None, page_size=50):
+    """
+    One page of Pending user_assignments, best score first:
+    ([(user_id, full_name, facility_name, state, need, score, assigned_at)], next_cursor).
+    """
+    conditions, params = ["ua.status = 'Pending'"], []
+    if facility:
+        conditions.append("f.facility_name ILIKE %s")
+        params.append(_like_pattern(facility))
+    if state:
+        conditions.append("f.state = %s")
+        params.append(state)
+    if min_score:
+        conditions.append("COALESCE(ua.score, 0) >= %s")
+        params.append(min_score)
+    if after is not None:
+        conditions.append("(COALESCE(ua.score, 0), ua.user_id) < (%s, %s)")
+        params.extend(after)
+
+    rows, last = _page(f"""
+        SELECT ua.user_id, u.full_name, f.facility_name, f.state, n.need, ua.score, ua.assigned_at
+        FROM user_assignments ua
+        JOIN users u ON ua.user_id = u.id
+        JOIN facilities f ON ua.facility_id = f.id
+        LEFT JOIN facility_needs n ON ua.need_id = n.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY COALESCE(ua.score, 0) DESC, ua.user_id DESC
+        LIMIT %s
+    """, params, page_size)
+    return rows, (last[5] or 0, last[0]) if last else None
+
+
+def facility_states():
+    """Distinct facility states, for the approval filters."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT DISTINCT state FROM facilities WHERE state IS NOT NULL ORDER BY state")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ---------------- BATCH DECISIONS ----------------
+def _decide(sql, ids, status):
+    if not ids:
+        return 0, []
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, (status, list(ids)))
+        rows = cur.fetchall()
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return len(rows), sorted({row[0] for row in rows})
+
+
+def decide_interests(interest_ids, status):
+    """
+    Set many Pending interests to status ('Approved' or 'Rejected') in one
+    UPDATE. Rows decided meanwhile by another admin are left alone.
+    Returns (rows changed, ids of the users affected).
+    """
+    return _decide("""
+        UPDATE user_interests
+        SET status = %s
+        WHERE id = ANY(%s) AND status = 'Pending'
+        RETURNING user_id
+    """, interest_ids, status)
+
+
+def decide_matches(user_ids, status):
+    """Same as decide_interests() for Pending system matches, by user id."""
+    return _decide("""
+        UPDATE user_assignments
+        SET status = %s
+        WHERE user_id = ANY(%s) AND status = 'Pending'
+        RETURNING user_id
+    """, user_ids, status)
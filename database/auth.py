@@ -1,39 +1,7 @@
 import psycopg2
-import bcrypt
 import uuid
 from psycopg2.extras import RealDictCursor
 
-def authenticate_facility(facility_code, password):
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute("""
-        SELECT id, facility_name, facility_code, password_hash
-        FROM facilities
-        WHERE facility_code = %s
-    """, (facility_code,))
-
-    facility = cur.fetchone()
-    cur.close()
-    conn.close()
-
-    if not facility:
-        return None
-
-    if not facility["password_hash"]:
-        return None
-
-    valid = bcrypt.checkpw(
-        password.encode(),
-        facility["password_hash"].encode()
-    )
-
-    if valid:
-        return facility
-
-    return None
-
-
 # utils.py
 
 def generate_verification_token():
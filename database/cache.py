@@ -0,0 +1,99 @@
+# database/cache.py
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Small thread-safe cache shared by every session in the process.
+
+    Entries expire after ttl seconds or when invalidated explicitly by the
+    code paths that change the underlying rows. A load that was running
+    when its key was invalidated is returned to its caller but not stored,
+    since it may have read the rows from before the change. Hit/miss
+    counters are kept so the admin Overview can show whether caching is
+    paying off.
+    """
+
+    def __init__(self, name, ttl, max_entries=10000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        # key -> [loads in flight, generation]; invalidate() bumps the
+        # generation, and clear() bumps _epoch for every key
+        self._loading = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        CACHES[name] = self
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            started = (self._epoch, loading[1])
+
+        try:
+            value = loader()
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if loading[0] == 0:
+                    del self._loading[key]
+        with self._lock:
+            if started == (self._epoch, loading[1]):
+                if len(self._data) >= self.max_entries:
+                    self._evict(now)
+                self._data[key] = (now + self.ttl, value)
+        return value
+
+    def _evict(self, now):
+        expired = [k for k, (expires, _) in self._data.items() if expires <= now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.max_entries:
+            # Still full: drop the entries closest to expiry
+            for k, _ in sorted(self._data.items(), key=lambda kv: kv[1][0])[: len(self._data) // 10 + 1]:
+                del self._data[k]
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._loading:
+                self._loading[key][1] += 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl,
+            }
+
+
+CACHES = {}
+
+
+def cache_stats():
+    return [cache.stats() for cache in CACHES.values()]
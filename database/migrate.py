@@ -0,0 +1,149 @@
+# database/migrate.py
+import os
+import re
+import sys
+import threading
+
+from database.db import get_connection
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+# Arbitrary constant so concurrent app processes don't migrate at the same time
+MIGRATION_LOCK_ID = 7_301_002
+
+_schema_checked = False
+_schema_lock = threading.Lock()
+
+
+# ---------------- DISCOVERY ----------------
+def available_migrations():
+    """Return [(version, name, path)] for every migration file, in order."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort()
+
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers in database/migrations")
+    return migrations
+
+
+def latest_version():
+    migrations = available_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(cur):
+    cur.execute("SELECT to_regclass('public.schema_migrations')")
+    if cur.fetchone()[0] is None:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cur.fetchone()[0]
+
+
+# ---------------- APPLY ----------------
+def apply_migrations(verbose=False):
+    """Apply every pending migration, each in its own transaction."""
+    conn = get_connection()
+    cur = conn.cursor()
+    applied = []
+
+    try:
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        done = current_version(cur)
+        for version, name, path in available_migrations():
+            if version <= done:
+                continue
+            with open(path, encoding="utf-8") as f:
+                sql = f.read()
+            try:
+                cur.execute(sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append((version, name))
+            if verbose:
+                print(f"Applied {version:04d}_{name}")
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    return applied
+
+
+def ensure_schema(auto_apply=True):
+    """
+    Cheap startup check, done once per process.
+
+    Compares the highest applied version with the newest migration file and
+    only runs DDL when the database is behind.
+    """
+    global _schema_checked
+    if _schema_checked:
+        return
+
+    with _schema_lock:
+        if _schema_checked:
+            return
+
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            behind = current_version(cur) < latest_version()
+        finally:
+            cur.close()
+            conn.close()
+
+        if behind:
+            if not auto_apply:
+                raise RuntimeError("Database schema is out of date. Run: python -m database.migrate up")
+            apply_migrations()
+
+        _schema_checked = True
+
+
+# ---------------- CLI ----------------
+def main(argv):
+    command = argv[0] if argv else "status"
+
+    if command == "up":
+        applied = apply_migrations(verbose=True)
+        print(f"✅ {len(applied)} migration(s) applied." if applied else "✅ Schema already up to date.")
+    elif command == "status":
+        conn = get_connection()
+        cur = conn.cursor()
+        done = current_version(cur)
+        cur.close()
+        conn.close()
+        for version, name, _ in available_migrations():
+            mark = "x" if version <= done else " "
+            print(f"[{mark}] {version:04d}_{name}")
+    else:
+        print("Usage: python -m database.migrate [status|up]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
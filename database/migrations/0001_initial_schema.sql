@@ -0,0 +1,125 @@
+-- 0001_initial_schema.sql
+-- Baseline PostgreSQL schema used by the portal. Everything is IF NOT EXISTS
+-- so this is a no-op against databases created before migrations existed.
+
+-- ---------------- USERS ----------------
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    full_name TEXT,
+    association_name TEXT,
+    facility_name TEXT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    country TEXT,
+    role TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    cadre TEXT,
+    specialization TEXT,
+    status TEXT DEFAULT 'active',
+    is_verified BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS verification_tokens (
+    token TEXT PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_password_reset (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    token TEXT NOT NULL,
+    expiry TIMESTAMP NOT NULL
+);
+
+-- ---------------- PROGRAMS ----------------
+CREATE TABLE IF NOT EXISTS programs (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    active BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS interests (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES users(id),
+    program_id INT REFERENCES programs(id),
+    period TEXT DEFAULT '',
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS program_feedback (
+    id SERIAL PRIMARY KEY,
+    program_id INT REFERENCES programs(id),
+    user_id INT REFERENCES users(id),
+    content_quality INT,
+    trainer_effectiveness INT,
+    relevance_to_practice INT,
+    organisation_logistics INT,
+    overall_satisfaction INT,
+    comments TEXT,
+    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ---------------- FACILITIES ----------------
+CREATE TABLE IF NOT EXISTS facilities (
+    id SERIAL PRIMARY KEY,
+    facility_code TEXT UNIQUE,
+    facility_name TEXT NOT NULL,
+    state TEXT,
+    password_hash TEXT,
+    is_registered BOOLEAN DEFAULT FALSE,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS facility_needs (
+    id SERIAL PRIMARY KEY,
+    facility_id INT REFERENCES facilities(id) ON DELETE CASCADE,
+    need TEXT NOT NULL,
+    number INT DEFAULT 1,
+    program_type TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ---------------- MATCHING / APPROVALS ----------------
+CREATE TABLE IF NOT EXISTS user_interests (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    need_id INT REFERENCES facility_needs(id) ON DELETE CASCADE,
+    status TEXT DEFAULT 'Pending',
+    training_title TEXT,
+    training_status TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_assignments (
+    user_id INT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    facility_id INT REFERENCES facilities(id) ON DELETE CASCADE,
+    score INT,
+    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT DEFAULT 'Pending'
+);
+
+-- ---------------- DOCUMENTS ----------------
+CREATE TABLE IF NOT EXISTS user_documents (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    license_number TEXT,
+    file_path TEXT,
+    document_type TEXT,
+    document_name TEXT,
+    document_path TEXT,
+    renew_license BOOLEAN DEFAULT FALSE,
+    not_registered_nigeria BOOLEAN DEFAULT FALSE,
+    additional_files TEXT[],
+    uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, license_number)
+);
+
+CREATE TABLE IF NOT EXISTS association_documents (
+    user_id INT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    additional_files TEXT[],
+    temp_license BOOLEAN DEFAULT FALSE,
+    uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,8 @@
+-- 0002_assignment_need.sql
+-- Matching now works at the level of individual needs, so remember which
+-- need an assignment was made for.
+
+ALTER TABLE user_assignments
+    ADD COLUMN IF NOT EXISTS need_id INT REFERENCES facility_needs(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_user_assignments_need ON user_assignments (need_id);
@@ -0,0 +1,31 @@
+-- 0003_change_watermarks.sql
+-- Track when users and facility needs last changed so matching can re-score
+-- only what moved since its previous run.
+
+CREATE OR REPLACE FUNCTION nidah_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now();
+ALTER TABLE facility_needs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT now();
+
+DROP TRIGGER IF EXISTS users_touch_updated_at ON users;
+CREATE TRIGGER users_touch_updated_at
+    BEFORE UPDATE OF specialization, role, status ON users
+    FOR EACH ROW EXECUTE FUNCTION nidah_touch_updated_at();
+
+DROP TRIGGER IF EXISTS facility_needs_touch_updated_at ON facility_needs;
+CREATE TRIGGER facility_needs_touch_updated_at
+    BEFORE UPDATE OF need, number, facility_id ON facility_needs
+    FOR EACH ROW EXECUTE FUNCTION nidah_touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users (updated_at);
+CREATE INDEX IF NOT EXISTS idx_facility_needs_updated_at ON facility_needs (updated_at);
+
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    name TEXT PRIMARY KEY,
+    value TIMESTAMP NOT NULL
+);
@@ -0,0 +1,44 @@
+-- 0004_job_queue.sql
+-- Postgres-backed job queue for work that should not run inside a
+-- Streamlit rerun, plus recurring schedules that feed it.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',        -- queued, running, done, failed
+    priority INT NOT NULL DEFAULT 0,
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    run_at TIMESTAMP NOT NULL DEFAULT now(),
+    locked_by TEXT,
+    locked_at TIMESTAMP,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    result JSONB,
+    last_error TEXT,
+    created_by TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs (priority DESC, run_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs (locked_at) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at DESC);
+
+CREATE TABLE IF NOT EXISTS job_schedules (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    interval_seconds INT NOT NULL,
+    next_run_at TIMESTAMP NOT NULL DEFAULT now(),
+    enabled BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+INSERT INTO job_schedules (name, kind, interval_seconds, next_run_at) VALUES
+    ('nightly_token_purge', 'purge_tokens', 86400, date_trunc('day', now()) + interval '1 day 2 hours'),
+    ('hourly_need_classification', 'classify_needs', 3600, now())
+ON CONFLICT (name) DO NOTHING;
+
+-- purge_tokens expires verification tokens by age
+ALTER TABLE verification_tokens ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT now();
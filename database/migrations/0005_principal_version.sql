@@ -0,0 +1,29 @@
+-- 0005_principal_version.sql
+-- Bumped whenever something a signed-in session relies on changes (role,
+-- status, password, registration), so cached principals can be revoked.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS principal_version INT NOT NULL DEFAULT 1;
+ALTER TABLE facilities ADD COLUMN IF NOT EXISTS principal_version INT NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION nidah_bump_principal_version() RETURNS trigger AS $$
+BEGIN
+    NEW.principal_version := OLD.principal_version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_bump_principal_version ON users;
+CREATE TRIGGER users_bump_principal_version
+    BEFORE UPDATE OF role, status, password_hash, username ON users
+    FOR EACH ROW
+    WHEN ((OLD.role, OLD.status, OLD.password_hash, OLD.username)
+          IS DISTINCT FROM (NEW.role, NEW.status, NEW.password_hash, NEW.username))
+    EXECUTE FUNCTION nidah_bump_principal_version();
+
+DROP TRIGGER IF EXISTS facilities_bump_principal_version ON facilities;
+CREATE TRIGGER facilities_bump_principal_version
+    BEFORE UPDATE OF is_registered, is_active, password_hash, facility_code ON facilities
+    FOR EACH ROW
+    WHEN ((OLD.is_registered, OLD.is_active, OLD.password_hash, OLD.facility_code)
+          IS DISTINCT FROM (NEW.is_registered, NEW.is_active, NEW.password_hash, NEW.facility_code))
+    EXECUTE FUNCTION nidah_bump_principal_version();
@@ -0,0 +1,5 @@
+-- 0006_programs_is_active.sql
+-- The app counts active programmes with programs.is_active; make sure the
+-- column exists next to the older "active" flag from the baseline schema.
+
+ALTER TABLE programs ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE;
@@ -0,0 +1,194 @@
+-- 0007_kpi_rollups.sql
+-- Per-facility and per-state KPI rollups for the admin Overview, kept up to
+-- date by triggers so the charts read a few hundred rows instead of
+-- scanning user_assignments, user_interests and facility_needs.
+
+CREATE INDEX IF NOT EXISTS idx_user_assignments_facility_status ON user_assignments (facility_id, status);
+CREATE INDEX IF NOT EXISTS idx_user_interests_need ON user_interests (need_id);
+CREATE INDEX IF NOT EXISTS idx_facility_needs_facility ON facility_needs (facility_id);
+
+-- ---------------- LIVE DEFINITIONS ----------------
+-- The single source of truth for what each KPI means. Rollups are refreshed
+-- from these views and checked against them.
+CREATE OR REPLACE VIEW facility_kpi_live AS
+SELECT
+    f.id AS facility_id,
+    COALESCE(f.state, 'Unknown') AS state,
+    (SELECT COUNT(*) FROM user_assignments ua
+      WHERE ua.facility_id = f.id AND ua.status = 'Approved') AS professionals_placed,
+    (SELECT COUNT(*) FROM user_interests ui
+       JOIN facility_needs n ON n.id = ui.need_id
+      WHERE n.facility_id = f.id AND ui.status = 'Approved'
+        AND ui.training_status = 'Done') AS health_workers_trained,
+    (SELECT COUNT(*) FROM facility_needs n
+      WHERE n.facility_id = f.id AND n.program_type = 'Services'
+        AND (EXISTS (SELECT 1 FROM user_interests ui WHERE ui.need_id = n.id AND ui.status = 'Approved')
+          OR EXISTS (SELECT 1 FROM user_assignments ua WHERE ua.need_id = n.id AND ua.status = 'Approved'))
+    ) AS new_services,
+    (SELECT COUNT(*) FROM facility_needs n WHERE n.facility_id = f.id) AS needs_submitted
+FROM facilities f;
+
+-- ---------------- ROLLUP TABLES ----------------
+CREATE TABLE IF NOT EXISTS facility_kpi_rollup (
+    facility_id INT PRIMARY KEY REFERENCES facilities(id) ON DELETE CASCADE,
+    state TEXT NOT NULL,
+    professionals_placed INT NOT NULL DEFAULT 0,
+    health_workers_trained INT NOT NULL DEFAULT 0,
+    new_services INT NOT NULL DEFAULT 0,
+    needs_submitted INT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_facility_kpi_rollup_state ON facility_kpi_rollup (state);
+
+CREATE TABLE IF NOT EXISTS state_kpi_rollup (
+    state TEXT PRIMARY KEY,
+    facilities INT NOT NULL DEFAULT 0,
+    professionals_placed INT NOT NULL DEFAULT 0,
+    health_workers_trained INT NOT NULL DEFAULT 0,
+    new_services INT NOT NULL DEFAULT 0,
+    needs_submitted INT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- ---------------- REFRESH ----------------
+-- Each refresh first locks the rollup row it rewrites, then recomputes it
+-- in a new statement, so concurrent writers to the same facility or state
+-- queue up and the last one sees everything committed before it.
+CREATE OR REPLACE FUNCTION nidah_refresh_state_rollup(p_state TEXT) RETURNS void AS $$
+BEGIN
+    IF p_state IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO state_kpi_rollup (state) VALUES (p_state) ON CONFLICT (state) DO NOTHING;
+    PERFORM 1 FROM state_kpi_rollup WHERE state = p_state FOR UPDATE;
+
+    UPDATE state_kpi_rollup s
+    SET facilities = agg.facilities,
+        professionals_placed = agg.professionals_placed,
+        health_workers_trained = agg.health_workers_trained,
+        new_services = agg.new_services,
+        needs_submitted = agg.needs_submitted,
+        refreshed_at = now()
+    FROM (
+        SELECT COUNT(*) AS facilities,
+               COALESCE(SUM(professionals_placed), 0) AS professionals_placed,
+               COALESCE(SUM(health_workers_trained), 0) AS health_workers_trained,
+               COALESCE(SUM(new_services), 0) AS new_services,
+               COALESCE(SUM(needs_submitted), 0) AS needs_submitted
+        FROM facility_kpi_rollup
+        WHERE state = p_state
+    ) agg
+    WHERE s.state = p_state;
+
+    DELETE FROM state_kpi_rollup WHERE state = p_state AND facilities = 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_refresh_facility_rollup(p_facility_id INT) RETURNS void AS $$
+DECLARE
+    old_state TEXT;
+    new_state TEXT;
+BEGIN
+    IF p_facility_id IS NULL OR NOT EXISTS (SELECT 1 FROM facilities WHERE id = p_facility_id) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO facility_kpi_rollup (facility_id, state) VALUES (p_facility_id, 'Unknown')
+    ON CONFLICT (facility_id) DO NOTHING;
+    SELECT state INTO old_state FROM facility_kpi_rollup WHERE facility_id = p_facility_id FOR UPDATE;
+
+    UPDATE facility_kpi_rollup r
+    SET state = l.state,
+        professionals_placed = l.professionals_placed,
+        health_workers_trained = l.health_workers_trained,
+        new_services = l.new_services,
+        needs_submitted = l.needs_submitted,
+        refreshed_at = now()
+    FROM facility_kpi_live l
+    WHERE l.facility_id = p_facility_id AND r.facility_id = p_facility_id
+    RETURNING r.state INTO new_state;
+
+    PERFORM nidah_refresh_state_rollup(new_state);
+    IF old_state IS DISTINCT FROM new_state THEN
+        PERFORM nidah_refresh_state_rollup(old_state);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- TRIGGERS ----------------
+CREATE OR REPLACE FUNCTION nidah_rollup_on_assignment() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM nidah_refresh_facility_rollup(OLD.facility_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.facility_id IS DISTINCT FROM OLD.facility_id) THEN
+        PERFORM nidah_refresh_facility_rollup(NEW.facility_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_rollup_on_interest() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM nidah_refresh_facility_rollup((SELECT facility_id FROM facility_needs WHERE id = OLD.need_id));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.need_id IS DISTINCT FROM OLD.need_id) THEN
+        PERFORM nidah_refresh_facility_rollup((SELECT facility_id FROM facility_needs WHERE id = NEW.need_id));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_rollup_on_need() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM nidah_refresh_facility_rollup(OLD.facility_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.facility_id IS DISTINCT FROM OLD.facility_id) THEN
+        PERFORM nidah_refresh_facility_rollup(NEW.facility_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_rollup_on_facility() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        -- The rollup row goes with the facility (ON DELETE CASCADE)
+        PERFORM nidah_refresh_state_rollup(COALESCE(OLD.state, 'Unknown'));
+    ELSE
+        PERFORM nidah_refresh_facility_rollup(NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_assignments_kpi_rollup ON user_assignments;
+CREATE TRIGGER user_assignments_kpi_rollup
+    AFTER INSERT OR UPDATE OF status, facility_id, need_id OR DELETE ON user_assignments
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_assignment();
+
+DROP TRIGGER IF EXISTS user_interests_kpi_rollup ON user_interests;
+CREATE TRIGGER user_interests_kpi_rollup
+    AFTER INSERT OR UPDATE OF status, training_status, need_id OR DELETE ON user_interests
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_interest();
+
+DROP TRIGGER IF EXISTS facility_needs_kpi_rollup ON facility_needs;
+CREATE TRIGGER facility_needs_kpi_rollup
+    AFTER INSERT OR UPDATE OF facility_id, program_type OR DELETE ON facility_needs
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_need();
+
+DROP TRIGGER IF EXISTS facilities_kpi_rollup ON facilities;
+CREATE TRIGGER facilities_kpi_rollup
+    AFTER INSERT OR UPDATE OF state OR DELETE ON facilities
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_facility();
+
+-- ---------------- INITIAL BUILD ----------------
+SELECT nidah_refresh_facility_rollup(id) FROM facilities;
+
+INSERT INTO job_schedules (name, kind, interval_seconds, next_run_at) VALUES
+    ('nightly_kpi_rollup_check', 'check_kpi_rollups', 86400, date_trunc('day', now()) + interval '1 day 3 hours')
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,110 @@
+-- 0008_feedback_rollups.sql
+-- Running sums and counts of every program_feedback rating, per programme
+-- and per month, so feedback analytics read O(programmes x months) rows
+-- instead of averaging the whole table on each Overview render.
+-- program_id 0 collects feedback not linked to a programme; period
+-- 1970-01-01 collects feedback without a submitted_at.
+
+CREATE OR REPLACE VIEW program_feedback_live AS
+SELECT
+    COALESCE(program_id, 0) AS program_id,
+    date_trunc('month', COALESCE(submitted_at, 'epoch'::timestamp))::date AS period,
+    COUNT(*) AS responses,
+    COALESCE(SUM(content_quality), 0) AS content_quality_sum,
+    COUNT(content_quality) AS content_quality_count,
+    COALESCE(SUM(trainer_effectiveness), 0) AS trainer_effectiveness_sum,
+    COUNT(trainer_effectiveness) AS trainer_effectiveness_count,
+    COALESCE(SUM(relevance_to_practice), 0) AS relevance_to_practice_sum,
+    COUNT(relevance_to_practice) AS relevance_to_practice_count,
+    COALESCE(SUM(organisation_logistics), 0) AS organisation_logistics_sum,
+    COUNT(organisation_logistics) AS organisation_logistics_count,
+    COALESCE(SUM(overall_satisfaction), 0) AS overall_satisfaction_sum,
+    COUNT(overall_satisfaction) AS overall_satisfaction_count
+FROM program_feedback
+GROUP BY 1, 2;
+
+CREATE TABLE IF NOT EXISTS program_feedback_rollup (
+    program_id INT NOT NULL,
+    period DATE NOT NULL,
+    responses INT NOT NULL DEFAULT 0,
+    content_quality_sum BIGINT NOT NULL DEFAULT 0,
+    content_quality_count INT NOT NULL DEFAULT 0,
+    trainer_effectiveness_sum BIGINT NOT NULL DEFAULT 0,
+    trainer_effectiveness_count INT NOT NULL DEFAULT 0,
+    relevance_to_practice_sum BIGINT NOT NULL DEFAULT 0,
+    relevance_to_practice_count INT NOT NULL DEFAULT 0,
+    organisation_logistics_sum BIGINT NOT NULL DEFAULT 0,
+    organisation_logistics_count INT NOT NULL DEFAULT 0,
+    overall_satisfaction_sum BIGINT NOT NULL DEFAULT 0,
+    overall_satisfaction_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (program_id, period)
+);
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one feedback row. The upsert is a
+-- single atomic increment, so concurrent submissions never lose counts.
+CREATE OR REPLACE FUNCTION nidah_feedback_apply(f program_feedback, p_sign INT) RETURNS void AS $$
+BEGIN
+    INSERT INTO program_feedback_rollup AS r (
+        program_id, period, responses,
+        content_quality_sum, content_quality_count,
+        trainer_effectiveness_sum, trainer_effectiveness_count,
+        relevance_to_practice_sum, relevance_to_practice_count,
+        organisation_logistics_sum, organisation_logistics_count,
+        overall_satisfaction_sum, overall_satisfaction_count
+    )
+    VALUES (
+        COALESCE(f.program_id, 0),
+        date_trunc('month', COALESCE(f.submitted_at, 'epoch'::timestamp))::date,
+        p_sign,
+        p_sign * COALESCE(f.content_quality, 0), p_sign * (f.content_quality IS NOT NULL)::int,
+        p_sign * COALESCE(f.trainer_effectiveness, 0), p_sign * (f.trainer_effectiveness IS NOT NULL)::int,
+        p_sign * COALESCE(f.relevance_to_practice, 0), p_sign * (f.relevance_to_practice IS NOT NULL)::int,
+        p_sign * COALESCE(f.organisation_logistics, 0), p_sign * (f.organisation_logistics IS NOT NULL)::int,
+        p_sign * COALESCE(f.overall_satisfaction, 0), p_sign * (f.overall_satisfaction IS NOT NULL)::int
+    )
+    ON CONFLICT (program_id, period) DO UPDATE SET
+        responses = r.responses + EXCLUDED.responses,
+        content_quality_sum = r.content_quality_sum + EXCLUDED.content_quality_sum,
+        content_quality_count = r.content_quality_count + EXCLUDED.content_quality_count,
+        trainer_effectiveness_sum = r.trainer_effectiveness_sum + EXCLUDED.trainer_effectiveness_sum,
+        trainer_effectiveness_count = r.trainer_effectiveness_count + EXCLUDED.trainer_effectiveness_count,
+        relevance_to_practice_sum = r.relevance_to_practice_sum + EXCLUDED.relevance_to_practice_sum,
+        relevance_to_practice_count = r.relevance_to_practice_count + EXCLUDED.relevance_to_practice_count,
+        organisation_logistics_sum = r.organisation_logistics_sum + EXCLUDED.organisation_logistics_sum,
+        organisation_logistics_count = r.organisation_logistics_count + EXCLUDED.organisation_logistics_count,
+        overall_satisfaction_sum = r.overall_satisfaction_sum + EXCLUDED.overall_satisfaction_sum,
+        overall_satisfaction_count = r.overall_satisfaction_count + EXCLUDED.overall_satisfaction_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_rollup_on_feedback() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM nidah_feedback_apply(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM nidah_feedback_apply(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS program_feedback_rollup ON program_feedback;
+CREATE TRIGGER program_feedback_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON program_feedback
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_feedback();
+
+-- ---------------- INITIAL BUILD ----------------
+DELETE FROM program_feedback_rollup;
+INSERT INTO program_feedback_rollup
+SELECT program_id, period, responses,
+       content_quality_sum, content_quality_count,
+       trainer_effectiveness_sum, trainer_effectiveness_count,
+       relevance_to_practice_sum, relevance_to_practice_count,
+       organisation_logistics_sum, organisation_logistics_count,
+       overall_satisfaction_sum, overall_satisfaction_count
+FROM program_feedback_live;
+
+INSERT INTO job_schedules (name, kind, interval_seconds, next_run_at) VALUES
+    ('nightly_feedback_rollup_check', 'check_feedback_rollups', 86400, date_trunc('day', now()) + interval '1 day 3 hours 15 minutes')
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,12 @@
+-- 0009_grid_indexes.sql
+-- Indexes matching the default (sort expression, key) of each paged grid,
+-- so keyset pagination is an index range scan at any depth. Expressions
+-- must stay identical to the sortable entries in the GridSpecs.
+
+CREATE INDEX IF NOT EXISTS idx_facilities_grid_name ON facilities ((COALESCE(facility_name, '')), id);
+CREATE INDEX IF NOT EXISTS idx_users_grid_username ON users (username, id);
+CREATE INDEX IF NOT EXISTS idx_facility_needs_grid_created ON facility_needs ((COALESCE(created_at, 'epoch'::timestamp)), id);
+CREATE INDEX IF NOT EXISTS idx_user_assignments_grid_assigned ON user_assignments ((COALESCE(assigned_at, 'epoch'::timestamp)), user_id);
+CREATE INDEX IF NOT EXISTS idx_user_documents_grid_uploaded ON user_documents ((COALESCE(uploaded_at, 'epoch'::timestamp)), id);
+CREATE INDEX IF NOT EXISTS idx_program_feedback_grid_submitted ON program_feedback ((COALESCE(submitted_at, 'epoch'::timestamp)), id);
+CREATE INDEX IF NOT EXISTS idx_programs_grid_name ON programs (name, id);
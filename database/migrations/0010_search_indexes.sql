@@ -0,0 +1,17 @@
+-- 0010_search_indexes.sql
+-- Trigram indexes for the admin Users search (database/search.py). Both
+-- substring (ILIKE '%...%') and fuzzy word-similarity (<%) lookups use
+-- them. The indexed expressions must match USER_SEARCH_TEXT and
+-- FACILITY_SEARCH_TEXT exactly.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_users_search_trgm ON users USING gin (
+    (COALESCE(username, '') || ' ' || COALESCE(full_name, '') || ' ' ||
+     COALESCE(email, '') || ' ' || COALESCE(country, '')) gin_trgm_ops
+);
+
+CREATE INDEX IF NOT EXISTS idx_facilities_search_trgm ON facilities USING gin (
+    (COALESCE(facility_code, '') || ' ' || COALESCE(facility_name, '') || ' ' ||
+     COALESCE(state, '')) gin_trgm_ops
+);
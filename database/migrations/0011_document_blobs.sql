@@ -0,0 +1,18 @@
+-- 0011_document_blobs.sql
+-- Content-addressed document store (storage/documents.py). Each distinct
+-- file is kept once, keyed by its SHA-256; upload_count records how many
+-- uploads resolved to it so the space saved by deduplication is known.
+
+CREATE TABLE IF NOT EXISTS document_blobs (
+    sha256 CHAR(64) PRIMARY KEY,
+    size_bytes BIGINT NOT NULL,
+    mime_type TEXT,
+    storage_path TEXT NOT NULL,
+    upload_count INT NOT NULL DEFAULT 1,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    last_uploaded_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+ALTER TABLE user_documents ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64) REFERENCES document_blobs(sha256);
+ALTER TABLE user_documents ADD COLUMN IF NOT EXISTS size_bytes BIGINT;
+ALTER TABLE user_documents ADD COLUMN IF NOT EXISTS mime_type TEXT;
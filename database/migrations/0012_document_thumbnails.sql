@@ -0,0 +1,15 @@
+-- 0012_document_thumbnails.sql
+-- Preview thumbnails for stored documents, generated by background jobs.
+-- thumbnail_status: pending, ready, unsupported (e.g. PDF) or failed.
+
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS thumbnail_status TEXT NOT NULL DEFAULT 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_document_blobs_thumbnail_pending
+    ON document_blobs (created_at) WHERE thumbnail_status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_user_documents_sha256 ON user_documents (content_sha256);
+
+-- Catch-up for uploads whose job was lost or that predate thumbnails
+INSERT INTO job_schedules (name, kind, interval_seconds, next_run_at) VALUES
+    ('hourly_document_thumbnails', 'document_thumbnails', 3600, now())
+ON CONFLICT (name) DO NOTHING;
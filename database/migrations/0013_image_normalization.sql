@@ -0,0 +1,11 @@
+-- 0013_image_normalization.sql
+-- Normalized image uploads remember the upload they came from, so the
+-- same photo uploaded again is not decoded twice and the bytes saved can
+-- be reported. Kept originals (IMAGE_KEEP_ORIGINAL) are stored as blobs
+-- with upload_count 0 and thumbnail_status 'original'.
+
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS original_sha256 CHAR(64);
+ALTER TABLE document_blobs ADD COLUMN IF NOT EXISTS original_size_bytes BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_document_blobs_original ON document_blobs (original_sha256)
+    WHERE original_sha256 IS NOT NULL;
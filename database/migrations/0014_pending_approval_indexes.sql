@@ -0,0 +1,11 @@
+-- 0014_pending_approval_indexes.sql
+-- Partial indexes matching the paged pending lists on the Approvals page
+-- (database/approvals.py), so each page is read straight off an index
+-- however many rows have already been decided.
+
+CREATE INDEX IF NOT EXISTS idx_user_interests_pending ON user_interests (id)
+    WHERE status = 'Pending';
+
+CREATE INDEX IF NOT EXISTS idx_user_assignments_pending_score
+    ON user_assignments ((COALESCE(score, 0)) DESC, user_id DESC)
+    WHERE status = 'Pending';
@@ -0,0 +1,11 @@
+-- 0015_facility_needs_by_facility.sql
+-- A facility's needs are read newest first (dashboards/facility.py), so
+-- index them in that order; facilities with thousands of needs are then
+-- served by one index range scan with no sort. The composite index also
+-- covers every plain facility_id lookup, so the single-column one from
+-- 0007 is dropped.
+
+CREATE INDEX IF NOT EXISTS idx_facility_needs_facility_created
+    ON facility_needs (facility_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_facility_needs_facility;
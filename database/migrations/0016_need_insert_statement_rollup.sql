@@ -0,0 +1,25 @@
+-- 0016_need_insert_statement_rollup.sql
+-- A bulk import adds thousands of needs for one facility in a single
+-- INSERT. With the row trigger from 0007 that refreshed the facility's KPI
+-- rollup once per row, each refresh recounting every need; inserts now
+-- refresh each affected facility once per statement instead. Updates and
+-- deletes keep the row trigger.
+
+CREATE OR REPLACE FUNCTION nidah_rollup_on_need_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM nidah_refresh_facility_rollup(facility_id)
+    FROM (SELECT DISTINCT facility_id FROM inserted_needs) f;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS facility_needs_kpi_rollup ON facility_needs;
+CREATE TRIGGER facility_needs_kpi_rollup
+    AFTER UPDATE OF facility_id, program_type OR DELETE ON facility_needs
+    FOR EACH ROW EXECUTE FUNCTION nidah_rollup_on_need();
+
+DROP TRIGGER IF EXISTS facility_needs_kpi_rollup_insert ON facility_needs;
+CREATE TRIGGER facility_needs_kpi_rollup_insert
+    AFTER INSERT ON facility_needs
+    REFERENCING NEW TABLE AS inserted_needs
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_need_insert();
@@ -0,0 +1,189 @@
+-- 0017_statement_kpi_triggers.sql
+-- The KPI rollup triggers from 0007 refreshed a facility for every row
+-- written, recounting it through facility_kpi_live and re-locking its
+-- state row each time, even for Pending rows that no KPI counts. A full
+-- matching run wrote 20k assignments that way. The triggers are now
+-- statement-level: each one reads its transition tables, keeps only the
+-- rows that can move a KPI, and refreshes every affected facility once.
+-- Rollup rows are locked in facility / state order so concurrent batches
+-- queue behind each other instead of deadlocking.
+
+-- ---------------- BATCH REFRESH ----------------
+CREATE OR REPLACE FUNCTION nidah_refresh_facility_rollups(p_facility_ids INT[]) RETURNS void AS $$
+DECLARE
+    touched_states TEXT[];
+    s TEXT;
+BEGIN
+    p_facility_ids := ARRAY(
+        SELECT DISTINCT f.id FROM facilities f WHERE f.id = ANY(p_facility_ids) ORDER BY f.id
+    );
+    IF cardinality(p_facility_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO facility_kpi_rollup (facility_id, state)
+    SELECT id, 'Unknown' FROM unnest(p_facility_ids) id
+    ORDER BY id
+    ON CONFLICT (facility_id) DO NOTHING;
+
+    PERFORM 1 FROM facility_kpi_rollup
+    WHERE facility_id = ANY(p_facility_ids)
+    ORDER BY facility_id
+    FOR UPDATE;
+    touched_states := ARRAY(
+        SELECT state FROM facility_kpi_rollup WHERE facility_id = ANY(p_facility_ids)
+    );
+
+    UPDATE facility_kpi_rollup r
+    SET state = l.state,
+        professionals_placed = l.professionals_placed,
+        health_workers_trained = l.health_workers_trained,
+        new_services = l.new_services,
+        needs_submitted = l.needs_submitted,
+        refreshed_at = now()
+    FROM facility_kpi_live l
+    WHERE l.facility_id = r.facility_id AND r.facility_id = ANY(p_facility_ids);
+
+    touched_states := touched_states || ARRAY(
+        SELECT state FROM facility_kpi_rollup WHERE facility_id = ANY(p_facility_ids)
+    );
+    FOR s IN SELECT DISTINCT state FROM unnest(touched_states) state ORDER BY state LOOP
+        PERFORM nidah_refresh_state_rollup(s);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION nidah_refresh_facility_rollup(p_facility_id INT) RETURNS void AS $$
+BEGIN
+    PERFORM nidah_refresh_facility_rollups(ARRAY[p_facility_id]);
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- ASSIGNMENTS ----------------
+-- Only Approved assignments count (professionals_placed, new_services)
+CREATE OR REPLACE FUNCTION nidah_rollup_on_assignments() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT r.facility_id FROM new_rows r WHERE r.status = 'Approved'
+            UNION
+            SELECT n.facility_id FROM new_rows r JOIN facility_needs n ON n.id = r.need_id
+            WHERE r.status = 'Approved'
+        ));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT r.facility_id FROM old_rows r WHERE r.status = 'Approved'
+            UNION
+            SELECT n.facility_id FROM old_rows r JOIN facility_needs n ON n.id = r.need_id
+            WHERE r.status = 'Approved'
+        ));
+    ELSE
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            WITH changed AS (
+                SELECT o.facility_id AS old_facility, o.need_id AS old_need,
+                       r.facility_id AS new_facility, r.need_id AS new_need
+                FROM old_rows o
+                JOIN new_rows r ON r.user_id = o.user_id
+                WHERE (o.status = 'Approved' OR r.status = 'Approved')
+                  AND (o.status, o.facility_id, o.need_id) IS DISTINCT FROM (r.status, r.facility_id, r.need_id)
+            )
+            SELECT old_facility FROM changed
+            UNION SELECT new_facility FROM changed
+            UNION SELECT n.facility_id FROM changed c JOIN facility_needs n ON n.id IN (c.old_need, c.new_need)
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- INTERESTS ----------------
+-- Only Approved interests count (health_workers_trained, new_services)
+CREATE OR REPLACE FUNCTION nidah_rollup_on_interests() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT n.facility_id FROM new_rows r JOIN facility_needs n ON n.id = r.need_id
+            WHERE r.status = 'Approved'
+        ));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT n.facility_id FROM old_rows r JOIN facility_needs n ON n.id = r.need_id
+            WHERE r.status = 'Approved'
+        ));
+    ELSE
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT n.facility_id
+            FROM old_rows o
+            JOIN new_rows r ON r.id = o.id
+            JOIN facility_needs n ON n.id IN (o.need_id, r.need_id)
+            WHERE (o.status = 'Approved' OR r.status = 'Approved')
+              AND (o.status, o.training_status, o.need_id)
+                  IS DISTINCT FROM (r.status, r.training_status, r.need_id)
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- NEEDS ----------------
+-- Every need counts towards needs_submitted
+CREATE OR REPLACE FUNCTION nidah_rollup_on_needs() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(SELECT facility_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM nidah_refresh_facility_rollups(ARRAY(SELECT facility_id FROM old_rows));
+    ELSE
+        PERFORM nidah_refresh_facility_rollups(ARRAY(
+            SELECT unnest(ARRAY[o.facility_id, r.facility_id])
+            FROM old_rows o
+            JOIN new_rows r ON r.id = o.id
+            WHERE (o.facility_id, o.program_type) IS DISTINCT FROM (r.facility_id, r.program_type)
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- TRIGGERS ----------------
+-- Transition tables allow one event per trigger and no column lists, so
+-- each table gets an insert, update and delete trigger; the functions
+-- filter out updates that leave the counted columns alone.
+DROP TRIGGER IF EXISTS user_assignments_kpi_rollup ON user_assignments;
+CREATE TRIGGER user_assignments_kpi_rollup_insert
+    AFTER INSERT ON user_assignments REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_assignments();
+CREATE TRIGGER user_assignments_kpi_rollup_update
+    AFTER UPDATE ON user_assignments REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_assignments();
+CREATE TRIGGER user_assignments_kpi_rollup_delete
+    AFTER DELETE ON user_assignments REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_assignments();
+
+DROP TRIGGER IF EXISTS user_interests_kpi_rollup ON user_interests;
+CREATE TRIGGER user_interests_kpi_rollup_insert
+    AFTER INSERT ON user_interests REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_interests();
+CREATE TRIGGER user_interests_kpi_rollup_update
+    AFTER UPDATE ON user_interests REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_interests();
+CREATE TRIGGER user_interests_kpi_rollup_delete
+    AFTER DELETE ON user_interests REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_interests();
+
+DROP TRIGGER IF EXISTS facility_needs_kpi_rollup ON facility_needs;
+DROP TRIGGER IF EXISTS facility_needs_kpi_rollup_insert ON facility_needs;
+CREATE TRIGGER facility_needs_kpi_rollup_insert
+    AFTER INSERT ON facility_needs REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_needs();
+CREATE TRIGGER facility_needs_kpi_rollup_update
+    AFTER UPDATE ON facility_needs REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_needs();
+CREATE TRIGGER facility_needs_kpi_rollup_delete
+    AFTER DELETE ON facility_needs REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION nidah_rollup_on_needs();
+
+DROP FUNCTION IF EXISTS nidah_rollup_on_assignment();
+DROP FUNCTION IF EXISTS nidah_rollup_on_interest();
+DROP FUNCTION IF EXISTS nidah_rollup_on_need();
+DROP FUNCTION IF EXISTS nidah_rollup_on_need_insert();
@@ -0,0 +1,44 @@
+-- 0018_additional_document_files.sql
+-- Additional qualification files are stored content-addressed like the
+-- licence, but user_documents / association_documents only kept their
+-- paths in a TEXT[]. Each file now gets a row with the same metadata the
+-- licence has, so the Documents page can list, size and verify them.
+
+CREATE TABLE IF NOT EXISTS additional_document_files (
+    id SERIAL PRIMARY KEY,
+    user_document_id INT REFERENCES user_documents(id) ON DELETE CASCADE,
+    association_user_id INT REFERENCES association_documents(user_id) ON DELETE CASCADE,
+    position INT NOT NULL,
+    file_name TEXT NOT NULL,
+    storage_path TEXT NOT NULL,
+    content_sha256 CHAR(64) REFERENCES document_blobs(sha256),
+    size_bytes BIGINT,
+    mime_type TEXT,
+    uploaded_at TIMESTAMP NOT NULL DEFAULT now(),
+    CHECK (num_nonnulls(user_document_id, association_user_id) = 1)
+);
+
+CREATE INDEX IF NOT EXISTS idx_additional_document_files_document
+    ON additional_document_files (user_document_id, position) WHERE user_document_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_additional_document_files_association
+    ON additional_document_files (association_user_id, position) WHERE association_user_id IS NOT NULL;
+
+-- Existing uploads: every path that is a stored blob (the admin form's
+-- additional_files are typed names, not files, and are left alone)
+INSERT INTO additional_document_files
+    (user_document_id, position, file_name, storage_path, content_sha256, size_bytes, mime_type, uploaded_at)
+SELECT d.id, f.position, 'Additional file ' || f.position, f.path, b.sha256, b.size_bytes, b.mime_type,
+       COALESCE(d.uploaded_at, now())
+FROM user_documents d
+CROSS JOIN LATERAL unnest(d.additional_files) WITH ORDINALITY AS f(path, position)
+JOIN document_blobs b ON b.storage_path = f.path
+WHERE NOT EXISTS (SELECT 1 FROM additional_document_files a WHERE a.user_document_id = d.id);
+
+INSERT INTO additional_document_files
+    (association_user_id, position, file_name, storage_path, content_sha256, size_bytes, mime_type, uploaded_at)
+SELECT d.user_id, f.position, 'Additional file ' || f.position, f.path, b.sha256, b.size_bytes, b.mime_type,
+       COALESCE(d.uploaded_at, now())
+FROM association_documents d
+CROSS JOIN LATERAL unnest(d.additional_files) WITH ORDINALITY AS f(path, position)
+JOIN document_blobs b ON b.storage_path = f.path
+WHERE NOT EXISTS (SELECT 1 FROM additional_document_files a WHERE a.association_user_id = d.user_id);
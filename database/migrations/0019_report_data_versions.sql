@@ -0,0 +1,67 @@
+-- 0019_report_data_versions.sql
+-- Cached Excel workbooks were keyed on pg_stat_user_tables counters. Those
+-- are not transactional, lag behind commits and go back to zero on a stats
+-- reset or failover, so an old key could come back and serve a stale file.
+-- Every write statement on a report table now appends a row here; a
+-- table's version is the sum of its weights. The row only becomes visible
+-- when the writing transaction commits, and appending never waits on
+-- another writer the way bumping a shared counter row would.
+
+CREATE TABLE IF NOT EXISTS data_changes (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    weight BIGINT NOT NULL DEFAULT 1,
+    changed_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_data_changes_table ON data_changes (table_name);
+
+CREATE OR REPLACE FUNCTION nidah_note_data_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO data_changes (table_name) VALUES (TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------- TRIGGERS ----------------
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'users', 'facilities', 'facility_needs', 'user_assignments', 'user_documents',
+        'additional_document_files', 'programs', 'interests', 'program_feedback'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t || '_data_change', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION nidah_note_data_change()',
+            t || '_data_change', t
+        );
+    END LOOP;
+END;
+$$;
+
+-- ---------------- COMPACTION ----------------
+-- Folds older rows into one per table. The sums, and so the versions,
+-- are unchanged.
+CREATE OR REPLACE FUNCTION nidah_compact_data_changes(p_older_than INTERVAL) RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    WITH gone AS (
+        DELETE FROM data_changes
+        WHERE changed_at < now() - p_older_than
+        RETURNING table_name, weight
+    ), merged AS (
+        INSERT INTO data_changes (table_name, weight)
+        SELECT table_name, SUM(weight) FROM gone GROUP BY table_name
+    )
+    SELECT COUNT(*) INTO folded FROM gone;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO job_schedules (name, kind, interval_seconds, next_run_at) VALUES
+    ('hourly_data_change_compaction', 'compact_data_changes', 3600, now())
+ON CONFLICT (name) DO NOTHING;
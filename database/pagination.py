@@ -0,0 +1,101 @@
+# database/pagination.py
+from dataclasses import dataclass, field
+
+from database.db import get_connection
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    """
+    A table the admin pages can page through without loading it whole.
+
+    columns are (label, SQL expression) pairs selected FROM source. key must
+    be unique and non-null; it breaks ties so keyset pagination never skips
+    or repeats a row. sortable maps a label to a non-null sort expression
+    (wrap nullable columns in COALESCE); filterable lists labels that can be
+    searched with "contains".
+    """
+    columns: tuple
+    source: str
+    key: str
+    sortable: dict
+    default_sort: str
+    default_descending: bool = False
+    filterable: tuple = ()
+    where: str = ""
+    tables: tuple = field(default=())   # tables read, for data versioning
+
+    @property
+    def labels(self):
+        return [label for label, _ in self.columns]
+
+    def _select(self):
+        return ", ".join(f'{expr} AS "{label}"' for label, expr in self.columns)
+
+    def select_sql(self, sort=None, descending=None):
+        """The whole table as one ordered query (for exports)."""
+        sort_expr = self.sortable[sort or self.default_sort]
+        direction = "DESC" if (self.default_descending if descending is None else descending) else "ASC"
+        where = f"WHERE {self.where}" if self.where else ""
+        return f"""
+            SELECT {self._select()}
+            FROM {self.source}
+            {where}
+            ORDER BY {sort_expr} {direction}, {self.key} {direction}
+        """
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def fetch_page(spec, sort=None, descending=None, after=None, filters=None, page_size=50):
+    """
+    One page of rows ordered by sort, starting after the cursor returned
+    for the previous page. Returns (rows, next_cursor); next_cursor is None
+    on the last page.
+
+    The query seeks straight to the cursor with a row comparison on
+    (sort expression, key), so every page costs the same however deep it is.
+    filters is {label: text}, matched case-insensitively anywhere in the
+    column.
+    """
+    sort = sort or spec.default_sort
+    descending = spec.default_descending if descending is None else descending
+    sort_expr = spec.sortable[sort]
+    direction = "DESC" if descending else "ASC"
+    expressions = dict(spec.columns)
+
+    conditions, params = [], []
+    if spec.where:
+        conditions.append(f"({spec.where})")
+    for label, text in (filters or {}).items():
+        if text and label in spec.filterable:
+            conditions.append(f"({expressions[label]})::text ILIKE %s")
+            params.append(_like_pattern(text))
+    if after is not None:
+        conditions.append(f"({sort_expr}, {spec.key}) {'<' if descending else '>'} (%s, %s)")
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT {spec._select()}, {sort_expr} AS _sort, {spec.key} AS _key
+            FROM {spec.source}
+            {where}
+            ORDER BY _sort {direction}, _key {direction}
+            LIMIT %s
+        """, params + [page_size + 1])
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = rows[-1][-2:]
+    return [row[:-2] for row in rows], next_cursor
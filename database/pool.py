@@ -0,0 +1,272 @@
+# database/pool.py
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+import config
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Process-wide pool shared by every Streamlit session.
+
+    Keeps up to maxconn connections open: a returned connection stays idle
+    in the pool for the next caller (most recently used first) and is only
+    closed once it has been idle for idle_timeout seconds, never below
+    minconn. A semaphore makes callers wait for a free connection instead of
+    failing, connections idle for a while are pinged before being handed
+    out, and connections always come back in a clean (rolled back) state.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, healthcheck_after, idle_timeout, **connect_kwargs):
+        self._connect_kwargs = connect_kwargs
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._idle = []     # [(conn, returned_at)], most recently returned last
+        self._open = 0
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_after = healthcheck_after
+        self.idle_timeout = idle_timeout
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "healthchecks": 0,
+            "opened": 0,
+            "closed_idle": 0,
+            "discarded": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "wait_seconds": 0.0,
+        }
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._lock:
+            self._open += 1
+            self._stats["opened"] += 1
+        return conn
+
+    def _close(self, conn, reason):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._lock:
+            self._open -= 1
+            self._stats[reason] += 1
+
+    # ---------------- CHECKOUT / RETURN ----------------
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout(f"No database connection free after {self.timeout}s")
+
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+            self._stats["wait_seconds"] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn):
+        discard = conn.closed != 0
+        if not discard:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        try:
+            if discard:
+                self._close(conn, "discarded")
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            self._close_expired()
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def _close_expired(self):
+        """Close connections idle past idle_timeout, keeping minconn open."""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            # Oldest first; the pool hands out the most recent ones
+            while self._idle and self._idle[0][1] < cutoff and self._open - len(expired) > self.minconn:
+                expired.append(self._idle.pop(0)[0])
+        for conn in expired:
+            self._close(conn, "closed_idle")
+
+    def _checkout_healthy(self):
+        # A failed ping closes the dead connection and we try the next idle
+        # one; once the idle list is empty a fresh connection is opened.
+        while True:
+            with self._lock:
+                conn, returned_at = self._idle.pop() if self._idle else (None, None)
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn, returned_at):
+                return conn
+            self._close(conn, "discarded")
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.healthcheck_after:
+            return True
+
+        with self._lock:
+            self._stats["healthchecks"] += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    # ---------------- STATS ----------------
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["min_size"] = self.minconn
+        stats["max_size"] = self.maxconn
+        return stats
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn, "closed_idle")
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled psycopg2 connection.
+
+    Behaves like the connection itself, except that close() hands it back to
+    the pool instead of tearing down the socket, so existing
+    ``conn = get_connection() ... conn.close()`` code is pooled for free.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rollback()
+        self.close()
+        return False
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for code paths that return early without closing
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+# ---------------- PROCESS-WIDE POOL ----------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    config.DB_POOL_MIN,
+                    config.DB_POOL_MAX,
+                    config.DB_POOL_TIMEOUT,
+                    config.DB_POOL_HEALTHCHECK_AFTER,
+                    config.DB_POOL_IDLE_TIMEOUT,
+                    **config.db_connect_kwargs()
+                )
+    return _pool
+
+
+def borrow():
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a connection for the duration of a ``with`` block.
+
+    Rolls back on error; anything not committed by the caller is rolled back
+    when the connection goes back to the pool.
+    """
+    conn = borrow()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@contextmanager
+def cursor(cursor_factory=None, commit=False):
+    """Borrow a connection and yield a cursor, committing on success if asked."""
+    with connection() as conn:
+        cur = conn.cursor(cursor_factory=cursor_factory)
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        finally:
+            cur.close()
+
+
+def pool_stats():
+    if _pool is None:
+        return {}
+    return _pool.stats()
@@ -0,0 +1,117 @@
+# database/program_types.py
+import sys
+
+from psycopg2.extras import execute_values
+
+import config
+from database.db import get_connection
+
+
+BATCH_SIZE = 5000
+
+
+# ---------------- MATCHER ----------------
+def compile_taxonomy(taxonomy):
+    """
+    Compile {program_type: [phrases]} into an ordered tuple of
+    (program_type, phrases) pairs for case-insensitive substring matching,
+    the same rule the old keyword loop used.
+
+    Phrases are lower-cased once and any phrase containing a shorter phrase
+    of the same type is dropped ("clinical training" is already covered by
+    "training"), so each need is scanned as few times as possible.
+    """
+    compiled = []
+    for program_type, phrases in taxonomy.items():
+        phrases = sorted({p.strip().lower() for p in phrases if p and p.strip()}, key=len)
+        kept = []
+        for phrase in phrases:
+            if not any(shorter in phrase for shorter in kept):
+                kept.append(phrase)
+        if kept:
+            compiled.append((program_type, tuple(kept)))
+    return tuple(compiled)
+
+
+_MATCHER = compile_taxonomy(config.PROGRAM_TYPE_TAXONOMY)
+
+
+def classify_need(need_text, matcher=None):
+    """Return the program_type for a need description."""
+    if not need_text:
+        return config.DEFAULT_PROGRAM_TYPE
+
+    need_lower = need_text.lower()
+    for program_type, phrases in matcher or _MATCHER:
+        for phrase in phrases:
+            if phrase in need_lower:
+                return program_type
+    return config.DEFAULT_PROGRAM_TYPE
+
+
+# ---------------- CLASSIFICATION STAGE ----------------
+def classify_needs(need_ids=None, reclassify_all=False):
+    """
+    Classify facility needs in batches and write the results with one
+    UPDATE ... FROM (VALUES ...) per batch.
+
+    By default only unclassified needs (program_type IS NULL) are processed.
+    Pass need_ids to classify specific rows, or reclassify_all=True after a
+    taxonomy change. Rows whose type is unchanged are not rewritten.
+    Returns the number of rows updated.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    updated = 0
+    last_id = 0
+
+    try:
+        while True:
+            if need_ids is not None:
+                cur.execute("""
+                    SELECT id, need FROM facility_needs
+                    WHERE id = ANY(%s) AND id > %s
+                    ORDER BY id LIMIT %s
+                """, (list(need_ids), last_id, BATCH_SIZE))
+            elif reclassify_all:
+                cur.execute("""
+                    SELECT id, need FROM facility_needs
+                    WHERE id > %s
+                    ORDER BY id LIMIT %s
+                """, (last_id, BATCH_SIZE))
+            else:
+                cur.execute("""
+                    SELECT id, need FROM facility_needs
+                    WHERE program_type IS NULL AND id > %s
+                    ORDER BY id LIMIT %s
+                """, (last_id, BATCH_SIZE))
+
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            values = [(need_id, classify_need(need_text)) for need_id, need_text in rows]
+            execute_values(cur, """
+                UPDATE facility_needs AS n
+                SET program_type = v.program_type
+                FROM (VALUES %s) AS v (id, program_type)
+                WHERE n.id = v.id
+                  AND n.program_type IS DISTINCT FROM v.program_type
+            """, values, page_size=BATCH_SIZE)
+            updated += cur.rowcount
+            conn.commit()
+
+            if len(rows) < BATCH_SIZE:
+                break
+    finally:
+        cur.close()
+        conn.close()
+
+    return updated
+
+
+if __name__ == "__main__":
+    # Offline job: python -m database.program_types [--all]
+    count = classify_needs(reclassify_all="--all" in sys.argv[1:])
+    print(f"✅ Program types updated for {count} needs.")
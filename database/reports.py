@@ -0,0 +1,352 @@
+# database/reports.py
+import hashlib
+import os
+import re
+import tempfile
+import time
+import uuid
+
+import config
+from database.db import get_connection
+from database.pagination import GridSpec
+
+
+# ---------------- REPORT DEFINITIONS ----------------
+# Report name -> GridSpec. The same definition drives the paged on-screen
+# grid, the CSV export and the Excel sheet; labels become column headers.
+REPORTS = {
+    "Facility Needs": GridSpec(
+        columns=(
+            ("Facility", "f.facility_name"),
+            ("State", "f.state"),
+            ("Need", "n.need"),
+            ("Number", "n.number"),
+            ("Program Type", "n.program_type"),
+            ("Submitted At", "n.created_at"),
+        ),
+        source="facility_needs n JOIN facilities f ON n.facility_id = f.id",
+        key="n.id",
+        sortable={
+            "Submitted At": "COALESCE(n.created_at, 'epoch'::timestamp)",
+            "Facility": "COALESCE(f.facility_name, '')",
+            "State": "COALESCE(f.state, '')",
+        },
+        default_sort="Submitted At",
+        default_descending=True,
+        filterable=("Facility", "State", "Need", "Program Type"),
+        tables=("facility_needs", "facilities"),
+    ),
+    "User Registrations": GridSpec(
+        columns=(
+            ("Username", "username"),
+            ("Full Name", "full_name"),
+            ("Role", "role"),
+            ("Email", "email"),
+            ("Country", "country"),
+            ("Registered At", "created_at"),
+        ),
+        source="users",
+        key="id",
+        sortable={
+            "Username": "username",
+            "Registered At": "COALESCE(created_at, 'epoch'::timestamp)",
+            "Full Name": "COALESCE(full_name, '')",
+        },
+        default_sort="Username",
+        filterable=("Username", "Full Name", "Role", "Email", "Country"),
+        tables=("users",),
+    ),
+    "Matched Users": GridSpec(
+        columns=(
+            ("User ID", "a.user_id"),
+            ("User Name", "u.full_name"),
+            ("Facility ID", "a.facility_id"),
+            ("Facility Name", "f.facility_name"),
+            ("Need", "n.need"),
+            ("Score", "a.score"),
+            ("Status", "a.status"),
+            ("Matched At", "a.assigned_at"),
+        ),
+        source="""user_assignments a
+            JOIN users u ON a.user_id = u.id
+            JOIN facilities f ON a.facility_id = f.id
+            LEFT JOIN facility_needs n ON a.need_id = n.id""",
+        key="a.user_id",
+        sortable={
+            "Matched At": "COALESCE(a.assigned_at, 'epoch'::timestamp)",
+            "Score": "COALESCE(a.score, 0)",
+            "Facility Name": "COALESCE(f.facility_name, '')",
+        },
+        default_sort="Matched At",
+        default_descending=True,
+        filterable=("User Name", "Facility Name", "Need", "Status"),
+        tables=("user_assignments", "users", "facilities", "facility_needs"),
+    ),
+    "Uploaded Documents": GridSpec(
+        columns=(
+            ("Full Name", "u.full_name"),
+            ("Document Type", "d.document_type"),
+            ("Document Name", "d.document_name"),
+            ("Renew License", "d.renew_license"),
+            ("Not Registered in Nigeria", "d.not_registered_nigeria"),
+            ("Additional Files", "d.additional_files"),
+            ("Uploaded At", "d.uploaded_at"),
+        ),
+        source="user_documents d JOIN users u ON d.user_id = u.id",
+        key="d.id",
+        sortable={
+            "Uploaded At": "COALESCE(d.uploaded_at, 'epoch'::timestamp)",
+            "Full Name": "COALESCE(u.full_name, '')",
+        },
+        default_sort="Uploaded At",
+        default_descending=True,
+        filterable=("Full Name", "Document Type", "Document Name"),
+        tables=("user_documents", "users"),
+    ),
+    "Program Activities": GridSpec(
+        columns=(
+            ("Program Name", "p.name"),
+            ("Description", "p.description"),
+            ("Active", "p.is_active"),
+            ("Participants", "(SELECT COUNT(*) FROM interests i WHERE i.program_id = p.id)"),
+        ),
+        source="programs p",
+        key="p.id",
+        sortable={"Program Name": "p.name"},
+        default_sort="Program Name",
+        filterable=("Program Name", "Description"),
+        tables=("programs", "interests"),
+    ),
+    "Program Feedback": GridSpec(
+        columns=(
+            ("Program", "p.name"),
+            ("Participant", "u.full_name"),
+            ("Content Quality", "f.content_quality"),
+            ("Trainer Effectiveness", "f.trainer_effectiveness"),
+            ("Relevance", "f.relevance_to_practice"),
+            ("Organisation", "f.organisation_logistics"),
+            ("Overall Satisfaction", "f.overall_satisfaction"),
+            ("Comments", "f.comments"),
+            ("Submitted At", "f.submitted_at"),
+        ),
+        source="""program_feedback f
+            JOIN programs p ON f.program_id = p.id
+            JOIN users u ON f.user_id = u.id""",
+        key="f.id",
+        sortable={
+            "Submitted At": "COALESCE(f.submitted_at, 'epoch'::timestamp)",
+            "Program": "p.name",
+        },
+        default_sort="Submitted At",
+        default_descending=True,
+        filterable=("Program", "Participant", "Comments"),
+        tables=("program_feedback", "programs", "users"),
+    ),
+}
+
+# Excel's row limit; longer reports continue on another sheet
+XLSX_MAX_ROWS = 1_048_576
+
+
+def report_filename(report, extension):
+    return f"{_slug(report)}.{extension}"
+
+
+def _slug(report):
+    return re.sub(r"[^a-z0-9]+", "_", report.lower()).strip("_")
+
+
+# ---------------- STREAMING CSV ----------------
+def copy_report_csv(report, out):
+    """
+    Stream a whole report as CSV (with header) into the writable binary
+    file out. PostgreSQL formats the rows and COPY hands them over in small
+    chunks, so memory stays flat however many rows the report has.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.copy_expert(f"COPY ({REPORTS[report].select_sql()}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+    finally:
+        cur.close()
+        conn.close()
+
+
+class _Heartbeat:
+    """
+    Writable wrapper that passes bytes through to out and calls
+    progress(fraction, message) at most every HEARTBEAT_SECONDS, so a job
+    running a long COPY keeps its lease.
+    """
+    HEARTBEAT_SECONDS = 30.0
+
+    def __init__(self, out, progress, label):
+        self.out = out
+        self.progress = progress
+        self.label = label
+        self.written = 0
+        self.last_beat = time.monotonic()
+
+    def write(self, data):
+        self.written += len(data)
+        if time.monotonic() - self.last_beat >= self.HEARTBEAT_SECONDS:
+            self.progress(0.5, f"{self.label}: {self.written / 1e6:,.1f} MB written")
+            self.last_beat = time.monotonic()
+        return self.out.write(data)
+
+
+def export_report_csv(report, progress=None):
+    """
+    Stream a report into a new file under EXPORT_DIR and return its path.
+    Exports older than EXPORT_MAX_AGE are removed first. progress
+    (fraction, message), if given, is called regularly while rows arrive.
+    """
+    os.makedirs(config.EXPORT_DIR, exist_ok=True)
+    purge_exports()
+
+    fd, path = tempfile.mkstemp(prefix=f"{_slug(report)}_", suffix=".csv", dir=config.EXPORT_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            copy_report_csv(report, _Heartbeat(out, progress, f"Exporting {report}") if progress else out)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def purge_exports(max_age=None):
+    """Delete export files older than max_age seconds. Returns how many."""
+    max_age = config.EXPORT_MAX_AGE if max_age is None else max_age
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(config.EXPORT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # Removed by another session
+    return removed
+
+
+# ---------------- EXCEL WORKBOOKS ----------------
+def data_version(reports):
+    """
+    A fingerprint of the tables behind the given reports: per table, the
+    number of committed write statements recorded in data_changes. It only
+    ever grows, so a key built from it never comes back to an older file.
+    """
+    tables = sorted({table for report in reports for table in REPORTS[report].tables})
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT t.name, COALESCE(SUM(c.weight), 0)
+            FROM unnest(%s::text[]) AS t(name)
+            LEFT JOIN data_changes c ON c.table_name = t.name
+            GROUP BY t.name
+            ORDER BY t.name
+        """, (tables,))
+        return tuple(cur.fetchall())
+    finally:
+        cur.close()
+        conn.close()
+
+
+def compact_data_changes(older_than="1 hour"):
+    """Fold data_changes rows older than older_than into one per table. Returns how many."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT nidah_compact_data_changes(%s::interval)", (older_than,))
+        folded = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return folded
+
+
+def _cell(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return value
+
+
+def write_workbook(reports, path, progress=None):
+    """
+    Write the reports into one xlsx, a sheet each. Rows come from a
+    server-side cursor and xlsxwriter's constant_memory mode flushes each
+    row to disk, so memory use doesn't grow with the report. progress
+    (fraction, message), if given, is called per report and every
+    100,000 rows.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "remove_timezone": True,
+        "default_date_format": "yyyy-mm-dd hh:mm",
+    })
+    bold = workbook.add_format({"bold": True})
+    conn = get_connection()
+    try:
+        for done, report in enumerate(reports):
+            if progress:
+                progress(done / len(reports), f"Writing {report}")
+            cur = conn.cursor(name=f"xlsx_{uuid.uuid4().hex}")
+            cur.itersize = 5000
+            cur.execute(REPORTS[report].select_sql())
+
+            sheet, row, part = None, XLSX_MAX_ROWS, 0
+            for written, record in enumerate(cur, 1):
+                if row == XLSX_MAX_ROWS:
+                    part += 1
+                    name = report if part == 1 else f"{report} ({part})"
+                    sheet = workbook.add_worksheet(name[:31])
+                    sheet.write_row(0, 0, [col[0] for col in cur.description], bold)
+                    row = 1
+                sheet.write_row(row, 0, [_cell(value) for value in record])
+                row += 1
+                if progress and written % 100_000 == 0:
+                    progress(done / len(reports), f"Writing {report}: {written:,} rows")
+
+            if sheet is None:
+                # Empty report: still give it a sheet with the header
+                sheet = workbook.add_worksheet(report[:31])
+                sheet.write_row(0, 0, [col[0] for col in cur.description], bold)
+            cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+        workbook.close()
+
+
+def export_workbook(reports, progress=None):
+    """
+    Path to an xlsx of the given reports, reusing the last one generated
+    while none of their tables has changed. Repeated downloads of unchanged
+    data cost one small query.
+    """
+    reports = tuple(reports)
+    key = hashlib.sha256(repr((reports, data_version(reports))).encode()).hexdigest()[:24]
+    path = os.path.join(config.EXPORT_DIR, f"workbook_{key}.xlsx")
+    if os.path.exists(path):
+        os.utime(path)  # Keep it from being purged while it's in use
+        return path
+
+    os.makedirs(config.EXPORT_DIR, exist_ok=True)
+    purge_exports()
+    fd, partial = tempfile.mkstemp(suffix=".xlsx.part", dir=config.EXPORT_DIR)
+    os.close(fd)
+    try:
+        write_workbook(reports, partial, progress)
+        os.replace(partial, path)
+    except Exception:
+        os.remove(partial)
+        raise
+    return path
@@ -0,0 +1,176 @@
+# database/rollups.py
+import sys
+
+from database.db import get_connection
+
+
+# Rollup columns compared by check_kpi_rollups(), in table order
+KPI_COLUMNS = ("professionals_placed", "health_workers_trained", "new_services", "needs_submitted")
+
+# program_feedback rating columns; the rollup keeps <name>_sum and <name>_count
+FEEDBACK_DIMENSIONS = (
+    "content_quality",
+    "trainer_effectiveness",
+    "relevance_to_practice",
+    "organisation_logistics",
+    "overall_satisfaction",
+)
+FEEDBACK_COLUMNS = ("responses",) + tuple(
+    f"{d}_{part}" for d in FEEDBACK_DIMENSIONS for part in ("sum", "count")
+)
+
+
+# ---------------- REBUILD ----------------
+def rebuild_kpi_rollups():
+    """
+    Recompute every facility and state rollup from the raw tables. The
+    triggers from migration 0007 keep them current; this is for repairs.
+    Returns (facilities, states) row counts.
+    """
+    columns = ", ".join(KPI_COLUMNS)
+    sums = ", ".join(f"SUM({c})" for c in KPI_COLUMNS)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        # Block trigger refreshes until the rebuild commits
+        cur.execute("LOCK TABLE facility_kpi_rollup, state_kpi_rollup IN EXCLUSIVE MODE")
+        cur.execute("DELETE FROM facility_kpi_rollup")
+        cur.execute(f"""
+            INSERT INTO facility_kpi_rollup (facility_id, state, {columns})
+            SELECT facility_id, state, {columns} FROM facility_kpi_live
+        """)
+        facilities = cur.rowcount
+        cur.execute("DELETE FROM state_kpi_rollup")
+        cur.execute(f"""
+            INSERT INTO state_kpi_rollup (state, facilities, {columns})
+            SELECT state, COUNT(*), {sums} FROM facility_kpi_rollup GROUP BY state
+        """)
+        states = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return facilities, states
+
+
+# ---------------- CONSISTENCY CHECK ----------------
+def check_kpi_rollups():
+    """
+    Compare the rollups against a full recompute. Returns a list of
+    (scope, key, stored_row, expected_row) for every row that differs;
+    an empty list means the rollups are consistent.
+    """
+    stored = ", ".join(f"r.{c}" for c in KPI_COLUMNS)
+    expected = ", ".join(f"l.{c}" for c in KPI_COLUMNS)
+    sums = ", ".join(f"SUM({c}) AS {c}" for c in KPI_COLUMNS)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT 'facility', COALESCE(r.facility_id, l.facility_id)::text,
+                   ROW(r.state, {stored})::text, ROW(l.state, {expected})::text
+            FROM facility_kpi_rollup r
+            FULL JOIN facility_kpi_live l ON l.facility_id = r.facility_id
+            WHERE (r.state, {stored}) IS DISTINCT FROM (l.state, {expected})
+
+            UNION ALL
+
+            SELECT 'state', COALESCE(r.state, l.state),
+                   ROW(r.facilities, {stored})::text, ROW(l.facilities, {expected})::text
+            FROM state_kpi_rollup r
+            FULL JOIN (
+                SELECT state, COUNT(*) AS facilities, {sums}
+                FROM facility_kpi_live
+                GROUP BY state
+            ) l ON l.state = r.state
+            WHERE (r.facilities, {stored}) IS DISTINCT FROM (l.facilities, {expected})
+        """)
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ---------------- FEEDBACK ----------------
+def rebuild_feedback_rollups():
+    """Recompute program_feedback_rollup from program_feedback. Returns rows written."""
+    columns = ", ".join(FEEDBACK_COLUMNS)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("LOCK TABLE program_feedback_rollup IN EXCLUSIVE MODE")
+        cur.execute("DELETE FROM program_feedback_rollup")
+        cur.execute(f"""
+            INSERT INTO program_feedback_rollup (program_id, period, {columns})
+            SELECT program_id, period, {columns} FROM program_feedback_live
+        """)
+        rows = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return rows
+
+
+def check_feedback_rollups():
+    """
+    Reconcile the feedback rollup with the raw table. Same result shape as
+    check_kpi_rollups(); rollup rows whose feedback was all deleted
+    (responses = 0) count as absent.
+    """
+    stored = ", ".join(f"r.{c}" for c in FEEDBACK_COLUMNS)
+    expected = ", ".join(f"l.{c}" for c in FEEDBACK_COLUMNS)
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT 'feedback',
+                   COALESCE(r.program_id, l.program_id)::text || ' ' || COALESCE(r.period, l.period)::text,
+                   ROW({stored})::text, ROW({expected})::text
+            FROM (SELECT * FROM program_feedback_rollup WHERE responses <> 0) r
+            FULL JOIN program_feedback_live l
+              ON l.program_id = r.program_id AND l.period = r.period
+            WHERE ({stored}) IS DISTINCT FROM ({expected})
+        """)
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ---------------- CLI ----------------
+# name -> (check, rebuild)
+ROLLUPS = {
+    "kpi": (check_kpi_rollups, rebuild_kpi_rollups),
+    "feedback": (check_feedback_rollups, rebuild_feedback_rollups),
+}
+
+
+def main(argv):
+    command = argv[0] if argv else "check"
+    names = argv[1:] or list(ROLLUPS)
+    if command not in ("check", "rebuild") or any(name not in ROLLUPS for name in names):
+        print(f"Usage: python -m database.rollups [check|rebuild] [{'|'.join(ROLLUPS)} ...]")
+        return 1
+
+    status = 0
+    for name in names:
+        check, rebuild = ROLLUPS[name]
+        if command == "rebuild":
+            rebuild()
+            print(f"✅ Rebuilt {name} rollups.")
+            continue
+
+        mismatches = check()
+        for scope, key, stored, expected in mismatches:
+            print(f"{scope} {key}: stored {stored}, expected {expected}")
+        if mismatches:
+            print(f"❌ {len(mismatches)} {name} rollup row(s) out of date; run 'rebuild {name}' to repair.")
+            status = 1
+        else:
+            print(f"✅ {name} rollups match a full recompute.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
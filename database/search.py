@@ -0,0 +1,73 @@
+# database/search.py
+from database.db import get_connection
+
+
+# The text each account is searched by. Migration 0010 indexes exactly
+# these expressions with pg_trgm, so keep the two in step.
+USER_SEARCH_TEXT = (
+    "(COALESCE(username, '') || ' ' || COALESCE(full_name, '') || ' ' || "
+    "COALESCE(email, '') || ' ' || COALESCE(country, ''))"
+)
+FACILITY_SEARCH_TEXT = (
+    "(COALESCE(facility_code, '') || ' ' || COALESCE(facility_name, '') || ' ' || "
+    "COALESCE(state, ''))"
+)
+
+# Shorter queries have no trigrams to look up
+MIN_QUERY_LENGTH = 3
+
+
+def _search(sql, query, limit, cur):
+    query = (query or "").strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return []
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    params = {"q": query, "like": f"%{escaped}%", "limit": limit}
+
+    if cur is not None:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute(sql, params)
+        return c.fetchall()
+    finally:
+        c.close()
+        conn.close()
+
+
+def search_users(query, limit=20, cur=None):
+    """
+    Users whose username, name, email or country contains query, or
+    closely resembles it (typos), best matches first:
+    [(id, username, full_name, role, email, country)].
+    """
+    return _search(f"""
+        SELECT id, username, full_name, role, email, country
+        FROM users
+        WHERE {USER_SEARCH_TEXT} ILIKE %(like)s
+           OR %(q)s <%% {USER_SEARCH_TEXT}
+        ORDER BY {USER_SEARCH_TEXT} ILIKE %(like)s DESC,
+                 word_similarity(%(q)s, {USER_SEARCH_TEXT}) DESC,
+                 username
+        LIMIT %(limit)s
+    """, query, limit, cur)
+
+
+def search_facilities(query, limit=20, cur=None):
+    """
+    Facilities matched on code, name or state, best first:
+    [(id, facility_code, facility_name, state)].
+    """
+    return _search(f"""
+        SELECT id, facility_code, facility_name, state
+        FROM facilities
+        WHERE {FACILITY_SEARCH_TEXT} ILIKE %(like)s
+           OR %(q)s <%% {FACILITY_SEARCH_TEXT}
+        ORDER BY {FACILITY_SEARCH_TEXT} ILIKE %(like)s DESC,
+                 word_similarity(%(q)s, {FACILITY_SEARCH_TEXT}) DESC,
+                 facility_name
+        LIMIT %(limit)s
+    """, query, limit, cur)
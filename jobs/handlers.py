@@ -0,0 +1,105 @@
+# jobs/handlers.py
+from database.db import get_connection
+
+
+# kind -> handler(payload, progress). progress(fraction, message) reports
+# progress and keeps the job's lease alive. Handlers return a JSON-able
+# result or raise to trigger a retry.
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+@handler("match_users")
+def match_users(payload, progress):
+    mode = payload.get("mode", "incremental")
+    if mode == "optimal":
+        from matching.optimal import match_users_optimal
+        return match_users_optimal(payload.get("time_budget", 60.0), progress=progress)
+
+    from matching.incremental import match_users_incremental
+    return match_users_incremental(full=mode == "full", progress=progress)
+
+
+@handler("classify_needs")
+def classify_needs(payload, progress):
+    from database.program_types import classify_needs as run
+    return {"updated": run(reclassify_all=payload.get("all", False))}
+
+
+@handler("purge_tokens")
+def purge_tokens(payload, progress):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM user_password_reset WHERE expiry < now()")
+        reset_tokens = cur.rowcount
+        cur.execute("""
+            DELETE FROM verification_tokens
+            WHERE created_at < now() - %s::interval
+        """, (payload.get("verification_max_age", "7 days"),))
+        verification_tokens = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return {"reset_tokens": reset_tokens, "verification_tokens": verification_tokens}
+
+
+@handler("check_kpi_rollups")
+def check_kpi_rollups(payload, progress):
+    from database.rollups import check_kpi_rollups as check, rebuild_kpi_rollups
+    mismatches = check()
+    if mismatches and payload.get("repair", True):
+        progress(0.5, f"{len(mismatches)} rollup row(s) out of date, rebuilding")
+        rebuild_kpi_rollups()
+    return {"mismatches": len(mismatches)}
+
+
+@handler("check_feedback_rollups")
+def check_feedback_rollups(payload, progress):
+    from database.rollups import check_feedback_rollups as check, rebuild_feedback_rollups
+    mismatches = check()
+    if mismatches and payload.get("repair", True):
+        progress(0.5, f"{len(mismatches)} feedback rollup row(s) out of date, rebuilding")
+        rebuild_feedback_rollups()
+    return {"mismatches": len(mismatches)}
+
+
+@handler("document_thumbnails")
+def document_thumbnails(payload, progress):
+    from storage.thumbnails import make_thumbnail, pending_thumbnails
+    hashes = [payload["sha256"]] if payload.get("sha256") else pending_thumbnails(payload.get("limit", 500))
+    statuses = {}
+    for i, sha256 in enumerate(hashes, 1):
+        status = make_thumbnail(sha256)
+        statuses[status] = statuses.get(status, 0) + 1
+        if i % 50 == 0:
+            progress(i / len(hashes), f"{i}/{len(hashes)} thumbnails")
+    return statuses
+
+
+@handler("export_report_csv")
+def export_report_csv(payload, progress):
+    from database.reports import export_report_csv as export
+    report = payload["report"]
+    progress(0.1, f"Exporting {report}")
+    return {"path": export(report, progress)}
+
+
+@handler("export_workbook")
+def export_workbook(payload, progress):
+    from database.reports import REPORTS, export_workbook as export
+    reports = payload.get("reports") or list(REPORTS)
+    return {"path": export(reports, progress)}
+
+
+@handler("compact_data_changes")
+def compact_data_changes(payload, progress):
+    from database.reports import compact_data_changes as compact
+    return {"folded": compact(payload.get("older_than", "1 hour"))}
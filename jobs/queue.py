@@ -0,0 +1,237 @@
+# jobs/queue.py
+from psycopg2.extras import Json, RealDictCursor
+
+from database.db import get_connection
+
+
+# A running job whose worker has not reported progress for this long is
+# assumed dead and handed to another worker.
+LEASE = "10 minutes"
+
+# Retry backoff: attempt n waits n * RETRY_DELAY
+RETRY_DELAY = "1 minute"
+
+
+# ---------------- PRODUCERS ----------------
+def enqueue(kind, payload=None, created_by=None, priority=0, max_attempts=3, unique=True, cur=None):
+    """
+    Add a job and return its id.
+
+    With unique=True nothing is added while an identical job (same kind and
+    payload) is still queued or running; the existing job's id is returned.
+    Pass cur to enqueue inside the caller's transaction.
+    """
+    payload = payload or {}
+
+    def _enqueue(c):
+        if unique:
+            c.execute("""
+                SELECT id FROM jobs
+                WHERE kind = %s AND payload = %s AND status IN ('queued','running')
+                ORDER BY id LIMIT 1
+            """, (kind, Json(payload)))
+            row = c.fetchone()
+            if row:
+                return row[0]
+        c.execute("""
+            INSERT INTO jobs (kind, payload, created_by, priority, max_attempts)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING id
+        """, (kind, Json(payload), created_by, priority, max_attempts))
+        return c.fetchone()[0]
+
+    if cur is not None:
+        return _enqueue(cur)
+
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        job_id = _enqueue(c)
+        conn.commit()
+        return job_id
+    finally:
+        c.close()
+        conn.close()
+
+
+def enqueue_due_schedules():
+    """Turn every due schedule into a job. Safe to call from many workers."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE job_schedules s
+            SET next_run_at = GREATEST(s.next_run_at + s.interval_seconds * interval '1 second',
+                                       now() + interval '1 second')
+            WHERE s.name IN (
+                SELECT name FROM job_schedules
+                WHERE enabled AND next_run_at <= now()
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING s.name, s.kind, s.payload
+        """)
+        due = cur.fetchall()
+        for name, kind, payload in due:
+            enqueue(kind, payload, created_by=f"schedule:{name}", cur=cur)
+        conn.commit()
+        return len(due)
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ---------------- WORKERS ----------------
+def claim(worker_id):
+    """
+    Claim the next runnable job with SKIP LOCKED, so concurrent workers
+    never block on or double-run the same row. Returns a dict or None.
+
+    A running job whose lease expired is retried like a failure; once it
+    has used up max_attempts (its worker keeps dying) it is marked failed
+    instead of being handed out again.
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            UPDATE jobs
+            SET status = 'failed', finished_at = now(), locked_by = NULL, locked_at = NULL,
+                last_error = 'Lease expired: worker stopped reporting progress on attempt '
+                             || attempts || ' of ' || max_attempts
+            WHERE status = 'running'
+              AND locked_at < now() - %s::interval
+              AND attempts >= max_attempts
+        """, (LEASE,))
+        cur.execute("""
+            UPDATE jobs
+            SET status = 'running',
+                attempts = attempts + 1,
+                locked_by = %s,
+                locked_at = now()
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND run_at <= now())
+                   OR (status = 'running' AND locked_at < now() - %s::interval
+                       AND attempts < max_attempts)
+                ORDER BY priority DESC, run_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, kind, payload, attempts, max_attempts
+        """, (worker_id, LEASE))
+        job = cur.fetchone()
+        conn.commit()
+        return job
+    finally:
+        cur.close()
+        conn.close()
+
+
+# complete(), fail() and set_progress() only touch a job the calling worker
+# still holds: if its lease expired and another worker reclaimed the job,
+# the stale worker's writes are dropped and they return False.
+def _update_owned(sql, params, job_id, worker_id):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql + " WHERE id = %s AND locked_by = %s AND status = 'running'",
+                    params + (job_id, worker_id))
+        owned = cur.rowcount == 1
+        conn.commit()
+        return owned
+    finally:
+        cur.close()
+        conn.close()
+
+
+def set_progress(job_id, worker_id, fraction, message=None):
+    """Record progress (0..1); doubles as the worker's heartbeat."""
+    return _update_owned("""
+        UPDATE jobs
+        SET progress = %s, progress_message = %s, locked_at = now()
+    """, (max(0.0, min(1.0, fraction)), message), job_id, worker_id)
+
+
+def complete(job_id, worker_id, result=None):
+    return _update_owned("""
+        UPDATE jobs
+        SET status = 'done', progress = 1, result = %s,
+            finished_at = now(), locked_by = NULL, locked_at = NULL
+    """, (Json(result),), job_id, worker_id)
+
+
+def fail(job_id, worker_id, error):
+    """Requeue with backoff, or mark failed once max_attempts is reached."""
+    return _update_owned("""
+        UPDATE jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+            run_at = now() + attempts * %s::interval,
+            finished_at = CASE WHEN attempts >= max_attempts THEN now() END,
+            last_error = %s, locked_by = NULL, locked_at = NULL
+    """, (RETRY_DELAY, str(error)[:2000]), job_id, worker_id)
+
+
+# ---------------- STATUS ----------------
+def recent_jobs(limit=50):
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT id, kind, status, progress, progress_message, attempts, max_attempts,
+                   created_by, created_at, run_at, finished_at, last_error, result
+            FROM jobs
+            ORDER BY created_at DESC
+            LIMIT %s
+        """, (limit,))
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_job(job_id):
+    """One job's status, progress and result, or None."""
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT id, kind, status, progress, progress_message, attempts, max_attempts,
+                   finished_at, last_error, result
+            FROM jobs
+            WHERE id = %s
+        """, (job_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def retry(job_id):
+    """Put a failed job back on the queue with a fresh attempt budget."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE jobs
+            SET status = 'queued', attempts = 0, run_at = now(), last_error = NULL, finished_at = NULL
+            WHERE id = %s AND status = 'failed'
+        """, (job_id,))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def list_schedules():
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT name, kind, interval_seconds, next_run_at, enabled
+            FROM job_schedules
+            ORDER BY name
+        """)
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
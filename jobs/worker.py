@@ -0,0 +1,76 @@
+# jobs/worker.py
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+
+from jobs import queue
+from jobs.handlers import HANDLERS
+
+
+POLL_SECONDS = 2.0
+SCHEDULE_SECONDS = 30.0
+
+
+def run_job(job, worker_id):
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        queue.fail(job["id"], worker_id, f"No handler registered for job kind '{job['kind']}'")
+        return
+
+    def progress(fraction, message=None):
+        queue.set_progress(job["id"], worker_id, fraction, message)
+
+    try:
+        result = handler(job["payload"] or {}, progress)
+    except Exception:
+        owned = queue.fail(job["id"], worker_id, traceback.format_exc())
+    else:
+        owned = queue.complete(job["id"], worker_id, result)
+    if not owned:
+        print(f"[{worker_id}] job {job['id']} was reclaimed by another worker; result discarded")
+
+
+def work(once=False):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    next_schedule_check = 0.0
+    print(f"Worker {worker_id} started")
+
+    while True:
+        if time.monotonic() >= next_schedule_check:
+            queue.enqueue_due_schedules()
+            next_schedule_check = time.monotonic() + SCHEDULE_SECONDS
+
+        job = queue.claim(worker_id)
+        if job is not None:
+            print(f"[{worker_id}] job {job['id']} ({job['kind']}) attempt {job['attempts']}")
+            run_job(job, worker_id)
+            continue
+
+        if once:
+            return
+        time.sleep(POLL_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run NiDAH-P background job workers.")
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        work(args.once)
+        return
+
+    # Each process builds its own connection pool lazily after the fork
+    workers = [multiprocessing.Process(target=work, args=(args.once,)) for _ in range(args.processes)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# matching/engine.py
+import re
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+from psycopg2.extras import execute_values
+
+from database.db import get_connection
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def no_progress(fraction, message=None):
+    """Progress callback for runs outside the job queue."""
+
+
+# ---------------- NORMALIZATION ----------------
+def normalize_term(term):
+    return " ".join(term.lower().split())
+
+
+def parse_skills(specialization):
+    """'Urology, General Surgery' -> frozenset({'urology', 'general surgery'})"""
+    if not specialization:
+        return frozenset()
+    return frozenset(t for t in (normalize_term(s) for s in specialization.split(",")) if t)
+
+
+def need_terms(need_text):
+    """
+    Terms a need can be matched on: each comma-separated phrase plus each
+    word, so 'Urology surgeon, ICU nurse' matches a 'Urology' specialist.
+    """
+    if not need_text:
+        return set()
+    terms = {t for t in (normalize_term(p) for p in need_text.split(",")) if t}
+    terms.update(_WORD.findall(need_text.lower()))
+    return terms
+
+
+# ---------------- INDEX ----------------
+class NeedIndex:
+    """Inverted index from normalized term to the needs that mention it."""
+
+    def __init__(self, needs):
+        """needs: iterable of (need_id, facility_id, need_text)"""
+        self.postings = defaultdict(list)
+        self.need_facility = {}
+        for need_id, facility_id, need_text in needs:
+            self.need_facility[need_id] = facility_id
+            for term in need_terms(need_text):
+                self.postings[term].append(need_id)
+
+    def candidates(self, skills):
+        """Score every need sharing at least one term with the skills."""
+        return Counter(chain.from_iterable(self.postings.get(s, ()) for s in skills))
+
+    def postings_size(self, skills):
+        """Number of (skill, need) pairs looked at when scoring these skills."""
+        return sum(len(self.postings.get(s, ())) for s in skills)
+
+    def best_need(self, skills):
+        """(need_id, score) of the highest scoring need, lowest id on ties."""
+        if len(skills) == 1:
+            # Every candidate scores 1, so the lowest need id wins
+            posting = self.postings.get(next(iter(skills)))
+            return (min(posting), 1) if posting else (None, 0)
+
+        scores = self.candidates(skills)
+        if not scores:
+            return None, 0
+        best_score = max(scores.values())
+        return min(n for n, score in scores.items() if score == best_score), best_score
+
+
+def greedy_matches(user_skills, index):
+    """
+    Best need per user. Users with identical skill sets are scored once,
+    which matters because most specializations come from a fixed list.
+
+    Returns [(user_id, facility_id, need_id, score)].
+    """
+    by_skills = {}
+    matches = []
+    for user_id, skills in user_skills.items():
+        if not skills:
+            continue
+        if skills not in by_skills:
+            by_skills[skills] = index.best_need(skills)
+        need_id, score = by_skills[skills]
+        if need_id is not None:
+            matches.append((user_id, index.need_facility[need_id], need_id, score))
+    return matches
+
+
+# ---------------- DATABASE ----------------
+def load_user_skills(cur, user_ids=None):
+    """
+    Specializations of individuals/associations whose assignment hasn't
+    been decided: an admin's Approved or Rejected verdict is final.
+    """
+    cur.execute("""
+        SELECT u.id, u.specialization
+        FROM users u
+        LEFT JOIN user_assignments ua
+               ON ua.user_id = u.id AND ua.status IN ('Approved', 'Rejected')
+        WHERE u.role IN ('individual','association')
+          AND ua.user_id IS NULL
+          AND (%s::int[] IS NULL OR u.id = ANY(%s::int[]))
+    """, (user_ids, user_ids))
+    return {user_id: parse_skills(spec) for user_id, spec in cur.fetchall()}
+
+
+def load_needs(cur):
+    cur.execute("SELECT id, facility_id, need FROM facility_needs")
+    return cur.fetchall()
+
+
+def save_assignments(cur, matches):
+    """
+    One bulk upsert into user_assignments. Approved and Rejected
+    assignments are never overwritten, and rows whose proposal is unchanged keep their status and
+    timestamp. Returns the number of rows inserted or changed.
+    """
+    if not matches:
+        return 0
+    execute_values(cur, """
+        INSERT INTO user_assignments (user_id, facility_id, need_id, score, assigned_at, status)
+        VALUES %s
+        ON CONFLICT (user_id) DO UPDATE
+        SET facility_id = EXCLUDED.facility_id,
+            need_id = EXCLUDED.need_id,
+            score = EXCLUDED.score,
+            assigned_at = EXCLUDED.assigned_at,
+            status = 'Pending'
+        WHERE user_assignments.status IS DISTINCT FROM 'Approved'
+          AND user_assignments.status IS DISTINCT FROM 'Rejected'
+          AND (user_assignments.facility_id, user_assignments.need_id, user_assignments.score)
+              IS DISTINCT FROM (EXCLUDED.facility_id, EXCLUDED.need_id, EXCLUDED.score)
+    """, matches, template="(%s, %s, %s, %s, NOW(), 'Pending')", page_size=len(matches))
+    return cur.rowcount
+
+
+def match_users_to_facilities():
+    """
+    Assign users to facility needs based on their skills vs the need text.
+    Matches are inserted as 'Pending'. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        index = NeedIndex(load_needs(cur))
+        user_skills = load_user_skills(cur)
+        matches = greedy_matches(user_skills, index)
+        save_assignments(cur, matches)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    return {
+        "users": len(user_skills),
+        "matched": len(matches),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,122 @@
+# matching/incremental.py
+import time
+
+from database.db import get_connection
+from matching.engine import (
+    NeedIndex, greedy_matches, load_needs, load_user_skills, need_terms, no_progress, save_assignments
+)
+
+
+WATERMARK = "matching.greedy"
+
+# Re-read a little before the previous watermark so rows committed by
+# transactions that were still open during the last run are not missed.
+WATERMARK_OVERLAP = "5 minutes"
+
+
+def _affected_user_ids(cur, since, changed_need_ids, changed_terms):
+    """
+    Users whose best need may have changed since the watermark:
+    - their own specialization/role changed (or they just registered)
+    - their pending assignment points at a need that changed or was deleted
+      (the need's new text may no longer mention their skills)
+    - a changed need mentions one of their skills
+    """
+    cur.execute("""
+        SELECT u.id
+        FROM users u
+        WHERE u.role IN ('individual','association')
+          AND (
+                u.updated_at > %(since)s - %(overlap)s::interval
+             OR EXISTS (
+                    SELECT 1
+                    FROM user_assignments ua
+                    LEFT JOIN facility_needs n ON n.id = ua.need_id
+                    WHERE ua.user_id = u.id
+                      AND ua.status = 'Pending'
+                      AND (n.id IS NULL OR ua.need_id = ANY(%(changed)s))
+                )
+             OR EXISTS (
+                    SELECT 1
+                    FROM unnest(string_to_array(lower(u.specialization), ',')) AS s(skill)
+                    WHERE regexp_replace(btrim(s.skill), '\\s+', ' ', 'g') = ANY(%(terms)s)
+                )
+          )
+    """, {"since": since, "overlap": WATERMARK_OVERLAP,
+          "changed": changed_need_ids, "terms": list(changed_terms)})
+    return [row[0] for row in cur.fetchall()]
+
+
+def match_users_incremental(full=False, progress=no_progress):
+    """
+    Re-score only users affected by changes since the last run and write
+    only the assignments that actually changed. full=True re-scores every
+    user (still leaving unchanged rows alone). progress(fraction, message)
+    is called as each phase starts.
+
+    Returns a summary with users_rescored, pairs_rescored, changed and seconds.
+    """
+    started = time.perf_counter()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT now()")
+        run_started = cur.fetchone()[0]
+        cur.execute("SELECT value FROM sync_watermarks WHERE name = %s", (WATERMARK,))
+        row = cur.fetchone()
+        since = None if full or row is None else row[0]
+
+        progress(0.05, "Loading needs")
+        needs = load_needs(cur)
+        index = NeedIndex(needs)
+
+        progress(0.2, "Finding users to re-score" if since else "Loading all users")
+        if since is None:
+            user_skills = load_user_skills(cur)
+        else:
+            cur.execute("""
+                SELECT id, need FROM facility_needs
+                WHERE updated_at > %s - %s::interval
+            """, (since, WATERMARK_OVERLAP))
+            changed_need_ids, changed_terms = [], set()
+            for need_id, need_text in cur.fetchall():
+                changed_need_ids.append(need_id)
+                changed_terms |= need_terms(need_text)
+            user_skills = load_user_skills(
+                cur, _affected_user_ids(cur, since, changed_need_ids, changed_terms)
+            )
+
+        progress(0.4, f"Scoring {len(user_skills):,} users")
+        matches = greedy_matches(user_skills, index)
+        pairs = sum(index.postings_size(skills) for skills in user_skills.values())
+        progress(0.6, f"Saving {len(matches):,} matches")
+        changed = save_assignments(cur, matches)
+
+        # Re-scored users with no match left lose their pending proposal,
+        # whether its need was deleted or simply no longer fits them
+        matched = [m[0] for m in matches]
+        cur.execute("""
+            DELETE FROM user_assignments
+            WHERE status = 'Pending'
+              AND user_id = ANY(%s) AND user_id <> ALL(%s)
+        """, (list(user_skills), matched))
+        changed += cur.rowcount
+
+        progress(0.95, "Committing")
+        cur.execute("""
+            INSERT INTO sync_watermarks (name, value) VALUES (%s, %s)
+            ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+        """, (WATERMARK, run_started))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    return {
+        "users": len(user_skills),
+        "matched": len(matches),
+        "users_rescored": len(user_skills),
+        "pairs_rescored": pairs,
+        "changed": changed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
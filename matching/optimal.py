@@ -0,0 +1,250 @@
+# matching/optimal.py
+import heapq
+import sys
+import time
+from array import array
+from collections import deque
+
+from database.db import get_connection
+from matching.engine import NeedIndex, greedy_matches, load_user_skills, no_progress, save_assignments
+
+
+DEFAULT_TIME_BUDGET = 60.0
+DEFAULT_MAX_CANDIDATES = 50
+
+
+# ---------------- CANDIDATE GRAPH ----------------
+def _candidate_lists(user_ids, user_skills, index, capacity, max_candidates):
+    """
+    Sparse user -> need edges, at most max_candidates per user, stored as
+    compact arrays so 50k users stay within a bounded amount of memory.
+
+    When a skill set has more top-scoring needs than max_candidates, each
+    user gets a different window over them, so users sharing a
+    specialization spread over all suitable needs instead of competing for
+    the same few.
+    """
+    by_skills = {}
+    needs_out, scores_out = [], []
+
+    for position, user_id in enumerate(user_ids):
+        skills = user_skills[user_id]
+        ranked = by_skills.get(skills)
+        if ranked is None:
+            scored = [(n, s) for n, s in index.candidates(skills).items() if capacity.get(n, 0) > 0]
+            top_score = max((s for _, s in scored), default=0)
+            tier = array("i", sorted(n for n, s in scored if s == top_score))
+            rest = sorted(((n, s) for n, s in scored if s != top_score), key=lambda ns: (-ns[1], ns[0]))
+            by_skills[skills] = ranked = (top_score, tier, rest[:max_candidates])
+
+        top_score, tier, rest = ranked
+        if len(tier) > max_candidates:
+            start = (position * max_candidates) % len(tier)
+            chosen = tier[start:start + max_candidates]
+            if len(chosen) < max_candidates:
+                chosen += tier[:max_candidates - len(chosen)]
+            needs_out.append(chosen)
+            scores_out.append(array("i", [top_score]) * len(chosen))
+        else:
+            extra = rest[:max_candidates - len(tier)]
+            needs_out.append(tier + array("i", (n for n, _ in extra)))
+            scores_out.append(array("i", [top_score]) * len(tier) + array("i", (s for _, s in extra)))
+
+    return needs_out, scores_out
+
+
+# ---------------- AUCTION ----------------
+def _auction_phase(cand_needs, cand_scores, capacity, prices, eps, deadline):
+    """
+    One epsilon phase of a forward auction with per-need capacity.
+
+    Each need keeps a min-heap of the bids it currently holds; once full its
+    price is the lowest held bid. Staying unmatched is worth 0, so users
+    never take a need whose score does not beat its price. Returns
+    (holders, finished) - holders is always a capacity-feasible assignment.
+    """
+    holders = {}
+    queue = deque(range(len(cand_needs)))
+    steps = 0
+
+    while queue:
+        steps += 1
+        if steps & 1023 == 0 and time.monotonic() > deadline:
+            return holders, False
+
+        i = queue.popleft()
+        best_value = second_value = 0.0
+        best_need = -1
+        for need_id, score in zip(cand_needs[i], cand_scores[i]):
+            value = score - prices.get(need_id, 0.0)
+            if value > best_value:
+                second_value, best_value, best_need = best_value, value, need_id
+            elif value > second_value:
+                second_value = value
+        if best_need < 0:
+            continue
+
+        bid = prices.get(best_need, 0.0) + best_value - second_value + eps
+        heap = holders.setdefault(best_need, [])
+        heapq.heappush(heap, (bid, i))
+        if len(heap) > capacity[best_need]:
+            _, outbid = heapq.heappop(heap)
+            queue.append(outbid)
+        if len(heap) == capacity[best_need]:
+            prices[best_need] = heap[0][0]
+
+    return holders, True
+
+
+def optimal_matches(user_skills, index, capacity, time_budget=DEFAULT_TIME_BUDGET,
+                    max_candidates=DEFAULT_MAX_CANDIDATES, progress=no_progress):
+    """
+    Capacity-aware assignment maximizing the total match score.
+
+    capacity maps need_id -> open places. Runs forward auctions with a
+    shrinking epsilon; each finished phase is within users * eps of the
+    optimum over the candidate graph, and eps < 1/users is exact for the
+    integer scores used here. Phases restart from zero prices (carrying
+    prices over lets users drop out for good once a need looks too
+    expensive), and the best finished phase wins. If time_budget runs out
+    before any phase finishes, the feasible partial assignment is returned.
+    progress(fraction of time_budget used, message) is called after each
+    phase.
+
+    Returns [(user_id, facility_id, need_id, score)].
+    """
+    started = time.monotonic()
+    deadline = started + time_budget
+    user_ids = [u for u, skills in user_skills.items() if skills]
+    cand_needs, cand_scores = _candidate_lists(user_ids, user_skills, index, capacity, max_candidates)
+
+    def total(holders):
+        return sum(
+            cand_scores[i][cand_needs[i].index(need_id)]
+            for need_id, heap in holders.items() for _, i in heap
+        )
+
+    final_eps = 1.0 / (len(user_ids) + 1)
+    eps = 0.5
+    best, best_total = {}, -1
+
+    while True:
+        holders, finished = _auction_phase(cand_needs, cand_scores, capacity, {}, eps, deadline)
+        if finished or best_total < 0:
+            holders_total = total(holders)
+            if holders_total > best_total:
+                best, best_total = holders, holders_total
+        progress(min(1.0, (time.monotonic() - started) / time_budget),
+                 f"Auction phase eps={eps:.3g} {'finished' if finished else 'timed out'}, best total {best_total}")
+        if not finished or eps <= final_eps:
+            break
+        eps = max(eps / 4.0, final_eps)
+
+    matches = []
+    for need_id, heap in best.items():
+        facility_id = index.need_facility[need_id]
+        for _, i in heap:
+            score = cand_scores[i][cand_needs[i].index(need_id)]
+            matches.append((user_ids[i], facility_id, need_id, score))
+    return matches
+
+
+# ---------------- COMPARISON ----------------
+def summarize(matches, capacity, seconds):
+    used = {}
+    for _, _, need_id, _ in matches:
+        used[need_id] = used.get(need_id, 0) + 1
+    over = sum(max(0, n - capacity.get(need_id, 0)) for need_id, n in used.items())
+    return {
+        "seconds": round(seconds, 2),
+        "matched": len(matches),
+        "total_score": sum(m[3] for m in matches),
+        "over_capacity": over,
+    }
+
+
+def compare_modes(user_skills, index, capacity, time_budget=DEFAULT_TIME_BUDGET):
+    """Runtime/quality of greedy vs optimal mode on the same inputs."""
+    started = time.perf_counter()
+    greedy = greedy_matches(user_skills, index)
+    greedy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    optimal = optimal_matches(user_skills, index, capacity, time_budget)
+    optimal_seconds = time.perf_counter() - started
+
+    return {
+        "greedy": summarize(greedy, capacity, greedy_seconds),
+        "optimal": summarize(optimal, capacity, optimal_seconds),
+    }
+
+
+# ---------------- DATABASE ----------------
+def load_needs_with_capacity(cur):
+    """Needs and their open places (number minus Approved assignments)."""
+    cur.execute("""
+        SELECT n.id, n.facility_id, n.need,
+               GREATEST(COALESCE(n.number, 1) - COUNT(ua.user_id), 0) AS open_places
+        FROM facility_needs n
+        LEFT JOIN user_assignments ua
+               ON ua.need_id = n.id AND ua.status = 'Approved'
+        GROUP BY n.id
+    """)
+    rows = cur.fetchall()
+    index = NeedIndex((need_id, facility_id, need) for need_id, facility_id, need, _ in rows)
+    capacity = {need_id: open_places for need_id, _, _, open_places in rows}
+    return index, capacity
+
+
+def match_users_optimal(time_budget=DEFAULT_TIME_BUDGET, progress=no_progress):
+    """
+    Replace all Pending assignments with a capacity-respecting optimal set.
+    Approved assignments are kept and count against capacity; users with a
+    Rejected assignment are left out.
+    """
+    started = time.perf_counter()
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        progress(0.05, "Loading needs")
+        index, capacity = load_needs_with_capacity(cur)
+        progress(0.1, "Loading users")
+        user_skills = load_user_skills(cur)
+        progress(0.15, f"Matching {len(user_skills):,} users")
+        matches = optimal_matches(
+            user_skills, index, capacity, time_budget,
+            progress=lambda fraction, message=None: progress(0.15 + 0.7 * fraction, message)
+        )
+
+        progress(0.9, f"Saving {len(matches):,} matches")
+        cur.execute("""
+            DELETE FROM user_assignments
+            WHERE status = 'Pending' AND user_id <> ALL(%s)
+        """, ([m[0] for m in matches],))
+        save_assignments(cur, matches)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    return {
+        "users": len(user_skills),
+        "matched": len(matches),
+        "total_score": sum(m[3] for m in matches),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    # Offline: python -m matching.optimal [--compare]
+    if "--compare" in sys.argv[1:]:
+        conn = get_connection()
+        cur = conn.cursor()
+        index, capacity = load_needs_with_capacity(cur)
+        user_skills = load_user_skills(cur)
+        cur.close()
+        conn.close()
+        for mode, stats in compare_modes(user_skills, index, capacity).items():
+            print(f"{mode:<8} {stats}")
+    else:
+        print(match_users_optimal())
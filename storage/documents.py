@@ -0,0 +1,267 @@
+# storage/documents.py
+import hashlib
+import mimetypes
+import os
+import tempfile
+from dataclasses import dataclass
+
+from psycopg2.extras import execute_values
+
+import config
+from database.db import get_connection
+from jobs.queue import enqueue
+
+
+@dataclass(frozen=True)
+class StoredDocument:
+    sha256: str
+    size_bytes: int
+    mime_type: str
+    path: str
+    deduplicated: bool          # True when identical content was already stored
+    original_size_bytes: int    # size as uploaded; larger than size_bytes if normalized
+    name: str                   # file name to record, extension matching mime_type
+
+    @property
+    def bytes_saved(self):
+        return self.original_size_bytes - self.size_bytes
+
+
+def blob_path(sha256):
+    """Where a blob lives: <store>/ab/cd/abcd…, so no directory gets huge."""
+    return os.path.join(config.DOCUMENT_STORE_DIR, sha256[:2], sha256[2:4], sha256)
+
+
+def _copy_and_hash(fileobj, out):
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = fileobj.read(config.DOCUMENT_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        out.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class _Discard:
+    def write(self, chunk):
+        pass
+
+
+def _hash_file(path):
+    with open(path, "rb") as f:
+        return _copy_and_hash(f, _Discard())
+
+
+def _place(partial, sha256):
+    """Move a finished temp file to its blob path. Returns (path, already_stored)."""
+    path = blob_path(sha256)
+    if os.path.exists(path):
+        os.remove(partial)
+        return path, True
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Atomic, and harmless if a concurrent upload of the same content got
+    # there first
+    os.replace(partial, path)
+    return path, False
+
+
+# ---------------- IMAGE NORMALIZATION ----------------
+NORMALIZABLE_TYPES = {"image/jpeg", "image/png"}
+
+_EXTENSIONS = {"image/jpeg": (".jpg", ".jpeg", ".jpe"), "image/png": (".png",)}
+
+
+def renamed_for(filename, mime_type):
+    """filename with its extension changed when normalization changed the format."""
+    extensions = _EXTENSIONS.get(mime_type)
+    root, extension = os.path.splitext(filename)
+    if not extensions or extension.lower() in extensions:
+        return filename
+    return root + extensions[0]
+
+
+def normalize_image(source, destination):
+    """
+    Decode an uploaded photo once, apply its EXIF rotation, shrink it to
+    IMAGE_MAX_DIMENSION and re-encode it into destination: JPEG, or PNG for
+    images with transparency or a palette. Returns the new MIME type, or
+    None when the result would be no better than the original.
+    """
+    from PIL import Image, ImageOps
+
+    max_dim = config.IMAGE_MAX_DIMENSION
+    with Image.open(source) as image:
+        source_format = image.format
+        rotated = image.getexif().get(0x0112, 1) != 1   # EXIF Orientation
+        oversized = max(image.size) > max_dim
+        if source_format == "JPEG":
+            image.draft("RGB", (max_dim, max_dim))       # decode at reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dim, max_dim), Image.LANCZOS)
+
+        if source_format == "PNG" and (image.mode in ("P", "LA", "RGBA") or "transparency" in image.info):
+            image.save(destination, "PNG", optimize=True)
+            mime_type = "image/png"
+        else:
+            image.convert("RGB").save(
+                destination, "JPEG", quality=config.IMAGE_JPEG_QUALITY, optimize=True, progressive=True
+            )
+            mime_type = "image/jpeg"
+
+    if not (rotated or oversized) and os.path.getsize(destination) >= os.path.getsize(source):
+        return None
+    return mime_type
+
+
+def _normalized_for(cur, original_sha256):
+    """A previous normalization of the same original upload, if any."""
+    cur.execute("""
+        SELECT sha256, size_bytes, mime_type, storage_path
+        FROM document_blobs
+        WHERE original_sha256 = %s
+        LIMIT 1
+    """, (original_sha256,))
+    return cur.fetchone()
+
+
+# ---------------- UPLOADS ----------------
+def store_upload(fileobj, filename, mime_type=None):
+    """
+    Save an uploaded file into the content-addressed store and return a
+    StoredDocument. The upload is copied in DOCUMENT_CHUNK_SIZE pieces
+    while its SHA-256 is computed, so it is never duplicated in memory;
+    content that is already stored is not written a second time. JPEG and
+    PNG photos are normalized first when NORMALIZE_IMAGES is on; if that
+    turns a PNG into a JPEG, the returned name gets a .jpg extension.
+    """
+    mime_type = mime_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+
+    os.makedirs(config.DOCUMENT_STORE_DIR, exist_ok=True)
+    fd, original_tmp = tempfile.mkstemp(suffix=".part", dir=config.DOCUMENT_STORE_DIR)
+    temp_files = [original_tmp]
+    upload_mime_type = mime_type
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            original_sha256, original_size = _copy_and_hash(fileobj, out)
+        sha256, size = original_sha256, original_size
+        stored_tmp, path = original_tmp, None
+        normalized_from = None
+
+        if config.NORMALIZE_IMAGES and mime_type in NORMALIZABLE_TYPES:
+            previous = _normalized_for(cur, original_sha256)
+            if previous is not None:
+                # Same photo uploaded before: reuse its normalized version
+                sha256, size, mime_type, path = previous
+                stored_tmp, normalized_from = None, original_sha256
+            else:
+                from PIL import Image
+
+                fd, normalized_tmp = tempfile.mkstemp(suffix=".part", dir=config.DOCUMENT_STORE_DIR)
+                os.close(fd)
+                temp_files.append(normalized_tmp)
+                try:
+                    new_mime_type = normalize_image(original_tmp, normalized_tmp)
+                except (OSError, ValueError, Image.DecompressionBombError):
+                    # Not decodable as an image, or too many pixels to
+                    # decode safely: store as uploaded
+                    new_mime_type = None
+                if new_mime_type is not None:
+                    sha256, size = _hash_file(normalized_tmp)
+                    mime_type = new_mime_type
+                    stored_tmp, normalized_from = normalized_tmp, original_sha256
+
+        if normalized_from is not None and config.IMAGE_KEEP_ORIGINAL:
+            original_path, _ = _place(original_tmp, original_sha256)
+            cur.execute("""
+                INSERT INTO document_blobs
+                    (sha256, size_bytes, mime_type, storage_path, upload_count, thumbnail_status)
+                VALUES (%s, %s, %s, %s, 0, 'original')
+                ON CONFLICT (sha256) DO NOTHING
+            """, (original_sha256, original_size, upload_mime_type, original_path))
+
+        if stored_tmp is not None:
+            path, deduplicated = _place(stored_tmp, sha256)
+        else:
+            deduplicated = True
+
+        cur.execute("""
+            INSERT INTO document_blobs
+                (sha256, size_bytes, mime_type, storage_path, original_sha256, original_size_bytes)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (sha256) DO UPDATE
+            SET upload_count = document_blobs.upload_count + 1,
+                last_uploaded_at = now()
+            RETURNING thumbnail_status
+        """, (sha256, size, mime_type, path, normalized_from, original_size if normalized_from else None))
+        if cur.fetchone()[0] == "pending":
+            # Previews are made by the job workers, never in the upload request
+            enqueue("document_thumbnails", {"sha256": sha256}, created_by="upload", cur=cur)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+        for temp in temp_files:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    name = renamed_for(filename, mime_type) if normalized_from else filename
+    return StoredDocument(sha256, size, mime_type, path, deduplicated, original_size, name)
+
+
+# ---------------- ADDITIONAL FILES ----------------
+def record_additional_files(cur, files, user_document_id=None, association_user_id=None):
+    """
+    Replace the additional files recorded for one user_documents row (or
+    one association's documents) with files, a list of StoredDocument, in
+    the caller's transaction.
+    """
+    owner = "user_document_id" if user_document_id is not None else "association_user_id"
+    owner_id = user_document_id if user_document_id is not None else association_user_id
+    cur.execute(f"DELETE FROM additional_document_files WHERE {owner} = %s", (owner_id,))
+    if files:
+        execute_values(cur, f"""
+            INSERT INTO additional_document_files
+                ({owner}, position, file_name, storage_path, content_sha256, size_bytes, mime_type)
+            VALUES %s
+        """, [
+            (owner_id, position, f.name, f.path, f.sha256, f.size_bytes, f.mime_type)
+            for position, f in enumerate(files, 1)
+        ])
+
+
+def storage_stats():
+    """
+    Distinct files stored, bytes on disk, bytes saved by deduplication
+    (what re-uploads of identical content would otherwise have used) and
+    by image normalization (uploaded size minus stored size).
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(upload_count), 0),
+                   COALESCE(SUM(size_bytes), 0),
+                   COALESCE(SUM(GREATEST(upload_count - 1, 0) * size_bytes), 0),
+                   COALESCE(SUM(upload_count * (original_size_bytes - size_bytes))
+                            FILTER (WHERE original_size_bytes IS NOT NULL), 0)
+            FROM document_blobs
+        """)
+        blobs, uploads, stored_bytes, saved_bytes, normalized_bytes = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    return {
+        "blobs": blobs,
+        "uploads": uploads,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": saved_bytes,
+        "normalization_saved_bytes": normalized_bytes,
+    }
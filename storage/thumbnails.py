@@ -0,0 +1,106 @@
+# storage/thumbnails.py
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+import config
+from database.db import get_connection
+
+
+# Formats Pillow can decode; PDFs need a renderer Pillow doesn't have, so
+# they are marked unsupported and shown without a preview
+PREVIEWABLE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "image/bmp", "image/tiff"}
+
+
+def thumbnail_path(sha256):
+    return os.path.join(config.THUMBNAIL_DIR, sha256[:2], f"{sha256}.jpg")
+
+
+def render_thumbnail(source, destination, size=None):
+    """Write a JPEG preview of the image at source, at most size pixels square."""
+    size = size or config.THUMBNAIL_SIZE
+    with Image.open(source) as image:
+        image.draft("RGB", (size, size))   # JPEG: decode at reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, partial = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(destination))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, "JPEG", quality=80, optimize=True)
+            os.replace(partial, destination)
+        except Exception:
+            os.remove(partial)
+            raise
+
+
+def make_thumbnail(sha256):
+    """Generate the thumbnail for one stored blob and record the outcome."""
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT storage_path, mime_type FROM document_blobs WHERE sha256 = %s", (sha256,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        storage_path, mime_type = row
+
+        if mime_type not in PREVIEWABLE_TYPES:
+            status = "unsupported"
+        elif os.path.exists(thumbnail_path(sha256)):
+            status = "ready"
+        else:
+            try:
+                render_thumbnail(storage_path, thumbnail_path(sha256))
+                status = "ready"
+            except (OSError, ValueError, Image.DecompressionBombError):
+                status = "failed"
+
+        cur.execute("UPDATE document_blobs SET thumbnail_status = %s WHERE sha256 = %s", (status, sha256))
+        conn.commit()
+        return status
+    finally:
+        cur.close()
+        conn.close()
+
+
+def pending_thumbnails(limit=500):
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT sha256 FROM document_blobs
+            WHERE thumbnail_status = 'pending'
+            ORDER BY created_at
+            LIMIT %s
+        """, (limit,))
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+def get_thumbnails(document_ids):
+    """{document id: thumbnail path} for the given documents that have one."""
+    if not document_ids:
+        return {}
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT d.id, d.content_sha256
+            FROM user_documents d
+            JOIN document_blobs b ON b.sha256 = d.content_sha256
+            WHERE d.id = ANY(%s) AND b.thumbnail_status = 'ready'
+        """, (list(document_ids),))
+        return {doc_id: thumbnail_path(sha256) for doc_id, sha256 in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()